@@ -1,4 +1,5 @@
 from math import ceil
+import sys
 
 TWEAKABLES_IN_R_AND_T = 15
 WANTED_TWEAKABLES = 1000
@@ -539,14 +540,17 @@ tweakable tupleWithBoxAsArgumentForNewProxy{lab_index} {{
 }}
 """
 
-with open("./lab.jspl", 'w') as output:
-    output.write(LAB_PREFIX)
+def generate_lab(wanted_tweakables: int) -> str:
+    randt_copies = ceil(wanted_tweakables / TWEAKABLES_IN_R_AND_T)
+    return LAB_PREFIX + "".join(LAB_TWEAKABLES_TEMPLATE.format(lab_index = str(i)) for i in range(randt_copies))
 
-    randt_copies = ceil(WANTED_TWEAKABLES / TWEAKABLES_IN_R_AND_T)
+
+if __name__ == "__main__":
+    wanted_tweakables = int(sys.argv[1]) if len(sys.argv) > 1 else WANTED_TWEAKABLES
+    randt_copies = ceil(wanted_tweakables / TWEAKABLES_IN_R_AND_T)
     total_tweakables = randt_copies * TWEAKABLES_IN_R_AND_T
 
     print(f"Duplicating R&T {randt_copies} times, resulting in {total_tweakables} Tweakables.")
 
-    for i in range(randt_copies):
-
-        output.write(LAB_TWEAKABLES_TEMPLATE.format(lab_index = str(i)))
\ No newline at end of file
+    with open("./lab.jspl", 'w') as output:
+        output.write(generate_lab(wanted_tweakables))
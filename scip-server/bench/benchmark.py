@@ -0,0 +1,340 @@
+"""
+Phase level benchmark of the optimizer on generated randt_times_n laboratories.
+
+Every laboratory size is compiled once, then solved for every weight profile in both input formats:
+the string format sent by the generated labs (/optimize) and the logical format (/optimize/logic).
+Each phase the server goes through is timed on its own, the results are written as JSON.
+
+    python bench/benchmark.py --sizes 15 1500 15000 --profiles uniform random --output results.json
+    python bench/benchmark.py --baseline results.json
+
+Run from the scip-server directory. Progress is reported on stderr, the SCIP log on stdout can be discarded. With --baseline the median of every phase is compared with an earlier
+result file and the run fails if a phase got slower than the tolerance allows.
+"""
+
+import argparse
+import gzip
+import importlib.util
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SERVER_DIRECTORY = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVER_DIRECTORY))
+
+import pyscipopt
+from src.decomposition import ComponentSolver, decomposeProblem
+from src.encoding import decodeBody
+from src.jspl import compileLaboratory
+from src.logic import LogicEncoding, constructTweakables
+from src.problem import constructInputProblem
+from src.solver import Solver
+
+GENERATOR_SCRIPT = SERVER_DIRECTORY.parent / "examples" / "in" / "randt_times_n" / "script.py"
+
+SIZES = [15, 150, 1500, 15000, 50000]
+PROFILES = ["uniform", "random", "sparse", "signed"]
+FORMATS = ["string", "logic"]
+PHASES = ["decode", "parse", "presolve", "decompose", "build", "solve", "encode"]
+
+# phases faster than this are too noisy to be compared against a baseline
+MIN_COMPARED_SECONDS = 0.01
+
+
+def loadGenerator():
+    specification = importlib.util.spec_from_file_location("randt_times_n", GENERATOR_SCRIPT)
+    module = importlib.util.module_from_spec(specification)
+    specification.loader.exec_module(module)
+    return module.generate_lab
+
+
+def profileWeights(profile: str, concerns: list[str], rng: random.Random) -> dict[str, float]:
+    match profile:
+        case "uniform":
+            # the default weights of a generated lab
+            return {concern: 1 for concern in concerns}
+        case "random":
+            return {concern: rng.randint(1, 10) for concern in concerns}
+        case "sparse":
+            return {concern: rng.randint(1, 10) if rng.random() < 0.1 else 0 for concern in concerns}
+        case "signed":
+            # negative weights ask for concerns to be raised
+            return {concern: rng.randint(-5, 5) for concern in concerns}
+    raise Exception(f"Unknown weight profile \"{profile}\".")
+
+
+def binaryCondition(condition: dict) -> dict:
+    # n-ary disjunctions as the right nested chain the generator produces
+    if "operands" not in condition:
+        return condition
+    operands = condition["operands"]
+    result = operands[-1]
+    for operand in reversed(operands[:-1]):
+        result = {"type": condition["type"], "left": operand, "right": result}
+    return result
+
+
+def constructStringInput(lab: dict, weights: dict[str, float]) -> dict:
+    """
+    Port of constructOptimizerInput in optimization.js. Givens are not part of the
+    tweakables of a generated lab, so they get no variables here either.
+    """
+    variables = []
+    constraints = []
+
+    propositions = dict()
+    for name, values in lab["tweakables"].items():
+        if len(values) == 1:
+            continue
+        valueVariables = dict()
+        for value in values:
+            variables.append(f"x{len(variables) + 1}")
+            valueVariables[json.dumps(value)] = variables[-1]
+        propositions[name] = valueVariables
+
+    concerns = dict()
+    for index, concern in enumerate(weights):
+        concerns[concern] = f"r{index + 1}"
+    variables.extend(concerns.values())
+
+    for valueVariables in propositions.values():
+        constraints.append("+".join(valueVariables.values()) + " == 1")
+
+    zCount = 0
+    for concern, condition in lab["raiseConditions"].items():
+        # post order with an explicit stack, the raise conditions of large labs are deeply nested
+        results = []
+        stack = [(condition, None)]
+        while len(stack) > 0:
+            node, z = stack.pop()
+            node = binaryCondition(node)
+            if node["type"] == "statement":
+                results.append(propositions[node["proposition"]][json.dumps(node["value"])])
+            elif z is None:
+                zCount += 1
+                z = f"z{zCount}"
+                variables.append(z)
+                stack.append((node, z))
+                if node["type"] == "not":
+                    stack.append((node["inner"], None))
+                else:
+                    stack.append((node["right"], None))
+                    stack.append((node["left"], None))
+            elif node["type"] == "not":
+                a = results.pop()
+                constraints.append(f"-{a}-{z} <= -1")
+                constraints.append(f"{a}+{z} <= 1")
+                results.append(z)
+            else:
+                b = results.pop()
+                a = results.pop()
+                if node["type"] == "or":
+                    constraints.append(f"{z}-{a}-{b} <= 0")
+                    constraints.append(f"{a}-{z} <= 0")
+                    constraints.append(f"{b}-{z} <= 0")
+                else:
+                    constraints.append(f"{a}+{b}-{z} <= 1")
+                    constraints.append(f"{z}-{a} <= 0")
+                    constraints.append(f"{z}-{b} <= 0")
+                results.append(z)
+        constraints.append(f"{results[0]}-{concerns[concern]} == 0")
+
+    objective = "+".join(concerns[concern] if weight == 1 else f"{weight}*{concerns[concern]}" for concern, weight in weights.items())
+    return {"objective": objective, "variables": variables, "constraints": constraints}
+
+
+def constructLogicInput(lab: dict, weights: dict[str, float]) -> dict:
+    return {"tweakables": lab["tweakables"], "raiseConditions": lab["raiseConditions"], "weights": weights}
+
+
+class PhaseTimer:
+    phases: dict[str, float | None]
+
+    def __init__(self):
+        self.phases = {phase: None for phase in PHASES}
+
+    def run(self, phase: str, function):
+        start = time.perf_counter()
+        result = function()
+        self.phases[phase] = time.perf_counter() - start
+        return result
+
+
+def solveProblem(timer: PhaseTimer, problem, componentSolver: ComponentSolver, timeLimit: float | None) -> tuple[dict[str, int], int]:
+    # same path as solveStructure in the server, components are built inside their worker so building is part of solving
+    decomposition = timer.run("decompose", lambda: decomposeProblem(problem))
+    if len(decomposition.components) > 1:
+        solution = timer.run("solve", lambda: componentSolver.solve(decomposition))
+        return solution, len(decomposition.components)
+
+    solver = timer.run("build", lambda: Solver.fromProblem(problem))
+    if timeLimit is not None:
+        solver.setTimeLimit(timeLimit)
+    return timer.run("solve", solver.solve), 1
+
+
+def runString(body: bytes, weights: dict[str, float], componentSolver: ComponentSolver, timeLimit: float | None) -> dict:
+    timer = PhaseTimer()
+    data = timer.run("decode", lambda: decodeBody(body, "gzip", "application/json"))
+    problem = timer.run("parse", lambda: constructInputProblem(data))
+    solution, components = solveProblem(timer, problem, componentSolver, timeLimit)
+    timer.run("encode", lambda: json.dumps(solution))
+
+    # raise variables are numbered in the order of the weights
+    objective = sum(weight * solution[f"r{index + 1}"] for index, weight in enumerate(weights.values()))
+    return {
+        "phases": timer.phases,
+        "model": {"variables": len(problem.variables), "constraints": len(problem.constraints)},
+        "components": components,
+        "objective": objective,
+    }
+
+
+def runLogic(body: bytes, weights: dict[str, float], componentSolver: ComponentSolver, timeLimit: float | None) -> dict:
+    timer = PhaseTimer()
+    data = timer.run("decode", lambda: decodeBody(body, "gzip", "application/json"))
+    encoding = timer.run("parse", lambda: LogicEncoding(constructTweakables(data["tweakables"]), data["raiseConditions"], data.get("definitions")))
+    timer.run("presolve", lambda: encoding.presolve(data.get("fixed")))
+
+    # encoding the gates is the logical counterpart of parsing constraints, it is counted as building the model
+    start = time.perf_counter()
+    encoding.encode(data["weights"])
+    encodeTime = time.perf_counter() - start
+    solution, components = solveProblem(timer, encoding.problem, componentSolver, timeLimit)
+    timer.phases["build"] = encodeTime + (timer.phases["build"] or 0)
+
+    result = timer.run("encode", lambda: json.dumps(encoding.decode(solution)))
+    concerns = json.loads(result)["concerns"]
+    return {
+        "phases": timer.phases,
+        "model": {"variables": len(encoding.problem.variables), "constraints": len(encoding.problem.constraints)},
+        "components": components,
+        "objective": sum(weight for concern, weight in weights.items() if concerns.get(concern, False)),
+        "presolve": encoding.presolveReport,
+    }
+
+
+def gitCommit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=SERVER_DIRECTORY, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict:
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": gitCommit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "pyscipopt": pyscipopt.__version__,
+        "scip": pyscipopt.Model().version(),
+    }
+
+
+def medians(runs: list[dict]) -> dict[tuple, dict[str, float]]:
+    grouped = dict()
+    for run in runs:
+        key = (run["format"], run["tweakables"], run["profile"])
+        grouped.setdefault(key, []).append(run["phases"])
+
+    result = dict()
+    for key, phaseRuns in grouped.items():
+        result[key] = dict()
+        for phase in PHASES:
+            values = [phases[phase] for phases in phaseRuns if phases.get(phase) is not None]
+            if len(values) > 0:
+                result[key][phase] = statistics.median(values)
+    return result
+
+
+def compareBaseline(runs: list[dict], baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    previous = medians(baseline["runs"])
+    for key, phases in medians(runs).items():
+        if key not in previous:
+            continue
+        for phase, seconds in phases.items():
+            before = previous[key].get(phase)
+            if before is None or max(before, seconds) < MIN_COMPARED_SECONDS:
+                continue
+            if seconds > before * tolerance:
+                format, tweakables, profile = key
+                regressions.append(f"{format} {tweakables} {profile} {phase}: {before:.4f}s -> {seconds:.4f}s ({seconds / before:.2f}x)")
+    return regressions
+
+
+def printRun(run: dict):
+    phases = " ".join(f"{phase}={run['phases'][phase]:.4f}" for phase in PHASES if run["phases"][phase] is not None)
+    print(f"{run['format']:>6} {run['tweakables']:>6} {run['profile']:>8} #{run['run']} "
+          f"vars={run['model']['variables']} cons={run['model']['constraints']} comps={run['components']} "
+          f"obj={run['objective']} {phases}", file=sys.stderr, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Phase level optimizer benchmark on randt_times_n laboratories.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="wanted number of tweakables per lab")
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, default=PROFILES)
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size, profile and format")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random weight profiles")
+    parser.add_argument("--time-limit", type=float, default=None, help="SCIP time limit per solve in seconds")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes for solving independent components")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--baseline", default=None, help="earlier result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="allowed slowdown factor against the baseline")
+    arguments = parser.parse_args()
+
+    generateLab = loadGenerator()
+    componentSolver = ComponentSolver(arguments.workers)
+    runs = []
+    labs = []
+
+    for size in arguments.sizes:
+        start = time.perf_counter()
+        lab = compileLaboratory(generateLab(size))
+        compileTime = time.perf_counter() - start
+        labs.append({"tweakables": size, "propositions": len(lab["tweakables"]), "concerns": len(lab["concerns"]), "compile": compileTime})
+
+        for profile in arguments.profiles:
+            weights = profileWeights(profile, lab["concerns"], random.Random(f"{arguments.seed}-{profile}"))
+            objectives = dict()
+
+            for format in arguments.formats:
+                data = constructStringInput(lab, weights) if format == "string" else constructLogicInput(lab, weights)
+                # labs send large inputs gzip compressed, decoding includes decompression
+                body = gzip.compress(json.dumps(data).encode())
+                for index in range(arguments.repeat):
+                    run = (runString if format == "string" else runLogic)(body, weights, componentSolver, arguments.time_limit)
+                    run.update({"format": format, "tweakables": size, "profile": profile, "run": index, "inputBytes": len(body)})
+                    runs.append(run)
+                    objectives[format] = run["objective"]
+                    printRun(run)
+
+            if len(set(objectives.values())) > 1 and arguments.time_limit is None:
+                print(f"WARNING: formats disagree on the optimum for {size} {profile}: {objectives}", file=sys.stderr, flush=True)
+
+    result = {"environment": environment(), "arguments": vars(arguments), "labs": labs, "runs": runs}
+    with open(arguments.output, "w") as output:
+        json.dump(result, output, indent=1)
+    print(f"Results written to {arguments.output}.", file=sys.stderr)
+
+    if arguments.baseline is not None:
+        with open(arguments.baseline) as input:
+            regressions = compareBaseline(runs, json.load(input), arguments.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        if len(regressions) > 0:
+            sys.exit(1)
+        print("No regressions against the baseline.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Startup benchmark of the optimization server: how long a fresh process takes until it answers its first
+request, and how much slower that first request is than the following ones.
+
+Two ways of serving are measured, each with and without warm up:
+    process     a fresh Python process imports the server and answers requests through the Flask test client
+    gunicorn    gunicorn is started with gunicorn.conf.py and requests are sent over HTTP
+
+    python bench/startup.py --size 150 --repeat 5 --output startup.json
+    python bench/startup.py --modes gunicorn --workers 2
+
+Run from the scip-server directory. Progress is reported on stderr.
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+SERVER_DIRECTORY = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVER_DIRECTORY))
+sys.path.insert(0, str(SERVER_DIRECTORY / "bench"))
+# nothing of the server is imported at the top, a child process has to import it while it is measured
+
+MODES = ["process", "gunicorn"]
+# tweakables per copy of the generated lab, consecutive requests differ by one copy
+LAB_STEP = 15
+# seconds to wait for gunicorn to accept requests
+READY_TIMEOUT = 60
+
+
+def requestBodies(size: int, count: int) -> list[bytes]:
+    from benchmark import constructLogicInput, loadGenerator, profileWeights
+    from src.jspl import compileLaboratory
+
+    # every request gets a lab of its own, so no request is answered from the model or result cache of an earlier one
+    bodies = []
+    for index in range(count):
+        lab = compileLaboratory(loadGenerator()(size + LAB_STEP * index))
+        bodies.append(json.dumps(constructLogicInput(lab, profileWeights("random", lab["concerns"], random.Random(index)))).encode())
+    return bodies
+
+
+def runProcessChild(bodiesFile: str, outputFile: str, warm: bool):
+    # runs in a fresh interpreter, everything from the first import on is measured
+    start = time.perf_counter()
+    import server
+    imported = time.perf_counter() - start
+
+    warmUp = server.warmUp() if warm else None
+    with open(bodiesFile) as input:
+        bodies = json.load(input)
+
+    client = server.app.test_client()
+    latencies = []
+    for body in bodies:
+        requestStart = time.perf_counter()
+        response = client.post("/optimize/logic", data=body, content_type="application/json")
+        if response.get_json()["status"] != "success":
+            raise Exception(f"Request failed: {response.get_json()}")
+        latencies.append(time.perf_counter() - requestStart)
+
+    with open(outputFile, "w") as output:
+        json.dump({"import": imported, "warmUp": warmUp, "ready": time.perf_counter() - start - sum(latencies), "latencies": latencies}, output)
+
+
+def measureProcess(bodies: list[bytes], warm: bool) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        bodiesFile = os.path.join(directory, "bodies.json")
+        outputFile = os.path.join(directory, "result.json")
+        with open(bodiesFile, "w") as output:
+            json.dump([body.decode() for body in bodies], output)
+
+        arguments = [sys.executable, __file__, "--child", bodiesFile, outputFile] + (["--warm"] if warm else [])
+        subprocess.run(arguments, cwd=SERVER_DIRECTORY, stdout=subprocess.DEVNULL, check=True)
+        with open(outputFile) as input:
+            return json.load(input)
+
+
+def freePort() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def post(url: str, body: bytes) -> dict:
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def measureGunicorn(bodies: list[bytes], warm: bool, workers: int) -> dict:
+    port = freePort()
+    # several workers are only allowed without jobs, sessions and statistics
+    environment = dict(os.environ, SCIP_BIND=f"127.0.0.1:{port}", SCIP_WORKERS=str(workers), SCIP_WARM_UP="1" if warm else "0",
+                       SCIP_STATEFUL_ENDPOINTS="1" if workers == 1 else "0")
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-m", "gunicorn", "server:app"], cwd=SERVER_DIRECTORY, env=environment,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        # ready once the metrics answer, every worker has then finished its warm up
+        while True:
+            if process.poll() is not None:
+                raise Exception("gunicorn exited before it was ready, is it installed?")
+            if time.perf_counter() - start > READY_TIMEOUT:
+                raise Exception(f"gunicorn was not ready within {READY_TIMEOUT}s.")
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics").read()
+                break
+            except urllib.error.HTTPError:
+                # the metrics are turned off with several workers, but a warmed up worker answered
+                break
+            except OSError:
+                time.sleep(0.02)
+        ready = time.perf_counter() - start
+
+        latencies = []
+        for body in bodies:
+            requestStart = time.perf_counter()
+            response = post(f"http://127.0.0.1:{port}/optimize/logic", body)
+            if response["status"] != "success":
+                raise Exception(f"Request failed: {response}")
+            latencies.append(time.perf_counter() - requestStart)
+        return {"import": None, "warmUp": None, "ready": ready, "latencies": latencies}
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def summarize(runs: list[dict]) -> dict:
+    # the first request of every run against the median of all later ones
+    return {
+        "ready": statistics.median(run["ready"] for run in runs),
+        "firstRequest": statistics.median(run["latencies"][0] for run in runs),
+        "laterRequests": statistics.median(latency for run in runs for latency in run["latencies"][1:]) if any(len(run["latencies"]) > 1 for run in runs) else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time and first request latency of the optimization server.")
+    parser.add_argument("--size", type=int, default=150, help="wanted number of tweakables of the requested lab")
+    parser.add_argument("--requests", type=int, default=5, help="requests per started server")
+    parser.add_argument("--repeat", type=int, default=3, help="started servers per mode")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn worker processes")
+    parser.add_argument("--output", default="startup.json")
+    parser.add_argument("--child", nargs=2, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--warm", action="store_true", help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.child is not None:
+        runProcessChild(*arguments.child, arguments.warm)
+        return
+
+    bodies = requestBodies(arguments.size, arguments.requests)
+    results = []
+    for mode in arguments.modes:
+        for warm in (False, True):
+            runs = []
+            for index in range(arguments.repeat):
+                run = measureProcess(bodies, warm) if mode == "process" else measureGunicorn(bodies, warm, arguments.workers)
+                run.update({"mode": mode, "warm": warm, "run": index})
+                runs.append(run)
+                first = run["latencies"][0]
+                print(f"{mode:>8} warm={warm!s:<5} #{index} ready={run['ready']:.3f}s first={first:.3f}s "
+                      f"later={statistics.median(run['latencies'][1:] or [first]):.3f}s", file=sys.stderr, flush=True)
+            results.append({"mode": mode, "warm": warm, **summarize(runs), "runs": runs})
+
+    from benchmark import environment
+    with open(arguments.output, "w") as output:
+        json.dump({"environment": environment(), "arguments": vars(arguments), "results": results}, output, indent=1)
+    print(f"Results written to {arguments.output}.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
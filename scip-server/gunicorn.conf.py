@@ -0,0 +1,49 @@
+# Production serving with pre-forked worker processes, started from the scip-server directory with
+#     gunicorn server:app
+# gunicorn reads this file by itself. Every setting can be changed through the environment.
+# Jobs, sessions, metrics and cache statistics live in the worker process: with more than one worker, a poll
+# or patch that reaches another worker than the one that created its job or session would fail. So the server
+# runs a single worker whose solver pools use the cores, unless those endpoints are turned off with
+#     SCIP_STATEFUL_ENDPOINTS=0 gunicorn server:app
+# which pre-forks a worker per core and recycles them. The server refuses to start with settings that would
+# break the endpoints.
+
+import os
+
+STATEFUL_ENDPOINTS = os.environ.get("SCIP_STATEFUL_ENDPOINTS", "1") != "0"
+
+bind = os.environ.get("SCIP_BIND", "127.0.0.1:5000")
+# the same default as SERVER_WORKERS of the server, which splits the cores of its pools by it
+workers = int(os.environ.get("SCIP_WORKERS", 1 if STATEFUL_ENDPOINTS else os.cpu_count() or 1))
+# SCIP releases the GIL while solving, so threads keep a worker responsive during long solves and streams
+worker_class = "gthread"
+threads = int(os.environ.get("SCIP_THREADS", 4))
+# a recycled worker gives back all memory of its caches and SCIP, but also drops its jobs and sessions,
+# so workers are only recycled without those. The jitter keeps workers from restarting together
+max_requests = int(os.environ.get("SCIP_MAX_REQUESTS", 0 if STATEFUL_ENDPOINTS else 1000))
+max_requests_jitter = max_requests // 10
+# solving may take minutes, a worker is only killed when it is really stuck
+timeout = int(os.environ.get("SCIP_TIMEOUT", 600))
+graceful_timeout = 30
+# the server module (and pyscipopt) is imported once in the master and shared by every forked worker
+preload_app = True
+
+WARM_UP = os.environ.get("SCIP_WARM_UP", "1") != "0"
+
+
+def on_starting(server):
+    # settings from the command line override this file, so they are checked once everything is read.
+    # gunicorn exits with the message of a RuntimeError
+    if STATEFUL_ENDPOINTS and server.cfg.workers > 1:
+        raise RuntimeError("Jobs, sessions and statistics need a single worker, set SCIP_STATEFUL_ENDPOINTS=0 to serve with several.")
+    if STATEFUL_ENDPOINTS and server.cfg.max_requests > 0:
+        raise RuntimeError("Recycled workers drop their jobs and sessions, set SCIP_STATEFUL_ENDPOINTS=0 to recycle workers.")
+    if server.cfg.workers != workers:
+        raise RuntimeError("Set the number of workers with SCIP_WORKERS, the solver pools split the cores by it.")
+
+
+def post_worker_init(worker):
+    # every worker creates its first SCIP model before it accepts requests
+    if WARM_UP:
+        from server import warmUp
+        worker.log.info("Worker %s warmed up in %.3fs", worker.pid, warmUp())
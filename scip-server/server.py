@@ -1,37 +1,702 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from src.solver import Solver
+from src.problem import LinearProblem, constructInputProblem, constructInputObjective, constructInputStart
+from src.logic import FULL, LogicEncoding, constructLogicEncoding
+from src.evaluation import BatchEvaluator, constructBatchEvaluator
+from src.search import LocalSearch, SearchPool
+from src.sweep import SweepSolver
+from src.sensitivity import sensitivityRanges
+from src.enumeration import enumerateAlternatives
+from src.jspl import compileLaboratory, laboratoryContentHash
+from src.session import ModelSession
+from src.store import PersistentStore, packJson, packProblem, unpackJson, unpackProblem
+from src.cache import LRUCache, canonicalHash
+from src.encoding import decodeBody
+from src.jobs import JobManager, QueueFullError
+from src.decomposition import ComponentSolver, DecomposedModel, decomposeProblem
+from src.portfolio import Portfolio
+from src.metrics import CONTENT_TYPE, SIZE_BUCKETS, MetricsRegistry
 import json
+import os
 import time
+from queue import Queue
+from threading import Event, Thread
+from typing import Callable, Iterator
 app = Flask(__name__)
 
-times = set()
+MODEL_CACHE_SIZE = 8
+LABORATORY_CACHE_SIZE = 64
+SESSION_CACHE_SIZE = 64
+SESSION_TTL = 3600 # in seconds since the last change, an expired session has to be created again
+RESULT_CACHE_SIZE = 1024
+RESULT_CACHE_BYTES = 64 * 1024 * 1024
+RESULT_CACHE_TTL = None # in seconds, in memory and in the store, None keeps results until they are evicted
+# jobs, sessions, metrics and cache statistics live in the process that serves them, they are only served while
+# the server runs as a single process. Turning them off allows several gunicorn workers
+STATEFUL_ENDPOINTS = os.environ.get("SCIP_STATEFUL_ENDPOINTS", "1") != "0"
+STATEFUL_ROUTES = ("submitJob", "pollJob", "cancelJob", "jobStatistics", "createSession", "patchSession", "deleteSession", "metricsExposition", "cacheStatistics")
+SERVER_WORKERS = int(os.environ.get("SCIP_WORKERS", 1 if STATEFUL_ENDPOINTS else os.cpu_count() or 1))
+# processes of every pool, the cores are shared by the pools of all gunicorn workers
+POOL_WORKERS = max(1, (os.cpu_count() or 1) // SERVER_WORKERS)
+JOB_WORKERS = POOL_WORKERS
+JOB_QUEUE_SIZE = 64
+JOB_TIME_LIMIT = 300 # in seconds, upper bound for the limit a job may request
+JOB_RESULT_TTL = 600 # in seconds after the job finished
+COMPONENT_WORKERS = POOL_WORKERS
+REUSE_LAST_SOLUTION = True # warm start with the previous solution of the same structure when the request has no start
+LAST_SOLUTION_CACHE_SIZE = 64
+STREAM_TIME_LIMIT = 300 # in seconds, upper bound for the limit a streamed request may ask for
+CHECK_SOLUTIONS = True # evaluates the raise conditions on every logic solution, independent of presolve and encoding
+SEARCH_WORKERS = POOL_WORKERS
+SWEEP_WORKERS = POOL_WORKERS
+SEARCH_TIME = 1.0 # in seconds, default time of the local search
+SEARCH_TIME_LIMIT = 10 # in seconds, upper bound for the search time a request may ask for
+SENSITIVITY_TIME_LIMIT = 10 # in seconds, for the sensitivity ranges of all concerns of a request together
+ALTERNATIVES_LIMIT = 100 # upper bound for the number of alternative assignments a request may ask for
+ALTERNATIVES_TIME_LIMIT = 30 # in seconds, for all alternatives of a request together
+# a tiny logic input, solving it makes a fresh process load SCIP and its plugins before the first real request
+WARM_UP_INPUT = {
+    "tweakables": {"a": [True, False], "b": ["x", "y"]},
+    "raiseConditions": {"c": {"type": "and", "left": {"type": "statement", "proposition": "a", "value": True}, "right": {"type": "statement", "proposition": "b", "value": "y"}}},
+    "weights": {"c": -1},
+}
+STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "store.sqlite3") # None keeps nothing across restarts
+STORE_BYTES = 1024 * 1024 * 1024
+PORTFOLIO_SIZE = 0 # number of differently configured solvers racing on every model, 0 disables the portfolio
 
+metrics = MetricsRegistry()
+requestCount = metrics.counter("scip_requests_total", "Optimization requests by endpoint.", ("endpoint",))
+errorCount = metrics.counter("scip_request_errors_total", "Optimization requests that failed, by endpoint.", ("endpoint",))
+requestDuration = metrics.histogram("scip_request_duration_seconds", "Time to answer an optimization request, by endpoint.", ("endpoint",))
+phaseDuration = metrics.histogram("scip_phase_duration_seconds", "Time spent in each phase of a request.", ("phase",))
+modelVariables = metrics.histogram("scip_model_variables", "Number of variables of every built model.", buckets=SIZE_BUCKETS)
+modelConstraints = metrics.histogram("scip_model_constraints", "Number of constraints of every built model.", buckets=SIZE_BUCKETS)
+portfolioWins = metrics.counter("scip_portfolio_wins_total", "Portfolio races won, by solver configuration.", ("configuration",))
+# built models by hash of their variables and constraints, only the objective changes between hits
+models = LRUCache(MODEL_CACHE_SIZE)
+# models of the components of structures with several of them, by the same hash
+componentModels = LRUCache(MODEL_CACHE_SIZE)
+# evaluators of the raise conditions that check logic solutions, by the same hash as their model
+evaluators = LRUCache(MODEL_CACHE_SIZE)
+# compiled JSPL laboratories by hash of their source
+laboratories = LRUCache(LABORATORY_CACHE_SIZE)
+# models patched in place by session id, they live in the process that created them
+sessions = LRUCache(SESSION_CACHE_SIZE, ttl=SESSION_TTL)
+# encoded results by hash of the whole problem
+results = LRUCache(RESULT_CACHE_SIZE, RESULT_CACHE_BYTES, RESULT_CACHE_TTL, sizeOf=len)
+jobs = JobManager(JOB_WORKERS, JOB_QUEUE_SIZE, JOB_TIME_LIMIT, JOB_RESULT_TTL)
+componentSolver = ComponentSolver(COMPONENT_WORKERS)
+# last solution by hash of the structure, a good start for the next request with other weights
+lastSolutions = LRUCache(LAST_SOLUTION_CACHE_SIZE)
+# results, last solutions and parsed problems of the string format, shared by all processes and kept across restarts
+store = PersistentStore(STORE_PATH, STORE_BYTES) if STORE_PATH is not None else None
+searchPool = SearchPool(SEARCH_WORKERS)
+sweepSolver = SweepSolver(SWEEP_WORKERS)
+portfolio = Portfolio(PORTFOLIO_SIZE) if PORTFOLIO_SIZE > 0 else None
 
-@app.route('/optimize', methods=['GET'])
+
+@app.before_request
+def refuseStatefulRoute():
+    # another worker would not know the job or session, and statistics would only cover the answering worker
+    if not STATEFUL_ENDPOINTS and request.endpoint in STATEFUL_ROUTES:
+        return jsonify({'status': 'error', 'message': 'Jobs, sessions and statistics are turned off while the server runs several worker processes.'}), 404
+
+@app.route('/optimize', methods=['GET', 'POST'])
 def optimize():
     print("____REQUEST____")
+    requestCount.inc("optimize")
     try:
-        input = request.args.get('input')
-        data = decodeInput(input)
-        print("INPUT: " + str(data))
+        with requestDuration.time("optimize"):
+            data = readInput()
+            print("INPUT: " + str(data))
 
-        start = time.time()
-        solver = Solver(data["variables"], data["constraints"], data["objective"])
-        solution = solver.solve()
-        end = time.time()
+            resultKey = canonicalHash(data["objective"], data["variables"], data["constraints"])
+            return respond(resultKey, lambda: solveInput(data))
+    except Exception as e:
+        print(e)
+        errorCount.inc("optimize")
+        return jsonify({'status': 'error', 'message': 'An unknown error occurred.'})
 
-        times.add(end - start)
-        printTiming()
-        
-        print("SOLUTION: " + str(solution))
-        return jsonify({'status': 'success', 'result': encodeOutput(solution)})
+@app.route('/optimize/logic', methods=['GET', 'POST'])
+def optimizeLogic():
+    print("____LOGIC REQUEST____")
+    requestCount.inc("optimizeLogic")
+    try:
+        with requestDuration.time("optimizeLogic"):
+            data = readInput()
+
+            structure = ("logic", data["tweakables"], data["raiseConditions"], data.get("definitions"), data.get("fixed"))
+            return respond(logicResultKey(structure, data), lambda: solveLogicInput(data, structure))
+    except Exception as e:
+        print(e)
+        errorCount.inc("optimizeLogic")
+        return jsonify({'status': 'error', 'message': str(e)})
+
+# same input as /optimize/logic, with the JSPL source as "laboratory" (or the "laboratoryHash" of one sent before)
+# instead of "tweakables" and "raiseConditions", without "weights" every concern weighs 1
+@app.route('/optimize/jspl', methods=['POST'])
+def optimizeJspl():
+    print("____JSPL REQUEST____")
+    requestCount.inc("optimizeJspl")
+    try:
+        with requestDuration.time("optimizeJspl"):
+            data = readInput()
+            laboratoryHash, laboratory = compiledLaboratory(data)
+            data = {
+                **{key: value for key, value in data.items() if key not in ("laboratory", "laboratoryHash")},
+                "tweakables": laboratory["tweakables"],
+                "raiseConditions": laboratory["raiseConditions"],
+                "weights": data.get("weights", {concern: 1 for concern in laboratory["concerns"]}),
+            }
+            # the hash stands for the whole laboratory, so keys do not have to hash its conditions again
+            structure = ("jspl", laboratoryHash, data.get("fixed"))
+            return respond(logicResultKey(structure, data), lambda: solveLogicInput(data, structure), {'laboratoryHash': laboratoryHash})
     except Exception as e:
         print(e)
+        errorCount.inc("optimizeJspl")
+        return jsonify({'status': 'error', 'message': str(e)})
+
+# same input as /optimize/logic, with "weightSets": [{"concern": weight, ...}, ...] instead of "weights"
+@app.route('/optimize/logic/sweep', methods=['POST'])
+def optimizeLogicSweep():
+    print("____SWEEP REQUEST____")
+    requestCount.inc("optimizeLogicSweep")
+    try:
+        with requestDuration.time("optimizeLogicSweep"):
+            data = readInput()
+            return jsonify({'status': 'success', **sweepLogicInput(data)})
+    except Exception as e:
+        print(e)
+        errorCount.inc("optimizeLogicSweep")
+        return jsonify({'status': 'error', 'message': str(e)})
+
+@app.route('/optimize/stream', methods=['GET', 'POST'])
+def optimizeStream():
+    print("____STREAM REQUEST____")
+    requestCount.inc("optimizeStream")
+    try:
+        data = readInput()
+
+        key = canonicalHash(data["variables"], data["constraints"])
+        events = streamStructure(key, lambda: timed("parse", lambda: constructInputProblem(data)), lambda index: constructInputObjective(data, index), constructInputStart(data), lambda solution: solution)
+        return streamResponse(events)
+    except Exception as e:
+        print(e)
+        errorCount.inc("optimizeStream")
         return jsonify({'status': 'error', 'message': 'An unknown error occurred.'})
 
-def printTiming():
-    print(f"TIME: AVG: {sum(times)/len(times)} FOR N: {len(times)}")
-    print(f"MIN {min(times)}, MAX: {max(times)}")
+@app.route('/optimize/logic/stream', methods=['GET', 'POST'])
+def optimizeLogicStream():
+    print("____LOGIC STREAM REQUEST____")
+    requestCount.inc("optimizeLogicStream")
+    try:
+        data = readInput()
+
+        structure = ("logic", data["tweakables"], data["raiseConditions"], data.get("definitions"), data.get("fixed"))
+        encoding, key, start = prepareLogicInput(data, structure)
+        events = streamStructure(key, lambda: encoding.problem, lambda index: (encoding.problem.objective, encoding.problem.offset), start, encoding.decode)
+        return streamResponse(events)
+    except Exception as e:
+        print(e)
+        errorCount.inc("optimizeLogicStream")
+        return jsonify({'status': 'error', 'message': str(e)})
+
+def streamResponse(events: Iterator[str]) -> Response:
+    # proxies must not buffer the stream, every event has to reach the client when it happens
+    return Response(events, mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def logicResultKey(structure: tuple, data: dict) -> str | None:
+    # the local search is bound by time and its result depends on the start, so it is not kept at all.
+    # A seeded solve is, but the optimum it finds among equally good ones depends on the seed
+    if data.get("method") == "search":
+        return None
+    start = data.get("start") if data.get("method") == "seeded" else None
+    return canonicalHash(*structure, data.get("weights", {}), data.get("encoding"), data.get("method"), data.get("searchTime"), start, data.get("sensitivity"), data.get("alternatives"), data.get("tolerance"))
+
+def compiledLaboratory(data: dict) -> tuple[str, dict]:
+    if data.get("laboratory") is not None:
+        laboratoryHash = laboratoryContentHash(data["laboratory"])
+    elif data.get("laboratoryHash") is not None:
+        laboratoryHash = data["laboratoryHash"]
+    else:
+        raise Exception("Input has neither a \"laboratory\" nor a \"laboratoryHash\".")
+
+    laboratory = laboratories.get(laboratoryHash)
+    if laboratory is None and store is not None:
+        stored = store.get("laboratory", laboratoryHash)
+        if stored is not None:
+            laboratory = timed("parse", lambda: unpackJson(stored))
+    if laboratory is None:
+        if data.get("laboratory") is None:
+            raise Exception(f"Unknown laboratory \"{laboratoryHash}\", its source has to be sent again.")
+        laboratory = timed("compile", lambda: compileLaboratory(data["laboratory"]))
+        if store is not None:
+            store.put("laboratory", laboratoryHash, packJson(laboratory))
+    laboratories.put(laboratoryHash, laboratory)
+    return laboratoryHash, laboratory
+
+def respond(resultKey: str | None, solve: Callable[[], tuple[object | Callable[[], object], dict]], extra: dict | None = None):
+    # results without a key are neither looked up nor kept
+    result = results.get(resultKey) if resultKey is not None else None
+    if result is None and resultKey is not None and store is not None:
+        stored = store.entry("result", resultKey)
+        if stored is not None:
+            # the result leaves the memory together with its stored copy
+            result = unpackJson(stored[0])
+            results.put(resultKey, result, stored[1])
+    if result is not None:
+        print("RESULT CACHE HIT")
+        return jsonify({'status': 'success', 'result': result, **(extra or {})})
+
+    solution, details = solve()
+
+    with phaseDuration.time("encode"):
+        # solutions that still have to be translated back into the terms of the input are passed as function
+        if callable(solution):
+            solution = solution()
+        result = encodeOutput(solution)
+    print("SOLUTION: " + str(solution))
+    if resultKey is not None:
+        results.put(resultKey, result)
+        if store is not None:
+            store.put("result", resultKey, packJson(result), RESULT_CACHE_TTL)
+    return jsonify({'status': 'success', 'result': result, **details, **(extra or {})})
+
+@app.route('/jobs', methods=['POST'])
+def submitJob():
+    try:
+        data = readInput()
+        timeLimit = request.args.get('timeLimit', type=float)
+        job = jobs.submit(data, timeLimit)
+        return jsonify({'status': 'success', 'job': job.describe()}), 202
+    except QueueFullError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 503
+    except Exception as e:
+        print(e)
+        return jsonify({'status': 'error', 'message': 'An unknown error occurred.'}), 400
+
+@app.route('/jobs/<id>', methods=['GET'])
+def pollJob(id: str):
+    job = jobs.get(id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown job.'}), 404
+    return jsonify({'status': 'success', 'job': job.describe()})
+
+@app.route('/jobs/<id>', methods=['DELETE'])
+def cancelJob(id: str):
+    job = jobs.cancel(id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown job.'}), 404
+    return jsonify({'status': 'success', 'job': job.describe()})
+
+@app.route('/sessions', methods=['POST'])
+def createSession():
+    print("____SESSION REQUEST____")
+    requestCount.inc("createSession")
+    try:
+        with requestDuration.time("createSession"):
+            session = ModelSession()
+            response = solveSession(session, readInput())
+            sessions.put(session.id, session)
+            return response
+    except Exception as e:
+        print(e)
+        errorCount.inc("createSession")
+        return jsonify({'status': 'error', 'message': str(e)})
+
+@app.route('/sessions/<id>', methods=['PATCH'])
+def patchSession(id: str):
+    print("____SESSION PATCH____")
+    requestCount.inc("patchSession")
+    session = sessions.get(id)
+    if session is None:
+        return jsonify({'status': 'error', 'message': 'Unknown session.'}), 404
+    try:
+        with requestDuration.time("patchSession"):
+            response = solveSession(session, readInput())
+            # every change renews the session
+            sessions.put(id, session)
+            return response
+    except Exception as e:
+        print(e)
+        errorCount.inc("patchSession")
+        return jsonify({'status': 'error', 'message': str(e)})
+
+@app.route('/sessions/<id>', methods=['DELETE'])
+def deleteSession(id: str):
+    if sessions.take(id) is None:
+        return jsonify({'status': 'error', 'message': 'Unknown session.'}), 404
+    return jsonify({'status': 'success'})
+
+def solveSession(session: ModelSession, change: dict):
+    # changes of one session are applied one after another
+    with session.lock:
+        with phaseDuration.time("patch"):
+            report = session.apply(change)
+        with phaseDuration.time("solve"):
+            solution = session.solve()
+    with phaseDuration.time("encode"):
+        result = encodeOutput(solution)
+    return jsonify({'status': 'success', 'session': session.id, 'result': result, 'model': report})
+
+@app.route('/jobs', methods=['GET'])
+def jobStatistics():
+    return jsonify(jobs.stats())
+
+@app.route('/metrics', methods=['GET'])
+def metricsExposition():
+    return Response(metrics.render(), mimetype=None, content_type=CONTENT_TYPE)
+
+@app.route('/cache', methods=['GET'])
+def cacheStatistics():
+    return jsonify({'models': models.stats(), 'componentModels': componentModels.stats(), 'results': results.stats(), 'evaluators': evaluators.stats(), 'laboratories': laboratories.stats(), 'sessions': sessions.stats(), 'store': store.stats() if store is not None else None})
+
+def solveInput(data: dict) -> tuple[dict[str, int], dict]:
+    key = canonicalHash(data["variables"], data["constraints"])
+    constructObjective = lambda index: constructInputObjective(data, index)
+    return solveStructure(key, lambda: storedProblem(key, lambda: timed("parse", lambda: constructInputProblem(data)), constructObjective), constructObjective, constructInputStart(data))
+
+def storedProblem(key: str, constructProblem: Callable[[], LinearProblem], constructObjective: Callable[[dict[str, int]], tuple[dict[int, float], float]]) -> LinearProblem:
+    # only the structure is reused, the objective always comes from the request
+    stored = store.get("problem", key) if store is not None else None
+    if stored is not None:
+        print("STORED PROBLEM")
+        with phaseDuration.time("parse"):
+            problem = unpackProblem(stored)
+            problem.objective, problem.offset = constructObjective({variable: index for index, variable in enumerate(problem.variables)})
+        return problem
+
+    problem = constructProblem()
+    if store is not None:
+        store.put("problem", key, packProblem(problem))
+    return problem
+
+def prepareLogicInput(data: dict, structure: tuple) -> tuple[LogicEncoding, str, dict[str, int] | None]:
+    encoding = timed("parse", lambda: constructLogicEncoding(data))
+    start = encoding.start(data["start"]) if data.get("start") is not None else None
+    # the hash of the structure ignores the order of keys, but the columns of the model follow the order of tweakables and concerns
+    key = canonicalHash(*structure, list(encoding.tweakables), list(encoding.concerns), encoding.signature(data.get("weights", {})))
+    return encoding, key, start
+
+def solveLogicInput(data: dict, structure: tuple) -> tuple[Callable[[], dict], dict]:
+    # "exact" only solves, "search" only runs the local search and "seeded" starts the solver from the best assignment found
+    method = data.get("method", "exact")
+    if method not in ("exact", "search", "seeded"):
+        raise Exception(f"Unknown method \"{method}\".")
+    alternatives = bool(data.get("alternatives")) or data.get("tolerance") is not None
+    if method == "search" and (data.get("sensitivity") or alternatives):
+        raise Exception("Sensitivity ranges and alternatives need an optimal solution, the method \"search\" does not prove one.")
+
+    encoding, key, start = prepareLogicInput(data, structure)
+    objective = (encoding.problem.objective, encoding.problem.offset)
+    if method == "exact":
+        solution, details = solveStructure(key, lambda: encoding.problem, lambda index: objective, start)
+    else:
+        assignment, report = searchLogicInput(data, encoding)
+        # the assignment is complete, so the start has a value for every variable of the model
+        solution = encoding.start(assignment)
+        if method == "seeded":
+            solution, details = solveStructure(key, lambda: encoding.problem, lambda index: objective, solution)
+        else:
+            details = dict()
+        details['search'] = report
+    if CHECK_SOLUTIONS:
+        with phaseDuration.time("check"):
+            checkLogicSolutions(logicEvaluator(data, key), encoding, [solution], [data.get("weights", {})], [objective])
+    details['model'] = {'variables': len(encoding.problem.variables), 'constraints': len(encoding.problem.constraints)}
+    details['presolve'] = encoding.presolveReport
+    if data.get("sensitivity") or alternatives:
+        decoded = encoding.decode(solution)
+        if data.get("sensitivity"):
+            decoded["sensitivity"], details['sensitivity'] = sensitivityLogicInput(data, decoded)
+        if alternatives:
+            decoded["alternatives"], details['alternatives'] = alternativesLogicInput(data, encoding, solution)
+        return decoded, details
+    return lambda: encoding.decode(solution), details
+
+def alternativesLogicInput(data: dict, encoding: LogicEncoding, solution: dict[str, int]) -> tuple[list[dict], dict]:
+    # "alternatives" is the number of further assignments, "tolerance" how much worse than the optimum they may be
+    count = min(data.get("alternatives") or ALTERNATIVES_LIMIT, ALTERNATIVES_LIMIT)
+    weights = data.get("weights", {})
+    with phaseDuration.time("alternatives"):
+        solutions, report = enumerateAlternatives(encoding, solution, count, data.get("tolerance"), ALTERNATIVES_TIME_LIMIT)
+    alternatives = []
+    for alternative in solutions:
+        decoded = encoding.decode(alternative)
+        decoded["objective"] = sum(weights.get(concern, 0) for concern, raised in decoded["concerns"].items() if raised)
+        alternatives.append(decoded)
+    return alternatives, report
+
+def sensitivityLogicInput(data: dict, decoded: dict) -> tuple[dict, dict]:
+    # "sensitivity" is true for the ranges of all concerns or a list of the concerns of interest
+    concerns = list(decoded["concerns"]) if data["sensitivity"] is True else data["sensitivity"]
+    with phaseDuration.time("sensitivity"):
+        encoding = constructLogicEncoding({**data, "encoding": FULL})
+        return sensitivityRanges(encoding, data.get("weights", {}), decoded["tweakables"], decoded["concerns"], concerns, SENSITIVITY_TIME_LIMIT)
+
+def searchLogicInput(data: dict, encoding: LogicEncoding) -> tuple[dict, dict]:
+    timeLimit = min(data.get("searchTime", SEARCH_TIME), SEARCH_TIME_LIMIT)
+    with phaseDuration.time("search"):
+        search = LocalSearch(encoding, data.get("weights", {}))
+        assignment, objective, report = searchPool.search(search, timeLimit, data.get("start"))
+    print(f"SEARCH OBJECTIVE: {objective}")
+    return assignment, report
+
+def sweepLogicInput(data: dict) -> dict:
+    with phaseDuration.time("parse"):
+        encodings = [constructLogicEncoding({**data, "weights": {}})]
+
+    # weight sets that only differ in concerns without weight or without raise condition are solved once
+    distinct = []
+    indices = dict()
+    positions = []
+    for weights in data["weightSets"]:
+        weights = {concern: weight for concern, weight in weights.items() if weight != 0 and concern in encodings[0].concerns}
+        key = canonicalHash(weights)
+        if key not in indices:
+            indices[key] = len(distinct)
+            distinct.append(weights)
+        positions.append(indices[key])
+
+    # weight sets with the same signs share one model, every further set only replaces the objective
+    groups = dict()
+    for index, weights in enumerate(distinct):
+        groups.setdefault(canonicalHash(encodings[0].signature(weights)), []).append(index)
+    members = list(groups.values())
+    with phaseDuration.time("parse"):
+        encodings = [constructLogicEncoding({**data, "weights": distinct[group[0]]}) for group in members]
+    objectives = [[encoding.objective(distinct[index]) for index in group] for encoding, group in zip(encodings, members)]
+
+    with phaseDuration.time("solve"):
+        solutions = sweepSolver.solve([(encoding.problem, groupObjectives) for encoding, groupObjectives in zip(encodings, objectives)])
+    if CHECK_SOLUTIONS:
+        with phaseDuration.time("check"):
+            # one evaluator for all models of the sweep, they only differ in their objectives
+            evaluator = constructBatchEvaluator(data)
+            for encoding, group, groupObjectives, groupSolutions in zip(encodings, members, objectives, solutions):
+                checkLogicSolutions(evaluator, encoding, groupSolutions, [distinct[index] for index in group], groupObjectives)
+
+    results = [None] * len(distinct)
+    with phaseDuration.time("encode"):
+        for encoding, group, groupSolutions in zip(encodings, members, solutions):
+            for index, solution in zip(group, groupSolutions):
+                results[index] = encodeOutput(encoding.decode(solution))
+    return {
+        'results': [results[position] for position in positions],
+        'distinctWeightSets': len(distinct),
+        'models': [{'variables': len(encoding.problem.variables), 'constraints': len(encoding.problem.constraints), 'weightSets': len(group)}
+                   for encoding, group in zip(encodings, members)],
+        'presolve': encodings[0].presolveReport,
+    }
+
+def logicEvaluator(data: dict, key: str) -> BatchEvaluator:
+    # building the evaluator encodes the raise conditions once more, so it is kept like the model
+    evaluator = evaluators.get(key)
+    if evaluator is None:
+        evaluator = constructBatchEvaluator(data)
+        evaluators.put(key, evaluator)
+    return evaluator
+
+def checkLogicSolutions(evaluator: BatchEvaluator, encoding: LogicEncoding, solutions: list[dict[str, int]], weightSets: list[dict[str, float]], objectives: list[tuple[dict[int, float], float]]):
+    # all solutions are evaluated in one batch
+    decoded = [encoding.decode(solution) for solution in solutions]
+    raised = evaluator.evaluate([result["tweakables"] for result in decoded])
+
+    variables = encoding.problem.variables
+    for index, (solution, result, weights, (coefficients, offset)) in enumerate(zip(solutions, decoded, weightSets, objectives)):
+        for concern, value in zip(evaluator.concerns, raised[:, index]):
+            if result["concerns"][concern] != value:
+                raise Exception(f"Solution check failed, concern \"{concern}\" is {'' if value else 'not '}raised by the solution.")
+
+        # the model may overestimate the objective in polarity mode, but never underestimate it
+        evaluated = sum(weights.get(concern, 0) for concern, value in zip(evaluator.concerns, raised[:, index]) if value)
+        modelled = offset + sum(coefficient * solution[variables[column]] for column, coefficient in coefficients.items())
+        if evaluated > modelled + 1e-6 * max(1, abs(modelled)):
+            raise Exception(f"Solution check failed, its objective is {evaluated} but the model claims {modelled}.")
+
+def solveStructure(key: str, constructProblem: Callable[[], LinearProblem], constructObjective: Callable[[dict[str, int]], tuple[dict[int, float], float]], start: dict[str, int] | None = None) -> tuple[dict[str, int], dict]:
+    if start is None:
+        start = previousSolution(key)
+
+    if portfolio is not None:
+        return solvePortfolio(key, constructProblem(), start)
+
+    # a cached model means the structure is known to consist of a single component
+    solver = models.take(key)
+    if solver is not None:
+        print("MODEL CACHE HIT")
+        with phaseDuration.time("build"):
+            solver.resetObjective(*constructObjective(solver.variableIndex))
+            if start is not None:
+                solver.setStart(start)
+        with phaseDuration.time("solve"):
+            solution = solver.solve()
+        models.put(key, solver)
+        rememberSolution(key, solution)
+        return solution, {}
+
+    model = componentModels.take(key)
+    if model is not None:
+        print("COMPONENT MODEL CACHE HIT")
+        objective, _ = constructObjective(model.variableIndex)
+        with phaseDuration.time("solve"):
+            solution = model.solve(objective, start)
+        componentModels.put(key, model)
+        rememberSolution(key, solution)
+        return solution, {'decomposition': model.decomposition.report()}
+
+    problem = constructProblem()
+    modelVariables.observe(len(problem.variables))
+    modelConstraints.observe(len(problem.constraints))
+
+    with phaseDuration.time("build"):
+        decomposition = decomposeProblem(problem)
+        solver = Solver.fromProblem(problem) if len(decomposition.components) <= 1 else None
+        if solver is not None and start is not None:
+            solver.setStart(start)
+    if solver is None:
+        # components are built where they are solved, building is part of solving here
+        with phaseDuration.time("solve"):
+            if componentSolver.parallel(problem):
+                # large structures are solved in the worker processes, their component models are not kept
+                partial = componentSolver.solve(decomposition, start)
+                solution = {variable: partial[variable] for variable in problem.variables}
+            else:
+                model = DecomposedModel(problem, decomposition)
+                solution = model.solve(problem.objective, start)
+                componentModels.put(key, model)
+        rememberSolution(key, solution)
+        return solution, {'decomposition': decomposition.report()}
+
+    with phaseDuration.time("solve"):
+        solution = solver.solve()
+    models.put(key, solver)
+    rememberSolution(key, solution)
+    return solution, {'decomposition': decomposition.report()}
+
+def solvePortfolio(key: str, problem: LinearProblem, start: dict[str, int] | None) -> tuple[dict[str, int], dict]:
+    # the portfolio races on the whole model, models are built in the portfolio processes instead of the model cache
+    modelVariables.observe(len(problem.variables))
+    modelConstraints.observe(len(problem.constraints))
+
+    with phaseDuration.time("solve"):
+        solution, report = portfolio.solve(problem, start)
+    portfolioWins.inc(report["winner"])
+    print(f"PORTFOLIO WINNER: {report['winner']}")
+    rememberSolution(key, solution)
+    return solution, {'portfolio': report}
+
+def streamStructure(key: str, constructProblem: Callable[[], LinearProblem], constructObjective: Callable[[dict[str, int]], tuple[dict[int, float], float]], start: dict[str, int] | None, present: Callable[[dict[str, int]], object]) -> Iterator[str]:
+    """
+    Solves the structure as a single model in a background thread and returns its events for Server-Sent Events:
+    an "incumbent" event for every improved solution and a final "done" (or "error") event.
+    The time limit and gap limit are taken from the query parameters timeLimit and gapLimit.
+    """
+    timeLimit = min(request.args.get('timeLimit', STREAM_TIME_LIMIT, type=float), STREAM_TIME_LIMIT)
+    gapLimit = request.args.get('gapLimit', type=float)
+    if start is None:
+        start = previousSolution(key)
+
+    # the model is prepared before the response starts, so input errors are still reported as usual
+    solver = models.take(key)
+    # a cached model means the structure is known to consist of a single component, other models are not kept
+    cacheable = solver is not None
+    try:
+        with phaseDuration.time("build"):
+            if solver is None:
+                problem = constructProblem()
+                modelVariables.observe(len(problem.variables))
+                modelConstraints.observe(len(problem.constraints))
+                cacheable = len(decomposeProblem(problem).components) <= 1
+                solver = Solver.fromProblem(problem)
+            else:
+                print("MODEL CACHE HIT")
+                solver.resetObjective(*constructObjective(solver.variableIndex))
+            if start is not None:
+                solver.setStart(start)
+            solver.setTimeLimit(timeLimit)
+            if gapLimit is not None:
+                solver.setGapLimit(gapLimit)
+    except Exception:
+        # only the request failed, the model is still good for the next one
+        if solver is not None and cacheable:
+            solver.clearLimits()
+            models.put(key, solver)
+        raise
+
+    events = Queue()
+    finished = Event()
+    solver.watchIncumbents(lambda solution, objective, gap: events.put(("incumbent", {'solution': present(solution), 'objective': objective, 'gap': gap})))
+
+    def run():
+        try:
+            with phaseDuration.time("solve"):
+                solution = solver.solve()
+            rememberSolution(key, solution)
+            events.put(("done", {'solution': present(solution), 'objective': solver.objective, 'gap': solver.gap, 'solverStatus': solver.status}))
+        except Exception as e:
+            events.put(("error", {'message': str(e)}))
+        finally:
+            finished.set()
+            solver.watchIncumbents(None)
+            solver.clearLimits()
+            if cacheable:
+                models.put(key, solver)
+            events.put(None)
+
+    Thread(target=run, daemon=True).start()
+
+    def generate() -> Iterator[str]:
+        try:
+            while (event := events.get()) is not None:
+                name, payload = event
+                yield f"event: {name}\ndata: {json.dumps(payload)}\n\n"
+        finally:
+            # the client went away, there is nobody left to wait for better solutions
+            if not finished.is_set():
+                solver.interrupt()
+
+    return generate()
+
+def previousSolution(key: str) -> dict[str, int] | None:
+    if not REUSE_LAST_SOLUTION:
+        return None
+    solution = lastSolutions.get(key)
+    if solution is None and store is not None:
+        stored = store.get("solution", key)
+        if stored is not None:
+            solution = unpackJson(stored)
+            lastSolutions.put(key, solution)
+    return solution
+
+def rememberSolution(key: str, solution: dict[str, int]):
+    if REUSE_LAST_SOLUTION:
+        lastSolutions.put(key, solution)
+        if store is not None:
+            store.put("solution", key, packJson(solution))
+
+def warmUp() -> float:
+    # leaves every cache untouched, the warm up must not answer real requests
+    start = time.perf_counter()
+    encoding = constructLogicEncoding(WARM_UP_INPUT)
+    decomposeProblem(encoding.problem)
+    solution = Solver.fromProblem(encoding.problem).solve()
+    checkLogicSolutions(constructBatchEvaluator(WARM_UP_INPUT), encoding, [solution], [WARM_UP_INPUT["weights"]], [(encoding.problem.objective, encoding.problem.offset)])
+    encodeOutput(encoding.decode(solution))
+    # the first request through flask sets up routing and json handling
+    app.test_client().get('/cache')
+    return time.perf_counter() - start
+
+def timed(phase: str, function: Callable):
+    with phaseDuration.time(phase):
+        return function()
+
+def readInput() -> dict:
+    # small labs send their input as query parameter, large ones as (compressed) request body
+    with phaseDuration.time("decode"):
+        if request.method in ('POST', 'PATCH'):
+            return decodeBody(request.get_data(), request.headers.get('Content-Encoding'), request.headers.get('Content-Type'))
+        return decodeInput(request.args.get('input'))
 
 def decodeInput(input:str) -> dict:
     # TODO: base 64 decode
@@ -42,4 +707,6 @@ def encodeOutput(input) -> dict:
     return json.dumps(input)
 
 if __name__ == '__main__':
+    # development server, see gunicorn.conf.py for serving with several warm worker processes
+    print(f"WARM UP: {warmUp():.3f}s")
     app.run(port=5000)
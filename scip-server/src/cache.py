@@ -0,0 +1,110 @@
+import hashlib
+import json
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable
+import time
+
+
+def canonicalHash(*parts) -> str:
+    # key order and whitespace of the original request must not influence the hash
+    encoded = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    _entries: OrderedDict
+    _maxEntries: int
+    _maxBytes: int | None
+    _ttl: float | None
+    _sizeOf: Callable[[Any], int]
+    _bytes: int
+    _lock: Lock
+
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+
+    def __init__(self, maxEntries: int, maxBytes: int | None = None, ttl: float | None = None, sizeOf: Callable[[Any], int] = lambda value: 0):
+        self._entries = OrderedDict()
+        self._maxEntries = maxEntries
+        self._maxBytes = maxBytes
+        self._ttl = ttl
+        self._sizeOf = sizeOf
+        self._bytes = 0
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: str) -> tuple | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry[2] is not None and entry[2] < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return entry
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def take(self, key: str):
+        # removes the entry while it is in use, so no two requests share it at the same time
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                return None
+            self._remove(key)
+            return entry[0]
+
+    def put(self, key: str, value, ttl: float | None = None):
+        # a given time to live replaces the one of the cache for this entry
+        size = self._sizeOf(value)
+        if self._maxBytes is not None and size > self._maxBytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            ttl = self._ttl if ttl is None else ttl
+            expires = None if ttl is None else time.monotonic() + ttl
+            self._entries[key] = (value, size, expires)
+            self._bytes += size
+
+            while len(self._entries) > self._maxEntries or (self._maxBytes is not None and self._bytes > self._maxBytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,60 @@
+from src.problem import LinearProblem
+
+
+def canonicalForm(problem: LinearProblem) -> tuple[tuple, list[str]]:
+    """
+    Renames the variables of a problem to their order of first appearance in the constraints.
+    Copies of the same block that only differ in their variable names, like the ones in generated
+    labs, get an identical form. Returns the form and the variable names in canonical order.
+    """
+    canonical = dict()
+    rows = []
+    for coefficients, sense, rhs in problem.constraints:
+        entries = []
+        for column, coefficient in coefficients.items():
+            if column not in canonical:
+                canonical[column] = len(canonical)
+            entries.append((canonical[column], coefficient))
+        entries.sort()
+        rows.append((tuple(entries), sense, rhs))
+
+    # variables without constraints are never part of a component, but a problem may still contain them
+    for column in range(len(problem.variables)):
+        if column not in canonical:
+            canonical[column] = len(canonical)
+
+    objective = tuple(sorted((canonical[column], coefficient) for column, coefficient in problem.objective.items()))
+    names = [None] * len(problem.variables)
+    for column, index in canonical.items():
+        names[index] = problem.variables[column]
+
+    return (len(problem.variables), objective, tuple(rows)), names
+
+
+class CanonicalGroups:
+    # one representative per distinct form, and every copy with its variable names in canonical order
+    representatives: list[LinearProblem]
+    copies: list[list[list[str]]]
+
+    def __init__(self, problems: list[LinearProblem]):
+        self.representatives = []
+        self.copies = []
+
+        groupOf = dict()
+        for problem in problems:
+            form, names = canonicalForm(problem)
+            if form not in groupOf:
+                groupOf[form] = len(self.representatives)
+                self.representatives.append(problem)
+                self.copies.append([])
+            self.copies[groupOf[form]].append(names)
+
+    def expand(self, solution: dict[str, int]) -> dict[str, int]:
+        # the first copy of every group is its representative, its solution is mapped onto the other copies
+        result = dict()
+        for copies in self.copies:
+            values = [solution[name] for name in copies[0]]
+            for names in copies:
+                for name, value in zip(names, values):
+                    result[name] = value
+        return result
@@ -1,43 +1,12 @@
-from pyscipopt import Variable
-from src.expressions import constructExpression
+from src.expressions import LinearExpressionBuilder
 
 
-def getConstraintType(input: str) -> str:
-    # check for "=="
-    parts = input.split("==")
-    if len(parts) > 2:
-        raise Exception("Given constraint contains multiple \"==\".")
-    if len(parts) == 2:
-        return "=="
-    
-    # check for "<="
-    parts = input.split("<=")
-    if len(parts) > 2:
-        raise Exception("Given constraint contains multiple \"<=\".")
-    if len(parts) == 2:
-        return "<="
+def constructConstraint(input: str, vars_index: dict[str, int]) -> tuple[dict[int, float], str, float]:
+    builder = LinearExpressionBuilder(input, vars_index)
+    builder.feed()
 
-    # check for ">="
-    parts = input.split(">=")
-    if len(parts) > 2:
-        raise Exception("Given constraint contains multiple \">=\".")
-    if len(parts) == 2:
-        return ">="
+    if builder.relation is None:
+        raise Exception(f"Constraint \"{input}\" contains no \"==\", \"<=\" or \">=\".")
 
-    # Error 
-    raise Exception("Given constraint contains no \"==\", \"<=\" or \">=\"")
-    
-
-def constructConstraint(input: str, vars_dict: dict[str, Variable]):
-    type = getConstraintType(input)
-    
-    parts = input.split(type)
-
-    match type:
-        case "==":
-            return constructExpression(parts[0], vars_dict) == constructExpression(parts[1], vars_dict)
-        case "<=":
-            return constructExpression(parts[0], vars_dict) <= constructExpression(parts[1], vars_dict)
-        case ">=":
-            return constructExpression(parts[0], vars_dict) >= constructExpression(parts[1], vars_dict)
-    
\ No newline at end of file
+    # all terms are on the left hand side now, so the constant moves to the right
+    return builder.coefficients, builder.relation, -builder.constant
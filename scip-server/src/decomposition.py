@@ -0,0 +1,233 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from src.canonical import CanonicalGroups
+from src.problem import LinearProblem
+from src.solver import Solver
+
+# below this many constraint entries, solving in the server process is cheaper than shipping components to workers
+PARALLEL_THRESHOLD = 5000
+
+
+class Decomposition:
+    components: list[LinearProblem]
+    # variables without any constraint, their value only depends on the sign of their objective coefficient
+    free: dict[str, int]
+    # number of components left after merging copies with the same canonical form, known once solved
+    distinctComponents: int | None
+
+    def __init__(self, components: list[LinearProblem], free: dict[str, int]):
+        self.components = components
+        self.free = free
+        self.distinctComponents = None
+
+    def report(self) -> dict:
+        sizes = sorted(((len(c.variables), len(c.constraints)) for c in self.components), reverse=True)
+        return {
+            "components": len(self.components),
+            "distinctComponents": self.distinctComponents,
+            "freeVariables": len(self.free),
+            "largestComponent": {"variables": sizes[0][0], "constraints": sizes[0][1]} if len(sizes) > 0 else None,
+            "componentSizes": [size[0] for size in sizes],
+        }
+
+
+def findRoot(parents: list[int], variable: int) -> int:
+    root = variable
+    while parents[root] != root:
+        root = parents[root]
+    # path compression
+    while parents[variable] != root:
+        parents[variable], variable = root, parents[variable]
+    return root
+
+
+def decomposeProblem(problem: LinearProblem) -> Decomposition:
+    # union find over the variable interaction graph, variables sharing a constraint end up in the same set
+    parents = list(range(len(problem.variables)))
+    constrained = [False] * len(problem.variables)
+
+    for coefficients, sense, rhs in problem.constraints:
+        columns = iter(coefficients)
+        first = next(columns, None)
+        if first is None:
+            if not constantHolds(sense, rhs):
+                raise Exception("Problem contains a constraint without variables that can never hold.")
+            continue
+
+        constrained[first] = True
+        root = findRoot(parents, first)
+        for column in columns:
+            constrained[column] = True
+            other = findRoot(parents, column)
+            if other != root:
+                parents[other] = root
+
+    # renumber every component's variables in their original order
+    componentOf = dict()
+    localIndex = [0] * len(problem.variables)
+    componentVariables = []
+    free = dict()
+    for column, variable in enumerate(problem.variables):
+        if not constrained[column]:
+            free[variable] = 1 if problem.objective.get(column, 0) < 0 else 0
+            continue
+
+        root = findRoot(parents, column)
+        if root not in componentOf:
+            componentOf[root] = len(componentVariables)
+            componentVariables.append([])
+        localIndex[column] = len(componentVariables[componentOf[root]])
+        componentVariables[componentOf[root]].append(column)
+
+    componentConstraints = [[] for _ in componentVariables]
+    for coefficients, sense, rhs in problem.constraints:
+        if len(coefficients) == 0:
+            continue
+        component = componentOf[findRoot(parents, next(iter(coefficients)))]
+        componentConstraints[component].append(({localIndex[column]: value for column, value in coefficients.items()}, sense, rhs))
+
+    components = []
+    for columns, constraints in zip(componentVariables, componentConstraints):
+        components.append(LinearProblem(
+            [problem.variables[column] for column in columns],
+            {localIndex[column]: problem.objective[column] for column in columns if column in problem.objective},
+            constraints
+        ))
+
+    return Decomposition(components, free)
+
+
+def constantHolds(sense: str, rhs: float) -> bool:
+    match sense:
+        case "==":
+            return rhs == 0
+        case "<=":
+            return 0 <= rhs
+        case ">=":
+            return 0 >= rhs
+
+
+def solveComponents(components: list[tuple[LinearProblem, dict[str, int] | None]]) -> dict[str, int]:
+    solution = dict()
+    for component, start in components:
+        solver = Solver.fromProblem(component)
+        if start:
+            solver.setStart(start)
+        solution.update(solver.solve())
+    return solution
+
+
+def entryCount(problem: LinearProblem) -> int:
+    return sum(len(coefficients) for coefficients, _, _ in problem.constraints)
+
+
+def componentStart(component: LinearProblem, start: dict[str, int] | None) -> dict[str, int] | None:
+    if start is None:
+        return None
+    return {variable: start[variable] for variable in component.variables if variable in start}
+
+
+class DecomposedModel:
+    """
+    The models of the components of a problem, kept for later requests with the same structure. A component
+    gets its solver the first time it is solved, afterwards only its objective is replaced. Copies are
+    grouped under the objective of every solve, so only one solver per distinct component runs.
+    """
+    decomposition: Decomposition
+    variableIndex: dict[str, int]
+
+    _variables: list[str]
+    # component and local column of every constrained variable
+    _columns: dict[str, tuple[int, int]]
+    _solvers: dict[int, Solver]
+
+    def __init__(self, problem: LinearProblem, decomposition: Decomposition):
+        self.decomposition = decomposition
+        self.variableIndex = {variable: index for index, variable in enumerate(problem.variables)}
+        self._variables = problem.variables
+        self._columns = {variable: (index, local) for index, component in enumerate(decomposition.components) for local, variable in enumerate(component.variables)}
+        self._solvers = dict()
+
+    def solve(self, objective: dict[int, float], start: dict[str, int] | None = None) -> dict[str, int]:
+        components = self.decomposition.components
+        for component in components:
+            component.objective = dict()
+        free = dict.fromkeys(self.decomposition.free, 0)
+        for column, coefficient in objective.items():
+            variable = self._variables[column]
+            if variable in free:
+                free[variable] = 1 if coefficient < 0 else 0
+            else:
+                index, local = self._columns[variable]
+                components[index].objective[local] = coefficient
+        self.decomposition.free = free
+
+        groups = CanonicalGroups(components)
+        self.decomposition.distinctComponents = len(groups.representatives)
+        indices = {id(component): index for index, component in enumerate(components)}
+        partial = dict()
+        for component in groups.representatives:
+            index = indices[id(component)]
+            if index in self._solvers:
+                solver = self._solvers[index]
+                solver.resetObjective(component.objective)
+            else:
+                solver = self._solvers[index] = Solver.fromProblem(component)
+            componentValues = componentStart(component, start)
+            if componentValues:
+                solver.setStart(componentValues)
+            partial.update(solver.solve())
+
+        solution = dict(free)
+        solution.update(groups.expand(partial))
+        return {variable: solution[variable] for variable in self._variables}
+
+
+class ComponentSolver:
+    _workers: int
+    _executor: ProcessPoolExecutor | None
+    _lock: Lock
+
+    def __init__(self, workers: int):
+        self._workers = workers
+        self._executor = None
+        self._lock = Lock()
+
+    def _ensureExecutor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self._workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _partition(self, components: list[tuple[LinearProblem, dict[str, int] | None]]) -> list[list[tuple[LinearProblem, dict[str, int] | None]]]:
+        # largest components first into the currently lightest batch, a few batches per worker balance the load
+        batches = [[] for _ in range(min(len(components), self._workers * 4))]
+        loads = [0] * len(batches)
+        for component in sorted(components, key=lambda component: entryCount(component[0]), reverse=True):
+            lightest = loads.index(min(loads))
+            batches[lightest].append(component)
+            loads[lightest] += entryCount(component[0])
+        return batches
+
+    def parallel(self, problem: LinearProblem) -> bool:
+        # whether the components of the problem are worth solving in the worker processes
+        return self._workers > 1 and entryCount(problem) >= PARALLEL_THRESHOLD
+
+    def solve(self, decomposition: Decomposition, start: dict[str, int] | None = None) -> dict[str, int]:
+        # isomorphic copies are solved once and their solution is mapped back onto every copy
+        groups = CanonicalGroups(decomposition.components)
+        decomposition.distinctComponents = len(groups.representatives)
+        # a representative is warm started with the start values of its own variables
+        components = [(component, componentStart(component, start)) for component in groups.representatives]
+
+        if self._workers <= 1 or len(components) <= 1 or sum(entryCount(c) for c, _ in components) < PARALLEL_THRESHOLD:
+            partial = solveComponents(components)
+        else:
+            partial = dict()
+            for batch in self._ensureExecutor().map(solveComponents, self._partition(components)):
+                partial.update(batch)
+
+        solution = dict(decomposition.free)
+        solution.update(groups.expand(partial))
+        return solution
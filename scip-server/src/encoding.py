@@ -0,0 +1,61 @@
+import io
+import json
+import zlib
+
+# optional dependencies, only needed for the corresponding request encodings
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+MAX_INPUT_BYTES = 256 * 1024 * 1024
+
+JSON_TYPES = ("application/json", "text/plain", "")
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+
+def decompressBody(body: bytes, contentEncoding: str | None) -> bytes:
+    encoding = (contentEncoding or "identity").strip().lower()
+
+    match encoding:
+        case "identity":
+            result = body
+        case "gzip" | "x-gzip" | "deflate":
+            # wbits 47 detects gzip and zlib headers automatically
+            decompressor = zlib.decompressobj(47)
+            result = decompressor.decompress(body, MAX_INPUT_BYTES + 1)
+        case "zstd":
+            if zstandard is None:
+                raise Exception("Request is zstd encoded, but the \"zstandard\" package is not installed.")
+            reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(body))
+            result = reader.read(MAX_INPUT_BYTES + 1)
+        case _:
+            raise Exception(f"Unsupported content encoding \"{encoding}\".")
+
+    if len(result) > MAX_INPUT_BYTES:
+        raise Exception(f"Decompressed request exceeds {MAX_INPUT_BYTES} bytes.")
+    return result
+
+
+def deserializeBody(body: bytes, contentType: str | None) -> dict:
+    mimeType = (contentType or "").split(";")[0].strip().lower()
+
+    if mimeType in JSON_TYPES:
+        # json accepts utf-8 bytes directly, so the body is never url or string decoded separately
+        return json.loads(body)
+    if mimeType in MSGPACK_TYPES:
+        if msgpack is None:
+            raise Exception("Request is msgpack encoded, but the \"msgpack\" package is not installed.")
+        return msgpack.unpackb(body, raw=False)
+
+    raise Exception(f"Unsupported content type \"{mimeType}\".")
+
+
+def decodeBody(body: bytes, contentEncoding: str | None, contentType: str | None) -> dict:
+    return deserializeBody(decompressBody(body, contentEncoding), contentType)
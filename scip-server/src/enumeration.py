@@ -0,0 +1,129 @@
+import heapq
+import time
+from src.decomposition import decomposeProblem
+from src.logic import LogicEncoding
+from src.problem import LinearProblem
+from src.solver import Solver
+
+
+class ComponentAlternatives:
+    """
+    The solutions of one component of a model, best first, found one solve at a time. Every found
+    solution is cut off from the model by a constraint on its value variables, so the solutions differ
+    in the assignment of at least one tweakable. The model is built once, the cuts are added in place.
+    """
+    solutions: list[tuple[dict[str, int], float]]
+    # no further solution exists (within the limit)
+    exhausted: bool
+    # a solve ran out of time, further solutions are unknown
+    interrupted: bool
+    solves: int
+
+    _solver: Solver
+    _valueVariables: list[str]
+    _limit: float | None
+
+    def __init__(self, problem: LinearProblem, optimum: dict[str, int], valueVariables: set[str], limit: float | None):
+        objective = problem.offset + sum(coefficient * optimum[problem.variables[column]] for column, coefficient in problem.objective.items())
+        self.solutions = [({variable: optimum[variable] for variable in problem.variables}, objective)]
+        self.exhausted = False
+        self.interrupted = False
+        self.solves = 0
+        self._solver = Solver.fromProblem(problem)
+        self._valueVariables = [variable for variable in problem.variables if variable in valueVariables]
+        self._limit = limit
+
+    def get(self, index: int, deadline: float) -> tuple[dict[str, int], float] | None:
+        while len(self.solutions) <= index and not self.exhausted and not self.interrupted:
+            self._next(deadline)
+        return self.solutions[index] if index < len(self.solutions) else None
+
+    def _next(self, deadline: float):
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            self.interrupted = True
+            return
+        last = self.solutions[-1][0]
+        selected = [variable for variable in self._valueVariables if last[variable] == 1]
+        if len(selected) == 0:
+            # no tweakable in the component, its only assignment is listed
+            self.exhausted = True
+            return
+        self._solver.exclude(selected)
+        if self._limit is not None:
+            # SCIP only accepts solutions clearly below its limit, so the exact limit is checked after solving
+            self._solver.setObjectiveLimit(self._limit + 1e-4 * max(1, abs(self._limit)))
+        self._solver.setTimeLimit(remaining)
+        self._solver.solveBound()
+        self.solves += 1
+        # without proof of optimality the solution might not be the next best one
+        if self._solver.status != "optimal":
+            self.exhausted = self._solver.status == "infeasible"
+            self.interrupted = not self.exhausted
+            return
+        if self._limit is not None and self._solver.objective > self._limit + 1e-9 * max(1, abs(self._limit)):
+            self.exhausted = True
+            return
+        self.solutions.append((self._solver.solution, self._solver.objective))
+
+
+def enumerateAlternatives(encoding: LogicEncoding, optimum: dict[str, int], count: int, tolerance: float | None, timeLimit: float) -> tuple[list[dict[str, int]], dict]:
+    """
+    Lists up to count next best solutions after an optimal one, in order of their objective, stopping
+    early at the first one that is worse than the optimum by more than the tolerance. All solutions
+    differ in the assignment of at least one tweakable in the model.
+    The components of the model are independent, so every solution combines one solution of each and
+    the next best overall is the best combination not listed yet. Components are only solved again
+    when a combination that needs their next solution could be the next best, and cuts stay within
+    their component.
+    """
+    started = time.perf_counter()
+    deadline = started + timeLimit
+    decomposition = decomposeProblem(encoding.problem)
+    valueVariables = set(encoding.valueVariables)
+    components = []
+    for problem in decomposition.components:
+        objective = problem.offset + sum(coefficient * optimum[problem.variables[column]] for column, coefficient in problem.objective.items())
+        # the other components are at their best, so no component may exceed its own optimum by more than the tolerance
+        components.append(ComponentAlternatives(problem, optimum, valueVariables, objective + tolerance if tolerance is not None else None))
+    total = sum(component.solutions[0][1] for component in components)
+    limit = total + tolerance if tolerance is not None else None
+
+    # combinations by the index of the solution of every component, best first. A combination whose
+    # solutions are not all known yet is queued with the objective of its predecessor, a lower bound, and
+    # only solved for once it comes first.
+    first = (0,) * len(components)
+    heap = [(total, False, first)]
+    queued = {first}
+    solutions = []
+    while len(heap) > 0 and len(solutions) < count:
+        objective, pending, indices = heapq.heappop(heap)
+        if limit is not None and objective > limit + 1e-9 * max(1, abs(limit)):
+            break
+        if pending:
+            known = [component.get(index, deadline) for component, index in zip(components, indices)]
+            if any(component.interrupted for component in components):
+                break
+            if all(alternative is not None for alternative in known):
+                heapq.heappush(heap, (sum(alternative[1] for alternative in known), False, indices))
+            continue
+
+        if indices != first:
+            solution = dict(optimum)
+            for component, index in zip(components, indices):
+                solution.update(component.solutions[index][0])
+            solutions.append(solution)
+        for position in range(len(components)):
+            successor = indices[:position] + (indices[position] + 1,) + indices[position + 1:]
+            if successor not in queued:
+                queued.add(successor)
+                heapq.heappush(heap, (objective, True, successor))
+
+    report = {
+        "alternatives": len(solutions),
+        "components": len(components),
+        "solves": sum(component.solves for component in components),
+        "complete": not any(component.interrupted for component in components),
+        "time": time.perf_counter() - started,
+    }
+    return solutions, report
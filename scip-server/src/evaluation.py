@@ -0,0 +1,141 @@
+import numpy as np
+from src.logic import CONSTANT, LogicEncoding, constructTweakables, valueKey
+
+# assignments per word of a bit row
+WORD = 64
+
+
+class BatchEvaluator:
+    """
+    Evaluates the raise conditions of a logic encoding for a whole batch of assignments at once.
+    Every node is a row of bits with one bit per assignment, so one operation evaluates a gate for 64
+    assignments. Gates of the same depth, type and similar number of operands are evaluated together.
+    """
+    encoding: LogicEncoding
+    concerns: list[str]
+    names: list[str]
+
+    # per tweakable the choice of every value, and the row of every choice
+    _lookups: list[dict]
+    _rows: list[np.ndarray]
+
+    # node and negation of every concern, constants refer to the row that is always true
+    _concernRows: np.ndarray
+    _concernMasks: np.ndarray
+    _trueRow: int
+    # per group of gates: their rows, the rows of their operands, the negation masks of the operands and whether they are conjunctions
+    _groups: list[tuple[np.ndarray, np.ndarray, np.ndarray, bool]]
+
+    def __init__(self, encoding: LogicEncoding):
+        self.encoding = encoding
+        self.concerns = list(encoding.concerns)
+
+        valueCount = encoding.valueCount
+        self._trueRow = valueCount + len(encoding.gates)
+
+        self.names = list(encoding.tweakables)
+        self._lookups = []
+        self._rows = []
+        for name in self.names:
+            lookup = dict()
+            for choice, value in enumerate(encoding.tweakables[name]):
+                # the class keeps true and 1 apart, the json key of the value serves unhashable values
+                if value.__hash__ is not None:
+                    lookup.setdefault((value.__class__, value), choice)
+                lookup.setdefault(valueKey(value), choice)
+            self._lookups.append(lookup)
+            self._rows.append(np.array([encoding.values[name][valueKey(value)] for value in encoding.tweakables[name]], dtype=np.int64))
+
+        self._concernRows = np.array([self._row(node) for node, _ in encoding.concerns.values()], dtype=np.int64)
+        self._concernMasks = np.array([mask(negated) for _, negated in encoding.concerns.values()], dtype=np.uint64)
+
+        # operands always have smaller node numbers, so a gate is one level deeper than its deepest operand
+        levels = [0] * (valueCount + len(encoding.gates))
+        grouped = dict()
+        for index, (type, operands) in enumerate(encoding.gates):
+            node = valueCount + index
+            levels[node] = 1 + max(levels[operand] for operand, _ in operands)
+            width = 1 << (len(operands) - 1).bit_length()
+            grouped.setdefault((levels[node], type, width), []).append(node)
+
+        self._groups = []
+        for (_, type, width), nodes in sorted(grouped.items()):
+            # missing operands are padded with the neutral element of the gate, true for and, false for or
+            operands = np.full((len(nodes), width), self._trueRow, dtype=np.int64)
+            masks = np.full((len(nodes), width), mask(type == "or"), dtype=np.uint64)
+            for row, node in enumerate(nodes):
+                for position, (operand, negated) in enumerate(encoding.gates[node - valueCount][1]):
+                    operands[row, position] = operand
+                    masks[row, position] = mask(negated)
+            self._groups.append((np.array(nodes, dtype=np.int64), operands, masks[:, :, np.newaxis], type == "and"))
+
+    def _row(self, node: int) -> int:
+        return self._trueRow if node == CONSTANT else node
+
+    def choices(self, assignments: list[dict]) -> np.ndarray:
+        """
+        Translates assignments into the index of the selected value of every tweakable (in the order of
+        names), the form evaluate works on. Givens do not have to be assigned.
+        """
+        choices = np.zeros((len(assignments), len(self.names)), dtype=np.int64)
+        for index, assignment in enumerate(assignments):
+            try:
+                choices[index] = [lookup[(value.__class__, value)] for lookup, value in zip(self._lookups, map(assignment.__getitem__, self.names))]
+            except (KeyError, TypeError):
+                # missing, unknown or unhashable values, the slow way finds out which
+                choices[index] = [self._choice(index, assignment, name, lookup) for name, lookup in zip(self.names, self._lookups)]
+        return choices
+
+    def _choice(self, index: int, assignment: dict, name: str, lookup: dict) -> int:
+        if name not in assignment:
+            if len(self.encoding.tweakables[name]) > 1:
+                raise Exception(f"Assignment {index} does not assign tweakable \"{name}\".")
+            return 0
+        value = assignment[name]
+        if value.__hash__ is not None and (value.__class__, value) in lookup:
+            return lookup[(value.__class__, value)]
+        key = valueKey(value)
+        if key not in lookup:
+            raise Exception(f"Assignment {index} assigns unknown value {key} to tweakable \"{name}\".")
+        return lookup[key]
+
+    def _pack(self, choices: np.ndarray) -> np.ndarray:
+        count = choices.shape[0]
+        values = np.zeros((self.encoding.valueCount, -(-count // WORD)), dtype=np.uint64)
+        padding = (0, -count % WORD)
+        for position, rows in enumerate(self._rows):
+            selected = choices[:, position] == np.arange(len(rows))[:, np.newaxis]
+            values[rows] = np.packbits(np.pad(selected, ((0, 0), padding)), axis=1, bitorder="little").view(np.uint64)
+        return values
+
+    def evaluate(self, assignments: list[dict] | np.ndarray) -> np.ndarray:
+        """
+        Returns whether every concern is raised, one row per concern (in the order of concerns) and one
+        column per assignment. Assignments are either dictionaries or their choices.
+        """
+        choices = assignments if isinstance(assignments, np.ndarray) else self.choices(assignments)
+        values = self._pack(choices)
+        truth = np.empty((self._trueRow + 1, values.shape[1]), dtype=np.uint64)
+        truth[:self.encoding.valueCount] = values
+        truth[self._trueRow] = mask(True)
+
+        for nodes, operands, masks, conjunction in self._groups:
+            literals = truth[operands] ^ masks
+            truth[nodes] = np.bitwise_and.reduce(literals, axis=1) if conjunction else np.bitwise_or.reduce(literals, axis=1)
+
+        raised = truth[self._concernRows] ^ self._concernMasks[:, np.newaxis]
+        return np.unpackbits(raised.view(np.uint8), axis=1, count=choices.shape[0], bitorder="little").astype(bool)
+
+    def objective(self, assignments: list[dict] | np.ndarray, weights: dict[str, float]) -> np.ndarray:
+        # sum of the weights of the raised concerns, for every assignment
+        vector = np.array([weights.get(concern, 0) for concern in self.concerns], dtype=np.float64)
+        return vector @ self.evaluate(assignments)
+
+
+def mask(full: bool) -> np.uint64:
+    return np.uint64(0xFFFFFFFFFFFFFFFF) if full else np.uint64(0)
+
+
+def constructBatchEvaluator(data: dict) -> BatchEvaluator:
+    # built from the raise conditions as they are, without presolve, so it can cross check presolved encodings
+    return BatchEvaluator(LogicEncoding(constructTweakables(data["tweakables"]), data["raiseConditions"], data.get("definitions")))
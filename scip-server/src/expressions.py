@@ -1,50 +1,126 @@
-from pyscipopt import Variable
-
-
-def constructFactor(input: str, vars_dict: dict[str, Variable]):
-    if len(input) == 0:
-        return 0
-
-    #print(f"in: {input}, vars: {vars_dict}")
-    negative = input.startswith('-')
-
-    if  negative and input[1: len(input)] in vars_dict:
-        return vars_dict[input[1: len(input)]] * -1
-    if input in vars_dict:
-        return vars_dict[input]
-
-    # factor is not a variable => it must be a number
-    if '.' in input:
-        return float(input)
-    return int(input)
-
-
-def constructTerm(input: str, vars_dict: dict[str, Variable]):
-    factors = input.split('*')
-
-    if len(factors) <= 0:
-        raise Exception("Term is empty.")
-
-    result = constructFactor(factors[0], vars_dict)
-
-    for i in range(1, len(factors)):
-        result = result * constructFactor(factors[i], vars_dict)
-    
-    return result
-
-    
-
-def constructExpression(input: str, vars_dict: dict[str, Variable]):
-    # remove whitespaces
-    input = input.replace(' ', '')
-
-    if len(input) <= 0:
+import re
+
+
+TOKEN_PATTERN = re.compile(r"\s*(?:(?P<number>\d+\.?\d*|\.\d+)|(?P<name>[A-Za-z_]\w*)|(?P<operator>[-+*])|(?P<relation>==|<=|>=)|(?P<invalid>\S))")
+
+
+class LinearExpressionBuilder:
+    """
+    Collects the terms of a linear expression in a single pass over its tokens.
+    Coefficients are accumulated straight into a {variable index: coefficient} map and a constant.
+    Terms after a relation are moved to the left hand side by negating them.
+    """
+    coefficients: dict[int, float]
+    constant: float
+    relation: str | None
+
+    _input: str
+    _vars_index: dict[str, int]
+    _side: int
+    _sign: int
+    _factor: float
+    _variable: int | None
+    _expectingOperand: bool
+    # the operator or relation still waiting for its operand
+    _dangling: str | None
+
+    def __init__(self, input: str, vars_index: dict[str, int]):
+        self.coefficients = dict()
+        self.constant = 0
+        self.relation = None
+
+        self._input = input
+        self._vars_index = vars_index
+        self._side = 1
+        self._startTerm(1)
+
+    def _startTerm(self, sign: int, dangling: str | None = None):
+        self._sign = sign
+        self._factor = 1
+        self._variable = None
+        self._expectingOperand = True
+        self._dangling = dangling
+
+    def _endTerm(self, relation: str | None = None):
+        if self._expectingOperand:
+            if self._dangling is None:
+                raise Exception(f"Expression \"{self._input}\" contains an empty term.")
+            if relation is None:
+                raise Exception(f"Expression \"{self._input}\" ends with \"{self._dangling}\", an operand is missing after it.")
+            raise Exception(f"Expression \"{self._input}\" has \"{self._dangling}\" without an operand before \"{relation}\".")
+
+        value = self._side * self._sign * self._factor
+        if self._variable is None:
+            self.constant += value
+        else:
+            self.coefficients[self._variable] = self.coefficients.get(self._variable, 0) + value
+
+    def _operand(self, kind: str, text: str):
+        if not self._expectingOperand:
+            raise Exception(f"Expression \"{self._input}\" is missing an operator before \"{text}\".")
+
+        if kind == "number":
+            self._factor *= float(text)
+        else:
+            if text not in self._vars_index:
+                raise Exception(f"Expression \"{self._input}\" refers to unknown variable \"{text}\".")
+            if self._variable is not None:
+                raise Exception(f"Expression \"{self._input}\" multiplies two variables, only linear expressions are supported.")
+            self._variable = self._vars_index[text]
+
+        self._expectingOperand = False
+        self._dangling = None
+
+    def _operator(self, text: str):
+        if self._expectingOperand:
+            # unary sign in front of an operand, e.g. "-x1" or "2*-x1"
+            if text == "*":
+                raise Exception(f"Expression \"{self._input}\" has a \"*\" without left operand.")
+            if text == "-":
+                self._sign = -self._sign
+            self._dangling = text
+            return
+
+        if text == "*":
+            self._expectingOperand = True
+            self._dangling = text
+            return
+
+        self._endTerm()
+        self._startTerm(1 if text == "+" else -1, text)
+
+    def _relation(self, text: str):
+        if self.relation is not None:
+            raise Exception(f"Constraint \"{self._input}\" contains multiple relations (\"{self.relation}\" and \"{text}\").")
+        self._endTerm(text)
+        self.relation = text
+        self._side = -1
+        self._startTerm(1, text)
+
+    def feed(self):
+        for match in TOKEN_PATTERN.finditer(self._input):
+            kind = match.lastgroup
+            text = match.group(kind) if kind is not None else None
+            match kind:
+                case "number" | "name":
+                    self._operand(kind, text)
+                case "operator":
+                    self._operator(text)
+                case "relation":
+                    self._relation(text)
+                case "invalid":
+                    raise Exception(f"Expression \"{self._input}\" contains unexpected character \"{text}\".")
+        self._endTerm()
+
+
+def constructExpression(input: str, vars_index: dict[str, int]) -> tuple[dict[int, float], float]:
+    if len(input.strip()) <= 0:
         raise Exception("Expression is empty.")
 
-    # prefix every - with a +. This moves the minus into the term and lets us split by just +
-    input = input.replace('-', '+-')
+    builder = LinearExpressionBuilder(input, vars_index)
+    builder.feed()
 
-    terms = input.split('+')   
-    #print(terms) 
+    if builder.relation is not None:
+        raise Exception(f"Expression \"{input}\" must not contain a relation.")
 
-    return sum(constructTerm(term, vars_dict) for term in terms)
+    return builder.coefficients, builder.constant
@@ -0,0 +1,252 @@
+import multiprocessing
+import time
+import uuid
+from multiprocessing.connection import Connection, wait
+from threading import Condition, Thread
+
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMEOUT = "timeout"
+
+FINISHED = (DONE, FAILED, CANCELLED, TIMEOUT)
+
+# grace period for SCIP to stop at its own time limit before the worker process is killed
+KILL_GRACE = 2.0
+
+
+class QueueFullError(Exception):
+    pass
+
+
+def runWorker(connection: Connection):
+    # solving happens in a separate process, so a job can be stopped by terminating it
+    from src.problem import constructInputProblem, constructInputStart
+    from src.solver import Solver
+
+    while True:
+        try:
+            data, timeLimit = connection.recv()
+        except EOFError:
+            return
+
+        try:
+            solver = Solver.fromProblem(constructInputProblem(data))
+            start = constructInputStart(data)
+            if start is not None:
+                solver.setStart(start)
+            solver.setTimeLimit(timeLimit)
+            solution = solver.solve()
+            connection.send((DONE, {"solution": solution, "solverStatus": solver.status}))
+        except Exception as e:
+            connection.send((FAILED, str(e)))
+
+
+class Job:
+    id: str
+    status: str
+    submitted: float
+    started: float | None
+    finished: float | None
+    timeLimit: float
+    result: dict | None
+    error: str | None
+    data: dict | None
+
+    def __init__(self, data: dict, timeLimit: float):
+        self.id = uuid.uuid4().hex
+        self.status = QUEUED
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.timeLimit = timeLimit
+        self.result = None
+        self.error = None
+        self.data = data
+
+    def finish(self, status: str, result: dict | None = None, error: str | None = None):
+        self.status = status
+        self.finished = time.time()
+        self.result = result
+        self.error = error
+        # the input is not needed anymore and can be large
+        self.data = None
+
+    def describe(self) -> dict:
+        description = {
+            "id": self.id,
+            "status": self.status,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+            "timeLimit": self.timeLimit,
+        }
+        if self.result is not None:
+            description["result"] = self.result
+        if self.error is not None:
+            description["error"] = self.error
+        return description
+
+
+class Worker:
+    process: multiprocessing.Process
+    connection: Connection
+    job: Job | None
+
+    def __init__(self, context):
+        self.connection, childConnection = context.Pipe()
+        self.process = context.Process(target=runWorker, args=(childConnection,), daemon=True)
+        self.process.start()
+        childConnection.close()
+        self.job = None
+
+    def stop(self):
+        self.process.terminate()
+        self.process.join()
+        self.connection.close()
+
+
+class JobManager:
+    """
+    Solves submitted jobs in a bounded pool of worker processes.
+    Jobs wait in a bounded queue, are killed after their wall clock limit and
+    their results are kept for a while after they finished.
+    """
+    _workerCount: int
+    _maxQueued: int
+    _defaultTimeLimit: float
+    _resultTtl: float
+
+    _jobs: dict[str, Job]
+    _queue: list[Job]
+    _workers: list[Worker]
+    _context: multiprocessing.context.SpawnContext
+    _condition: Condition
+    _thread: Thread | None
+
+    def __init__(self, workers: int, maxQueued: int, timeLimit: float, resultTtl: float):
+        self._workerCount = workers
+        self._maxQueued = maxQueued
+        self._defaultTimeLimit = timeLimit
+        self._resultTtl = resultTtl
+
+        self._jobs = dict()
+        self._queue = []
+        self._workers = []
+        self._condition = Condition()
+        self._thread = None
+
+    def _ensureStarted(self):
+        if self._thread is not None:
+            return
+        # spawn instead of fork, forking a threaded server process is not safe
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = [Worker(self._context) for _ in range(self._workerCount)]
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, data: dict, timeLimit: float | None = None) -> Job:
+        with self._condition:
+            if len(self._queue) >= self._maxQueued:
+                raise QueueFullError(f"Job queue is full ({self._maxQueued} jobs waiting).")
+            self._ensureStarted()
+
+            limit = self._defaultTimeLimit if timeLimit is None else min(timeLimit, self._defaultTimeLimit)
+            job = Job(data, limit)
+            self._jobs[job.id] = job
+            self._queue.append(job)
+            self._condition.notify()
+            return job
+
+    def get(self, id: str) -> Job | None:
+        with self._condition:
+            return self._jobs.get(id)
+
+    def cancel(self, id: str) -> Job | None:
+        with self._condition:
+            job = self._jobs.get(id)
+            if job is None or job.status in FINISHED:
+                return job
+
+            if job.status == QUEUED:
+                self._queue.remove(job)
+            # a running job's worker is replaced by the dispatcher thread, which owns the connections
+            job.finish(CANCELLED)
+            return job
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "workers": self._workerCount,
+                "busy": sum(1 for worker in self._workers if worker.job is not None),
+                "queued": len(self._queue),
+                "jobs": len(self._jobs),
+            }
+
+    def _replaceWorker(self, worker: Worker):
+        worker.stop()
+        self._workers[self._workers.index(worker)] = Worker(self._context)
+
+    def _dispatch(self):
+        for worker in self._workers:
+            if len(self._queue) == 0:
+                return
+            if worker.job is None:
+                job = self._queue.pop(0)
+                job.status = RUNNING
+                job.started = time.time()
+                worker.job = job
+                try:
+                    worker.connection.send((job.data, job.timeLimit))
+                except OSError:
+                    job.finish(FAILED, error="Solver process terminated unexpectedly.")
+                    self._replaceWorker(worker)
+
+    def _collect(self, ready: list):
+        for worker in list(self._workers):
+            job = worker.job
+            if job is None:
+                continue
+
+            if job.status == CANCELLED:
+                self._replaceWorker(worker)
+            elif worker.connection in ready:
+                try:
+                    status, payload = worker.connection.recv()
+                except (EOFError, OSError):
+                    # worker crashed, e.g. ran out of memory
+                    job.finish(FAILED, error="Solver process terminated unexpectedly.")
+                    self._replaceWorker(worker)
+                    continue
+                if status == DONE:
+                    job.finish(DONE, result=payload)
+                else:
+                    job.finish(FAILED, error=payload)
+                worker.job = None
+            elif time.time() > job.started + job.timeLimit + KILL_GRACE:
+                job.finish(TIMEOUT, error=f"Job exceeded its time limit of {job.timeLimit} seconds.")
+                self._replaceWorker(worker)
+
+    def _purge(self):
+        expired = time.time() - self._resultTtl
+        for id in [id for id, job in self._jobs.items() if job.status in FINISHED and job.finished < expired]:
+            del self._jobs[id]
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._dispatch()
+                connections = [worker.connection for worker in self._workers if worker.job is not None]
+                if len(connections) == 0:
+                    self._purge()
+                    self._condition.wait(timeout=1.0)
+                    continue
+
+            ready = wait(connections, timeout=0.1)
+
+            with self._condition:
+                self._collect(ready)
+                self._purge()
@@ -0,0 +1,384 @@
+# Compiles JSPL laboratories into the logical optimizer input, the server side counterpart of the optimizer
+# generator (src/generators/optimizer). Only the parts relevant for optimization are kept:
+# {
+#     "concerns": ["name", ...],
+#     "tweakables": {"name": [value, ...], ...}    (givens are tweakables with a single value)
+#     "defaults": {"name": value, ...},
+#     "raiseConditions": {"concern": condition, ...}
+# }
+# Raise conditions are built like in raiseConditions.ts, so both compilers produce the same problem. The only
+# difference is that disjunctions and chains of the same operator with more than two conditions use the n-ary
+# form instead of a nested chain, the raise conditions of large labs would otherwise be nested too deep for most
+# JSON parsers.
+
+import hashlib
+import re
+
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<whitespace>\s+)
+    |(?P<comment>/\*[\s\S]*?\*/|//[^\n\r]*)
+    |(?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')
+    |(?P<word>[_a-zA-Z]\w*)
+    |(?P<symbol>[{}()])
+""", re.VERBOSE)
+
+BOOLEANS = ("True", "False", "true", "false")
+FORMATS = ("MD", "HTML")
+# reserved like in langium, none of them can be a name
+KEYWORDS = ("laboratory", "title", "description", "icon", "format", "author", "version", "issue", "summary", "condition", "holds",
+            "when", "tweakable", "expression", "default", "value", "raise", "disabled", "message", "or", "and", "not", "is")
+# groups and negations are parsed recursively, deeper nesting fails with a message instead of a RecursionError
+MAX_NESTING = 200
+ESCAPES = {"b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t", "v": "\v", "0": "\0"}
+
+
+def tokenize(input: str) -> list[tuple[str, str, int]]:
+    tokens = []
+    position = 0
+    line = 1
+    while position < len(input):
+        match = TOKEN_PATTERN.match(input, position)
+        if match is None:
+            raise Exception(f"Line {line}: unexpected character \"{input[position]}\".")
+        kind = match.lastgroup
+        if kind not in ("whitespace", "comment"):
+            tokens.append((kind, match.group(), line))
+        line += match.group().count("\n")
+        position = match.end()
+    tokens.append(("end", "", line))
+    return tokens
+
+
+def convertString(token: str) -> str:
+    # same escapes as the langium value converter
+    result = []
+    i = 1
+    while i < len(token) - 1:
+        if token[i] == "\\":
+            i += 1
+            result.append(ESCAPES.get(token[i], token[i]))
+        else:
+            result.append(token[i])
+        i += 1
+    return "".join(result)
+
+
+class LaboratoryParser:
+    """
+    Recursive descent parser for the JSPL grammar. Expressions are parsed directly into the logical
+    condition format, references are resolved once the whole laboratory is known.
+    """
+    concerns: list[str]
+    conditions: dict[str, dict]
+    propositions: dict[str, dict]
+
+    _tokens: list[tuple[str, str, int]]
+    _position: int
+    _nesting: int
+
+    def __init__(self, input: str):
+        self.concerns = []
+        self.conditions = dict()
+        self.propositions = dict()
+        self._tokens = tokenize(input)
+        self._position = 0
+        self._nesting = 0
+
+    def _peek(self) -> tuple[str, str, int]:
+        return self._tokens[self._position]
+
+    def _next(self) -> tuple[str, str, int]:
+        token = self._tokens[self._position]
+        self._position += 1
+        return token
+
+    def _fail(self, expected: str):
+        kind, text, line = self._peek()
+        found = "end of input" if kind == "end" else f"\"{text}\""
+        raise Exception(f"Line {line}: expected {expected}, but found {found}.")
+
+    def _accept(self, keyword: str) -> bool:
+        if self._peek()[1] == keyword and self._peek()[0] == "word":
+            self._position += 1
+            return True
+        return False
+
+    def _expect(self, keyword: str):
+        kind, text, _ = self._peek()
+        if text != keyword or kind not in ("word", "symbol"):
+            self._fail(f"\"{keyword}\"")
+        self._position += 1
+
+    def _expectSymbol(self, symbol: str):
+        kind, text, _ = self._peek()
+        if kind != "symbol" or text != symbol:
+            self._fail(f"\"{symbol}\"")
+        self._position += 1
+
+    def _identifier(self) -> str:
+        kind, text, _ = self._peek()
+        if kind != "word" or text in BOOLEANS or text in FORMATS or text in KEYWORDS:
+            self._fail("a name")
+        self._position += 1
+        return text
+
+    def _string(self) -> str:
+        kind, text, _ = self._peek()
+        if kind != "string":
+            self._fail("a string")
+        self._position += 1
+        return convertString(text)
+
+    def _value(self) -> bool | str:
+        kind, text, _ = self._peek()
+        if kind == "word" and text in BOOLEANS:
+            self._position += 1
+            return text.lower() == "true"
+        if kind == "string":
+            return self._string()
+        self._fail("a boolean or string value")
+
+    def _formattedString(self):
+        if self._peek()[1] in FORMATS:
+            self._next()
+        self._string()
+
+    def parse(self) -> "LaboratoryParser":
+        if self._accept("laboratory"):
+            self._laboratory()
+        while self._peek()[0] != "end":
+            if self._accept("issue"):
+                self._issue()
+            elif self._accept("condition"):
+                self._condition()
+            elif self._accept("tweakable"):
+                self._tweakable()
+            else:
+                self._fail("\"issue\", \"condition\" or \"tweakable\"")
+        return self
+
+    def _laboratory(self):
+        self._expectSymbol("{")
+        while not (self._peek()[0] == "symbol" and self._peek()[1] == "}"):
+            if self._accept("description"):
+                self._formattedString()
+            elif self._accept("format"):
+                if self._next()[1] not in FORMATS:
+                    self._position -= 1
+                    self._fail("MD or HTML")
+            elif self._accept("title") or self._accept("icon") or self._accept("author") or self._accept("version"):
+                self._string()
+            else:
+                self._fail("a laboratory field")
+        self._expectSymbol("}")
+
+    def _issue(self):
+        name = self._identifier()
+        if name in self.concerns:
+            raise Exception(f"Issue \"{name}\" is defined more than once.")
+        self._expectSymbol("{")
+        self._expect("summary")
+        self._string()
+        self._expect("description")
+        self._formattedString()
+        self._expectSymbol("}")
+        self.concerns.append(name)
+
+    def _condition(self):
+        name = self._identifier()
+        if name in self.conditions or name in self.propositions:
+            raise Exception(f"\"{name}\" is defined more than once.")
+        self._expect("holds")
+        self._expect("when")
+        self.conditions[name] = self._expression()
+
+    def _tweakable(self):
+        name = self._identifier()
+        if name in self.conditions or name in self.propositions:
+            raise Exception(f"\"{name}\" is defined more than once.")
+        self._expectSymbol("{")
+        self._expect("expression")
+        self._string()
+
+        values = []
+        default = None
+        while self._peek()[1] in ("default", "value"):
+            isDefault = self._accept("default")
+            self._expect("value")
+            value = self._value()
+            raises = []
+            if self._peek()[0:2] == ("symbol", "{"):
+                self._next()
+                while self._accept("raise"):
+                    concern = self._identifier()
+                    raises.append((concern, self._expression() if self._accept("when") else None))
+                self._expectSymbol("}")
+            values.append((value, raises))
+            if isDefault and default is None:
+                default = value
+        if len(values) == 0:
+            self._fail("\"value\"")
+
+        disable = []
+        if self._accept("disabled"):
+            self._expectSymbol("{")
+            while self._accept("message"):
+                self._string()
+                self._expect("when")
+                disable.append(self._expression())
+            self._expectSymbol("}")
+        self._expectSymbol("}")
+
+        self.propositions[name] = {"values": values, "default": default, "disable": disable}
+
+    def _expression(self) -> dict:
+        result = self._conjunction()
+        while self._accept("or"):
+            result = {"type": "or", "left": result, "right": self._conjunction()}
+        return result
+
+    def _conjunction(self) -> dict:
+        result = self._unary()
+        while self._accept("and"):
+            result = {"type": "and", "left": result, "right": self._unary()}
+        return result
+
+    def _unary(self) -> dict:
+        if self._accept("not"):
+            return {"type": "not", "inner": self._nestedExpression()}
+        if self._peek()[0:2] == ("symbol", "("):
+            self._next()
+            inner = self._nestedExpression()
+            self._expectSymbol(")")
+            return inner
+        _, _, line = self._peek()
+        reference = self._identifier()
+        self._expect("is")
+        negated = self._accept("not")
+        # unresolved until the whole laboratory is parsed, conditions may be defined after their use
+        return {"type": "reference", "reference": reference, "negated": negated, "value": self._value(), "line": line}
+
+    def _nestedExpression(self) -> dict:
+        if self._nesting == MAX_NESTING:
+            raise Exception(f"Line {self._peek()[2]}: expression is nested more than {MAX_NESTING} levels deep.")
+        self._nesting += 1
+        result = self._expression()
+        self._nesting -= 1
+        return result
+
+
+class LaboratoryCompiler:
+    parser: LaboratoryParser
+
+    _resolved: dict[str, dict]
+    _resolving: set[str]
+
+    def __init__(self, parser: LaboratoryParser):
+        self.parser = parser
+        self._resolved = dict()
+        self._resolving = set()
+
+    def _resolve(self, expression: dict) -> dict:
+        # post order with an explicit stack, long chains and conditions built on conditions go deeper than the recursion limit
+        results = []
+        stack = [("visit", expression)]
+        while len(stack) > 0:
+            step, item = stack.pop()
+            match step:
+                case "negate":
+                    results.append({"type": "not", "inner": results.pop()})
+                case "combine":
+                    type, count = item
+                    operands = results[-count:]
+                    del results[-count:]
+                    results.append({"type": type, "left": operands[0], "right": operands[1]} if count == 2 else {"type": type, "operands": operands})
+                case "define":
+                    # every reference shares the same resolved condition
+                    self._resolved[item] = results[-1]
+                    self._resolving.discard(item)
+                case "visit" if item["type"] == "not":
+                    stack.append(("negate", None))
+                    stack.append(("visit", item["inner"]))
+                case "visit" if item["type"] in ("and", "or"):
+                    # a chain of the same operator becomes one node
+                    operands = []
+                    pending = [item]
+                    while len(pending) > 0:
+                        node = pending.pop()
+                        if node["type"] == item["type"]:
+                            pending += [node["right"], node["left"]]
+                        else:
+                            operands.append(node)
+                    stack.append(("combine", (item["type"], len(operands))))
+                    stack += [("visit", operand) for operand in reversed(operands)]
+                case "visit":
+                    self._reference(item, results, stack)
+        return results[0]
+
+    def _reference(self, expression: dict, results: list[dict], stack: list[tuple]):
+        name = expression["reference"]
+        if name in self.parser.propositions:
+            statement = {"type": "statement", "proposition": name, "value": expression["value"]}
+            results.append({"type": "not", "inner": statement} if expression["negated"] else statement)
+            return
+        if name not in self.parser.conditions:
+            raise Exception(f"Line {expression['line']}: unknown tweakable or condition \"{name}\".")
+
+        # like the generator, a condition is inlined and the compared value is ignored
+        if expression["negated"]:
+            stack.append(("negate", None))
+        if name in self._resolved:
+            results.append(self._resolved[name])
+        elif name in self._resolving:
+            raise Exception(f"Condition \"{name}\" refers to itself.")
+        else:
+            self._resolving.add(name)
+            stack.append(("define", name))
+            stack.append(("visit", self.parser.conditions[name]))
+
+    def _disjunction(self, conditions: list[dict]) -> dict | None:
+        if len(conditions) == 0:
+            return None
+        if len(conditions) == 1:
+            return conditions[0]
+        if len(conditions) == 2:
+            return {"type": "or", "left": conditions[0], "right": conditions[1]}
+        return {"type": "or", "operands": conditions}
+
+    def compile(self) -> dict:
+        related = {concern: [] for concern in self.parser.concerns}
+        for name, proposition in self.parser.propositions.items():
+            disable = self._disjunction([self._resolve(condition) for condition in proposition["disable"]])
+            for value, raises in proposition["values"]:
+                for concern, condition in raises:
+                    if concern not in related:
+                        raise Exception(f"Tweakable \"{name}\" raises unknown issue \"{concern}\".")
+                    statement = {"type": "statement", "proposition": name, "value": value}
+                    base = statement if condition is None else {"type": "and", "left": statement, "right": self._resolve(condition)}
+                    if disable is not None:
+                        base = {"type": "and", "left": {"type": "not", "inner": disable}, "right": base}
+                    related[concern].append(base)
+
+        raiseConditions = dict()
+        for concern, conditions in related.items():
+            # concerns that are never raised are left out
+            if len(conditions) > 0:
+                raiseConditions[concern] = self._disjunction(conditions)
+
+        propositions = self.parser.propositions
+        return {
+            "concerns": list(self.parser.concerns),
+            "tweakables": {name: [value for value, _ in proposition["values"]] for name, proposition in propositions.items()},
+            "defaults": {name: proposition["default"] if proposition["default"] is not None else proposition["values"][0][0] for name, proposition in propositions.items()},
+            "raiseConditions": raiseConditions,
+        }
+
+
+def compileLaboratory(input: str) -> dict:
+    return LaboratoryCompiler(LaboratoryParser(input).parse()).compile()
+
+
+def laboratoryContentHash(input: str) -> str:
+    # clients can compute the same hash and send it instead of a source the server has seen before
+    return hashlib.sha256(input.encode("utf-8")).hexdigest()
@@ -0,0 +1,464 @@
+# Logical optimizer input, the server side counterpart of constructOptimizerInput in optimization.js:
+# {
+#     "tweakables": {"name": [value, ...], ...} or [{"name": "name", "output": [value, ...]}, ...],
+#     "raiseConditions": {"concern": condition, ...},
+#     "weights": {"concern": weight, ...},
+#     "definitions": {"id": condition, ...}    (optional)
+#     "encoding": "polarity" or "full"    (optional, defaults to "polarity")
+#     "fixed": {"name": value, ...}    (optional, tweakables whose value is already decided)
+#     "start": {"name": value, ...}    (optional, e.g. the defaults or the previous optimum, to warm start the solver)
+#     "method": "exact", "search" or "seeded"    (optional, defaults to "exact")
+#     "searchTime": seconds    (optional, time for the local search of the methods "search" and "seeded")
+#     "sensitivity": true or ["concern", ...]    (optional, adds to the result the range every (or every listed) concern's weight
+#                    can move in while the solution stays optimal, as "sensitivity": {"concern": [lower, upper], ...} with null if unbounded)
+#     "alternatives": count    (optional, adds to the result the next best assignments in order of their objective,
+#                     as "alternatives": [{"tweakables": ..., "concerns": ..., "objective": objective}, ...])
+#     "tolerance": objective    (optional, only alternatives at most this much worse than the optimum, all of them without "alternatives")
+# }
+# Givens are tweakables with a single value.
+# A condition is one of
+#     {"type": "statement", "proposition": "name", "value": value}
+#     {"type": "not", "inner": condition}
+#     {"type": "and" | "or", "left": condition, "right": condition} or {"type": "and" | "or", "operands": [condition, ...]}
+#     {"type": "ref", "id": "id"}    (refers to a shared condition in "definitions", which is only sent once)
+
+import json
+from src.problem import LinearProblem
+
+# a node (value variable or gate) and whether the literal is its negation
+Literal = tuple[int, bool]
+
+# constants are literals of a pseudo node
+CONSTANT = -1
+TRUE = (CONSTANT, False)
+FALSE = (CONSTANT, True)
+
+
+def valueKey(value) -> str:
+    # keeps the boolean true and the string "true" apart
+    return json.dumps(value)
+
+
+def constructTweakables(tweakables: dict | list) -> dict[str, list]:
+    if isinstance(tweakables, dict):
+        return {name: list(values) for name, values in tweakables.items()}
+    return {tweakable["name"]: list(tweakable["output"]) for tweakable in tweakables}
+
+
+FULL = "full"
+POLARITY = "polarity"
+
+# polarities of a gate, whether it has to be forced to true when its condition holds and/or to false when it does not
+UP = 1
+DOWN = 2
+
+
+def negate(literal: Literal) -> Literal:
+    return literal[0], not literal[1]
+
+
+def resolveLiteral(resolved: list[Literal], literal: Literal) -> Literal:
+    if literal[0] == CONSTANT:
+        return literal
+    node, negated = resolved[literal[0]]
+    return node, negated != literal[1]
+
+
+class LogicEncoding:
+    """
+    Linear encoding of tweakables and raise conditions.
+    Identical subconditions are hash-consed, so every distinct gate gets exactly one variable and one set of
+    constraints no matter how often it appears. Negations never get a variable of their own, they are folded
+    into the literals of their parent. Nested gates of the same type are flattened into one n-ary gate.
+
+    Nodes are numbered with the value variables first, followed by the gates in creation order, so the
+    operands of a gate always have smaller numbers than the gate itself. Variables are only created for
+    the nodes that are still open once the encoding is done.
+    """
+    problem: LinearProblem
+    tweakables: dict[str, list]
+    values: dict[str, dict[str, int]]
+    concerns: dict[str, Literal]
+    mode: str
+    presolveReport: dict
+
+    _valueCount: int
+    _fixed: dict[str, object]
+    _open: set[str]
+    _gates: dict[tuple, int]
+    _gateList: list[tuple[str, tuple[Literal, ...]]]
+    _columns: dict[int, int]
+    _definitions: dict
+    _definitionLiterals: dict[str, Literal]
+
+    def __init__(self, tweakables: dict[str, list], raiseConditions: dict, definitions: dict | None = None):
+        self.problem = LinearProblem([], dict(), [])
+        self.tweakables = tweakables
+        self.values = dict()
+        self.concerns = dict()
+        self.mode = FULL
+        self.presolveReport = dict()
+
+        self._fixed = dict()
+        self._open = set()
+        self._gates = dict()
+        self._gateList = []
+        self._columns = dict()
+        self._definitions = definitions or dict()
+        self._definitionLiterals = dict()
+
+        self._valueCount = 0
+        for name, values in tweakables.items():
+            if len(values) == 0:
+                raise Exception(f"Tweakable \"{name}\" has no values.")
+            nodes = dict()
+            for value in values:
+                nodes[valueKey(value)] = self._valueCount
+                self._valueCount += 1
+            self.values[name] = nodes
+
+        for concern, condition in raiseConditions.items():
+            self.concerns[concern] = self.literal(condition)
+
+    def _addVariable(self, prefix: str) -> int:
+        column = len(self.problem.variables)
+        self.problem.variables.append(f"{prefix}{column + 1}")
+        return column
+
+    def _statement(self, node: dict) -> Literal:
+        proposition = node["proposition"]
+        if proposition not in self.values:
+            raise Exception(f"Condition refers to unknown tweakable \"{proposition}\".")
+        key = valueKey(node["value"])
+        if key not in self.values[proposition]:
+            raise Exception(f"Condition refers to unknown value {key} of tweakable \"{proposition}\".")
+        return self.values[proposition][key], False
+
+    def _children(self, node: dict) -> list[dict]:
+        match node.get("type"):
+            case "not":
+                return [node["inner"]]
+            case "ref":
+                if node["id"] in self._definitionLiterals:
+                    return []
+                if node["id"] not in self._definitions:
+                    raise Exception(f"Condition refers to unknown definition \"{node['id']}\".")
+                return [self._definitions[node["id"]]]
+            case "and" | "or":
+                return self._operands(node)
+            case "statement":
+                return []
+        raise Exception(f"Unknown condition type \"{node.get('type')}\".")
+
+    def _operands(self, node: dict) -> list[dict]:
+        # nested gates of the same type form a single n-ary gate
+        operands = []
+        pending = [node]
+        while len(pending) > 0:
+            current = pending.pop()
+            if current.get("type") != node["type"]:
+                operands.append(current)
+            elif "operands" in current:
+                pending.extend(reversed(current["operands"]))
+            else:
+                pending.append(current["right"])
+                pending.append(current["left"])
+        return operands
+
+    def literal(self, condition: dict) -> Literal:
+        # iterative post order traversal, raise conditions of large labs are chains thousands of levels deep
+        literals = dict()
+        # definitions whose condition is being traversed, a reference to one of them is a cycle
+        resolving = set()
+        stack = [(condition, False)]
+        while len(stack) > 0:
+            node, expanded = stack.pop()
+            if id(node) in literals:
+                continue
+
+            children = self._children(node)
+            if not expanded and len(children) > 0:
+                if node["type"] == "ref":
+                    if node["id"] in resolving:
+                        raise Exception(f"Definition \"{node['id']}\" refers to itself.")
+                    resolving.add(node["id"])
+                stack.append((node, True))
+                stack.extend((child, False) for child in children if id(child) not in literals)
+                continue
+
+            match node["type"]:
+                case "statement":
+                    result = self._statement(node)
+                case "not":
+                    column, negated = literals[id(children[0])]
+                    result = (column, not negated)
+                case "ref":
+                    resolving.discard(node["id"])
+                    if node["id"] not in self._definitionLiterals:
+                        self._definitionLiterals[node["id"]] = literals[id(children[0])]
+                    result = self._definitionLiterals[node["id"]]
+                case _:
+                    result = self._gate(node["type"], [literals[id(child)] for child in children])
+            literals[id(node)] = result
+
+        return literals[id(condition)]
+
+    def _gate(self, type: str, operands: list[Literal]) -> Literal:
+        # false decides a conjunction, true a disjunction
+        absorbing = FALSE if type == "and" else TRUE
+        neutral = negate(absorbing)
+
+        operands = set(operands)
+        operands.discard(neutral)
+        if absorbing in operands or any((node, not negated) in operands for node, negated in operands):
+            return absorbing
+        if len(operands) == 0:
+            return neutral
+        if len(operands) == 1:
+            return next(iter(operands))
+
+        key = (type, tuple(sorted(operands)))
+        if key not in self._gates:
+            self._gates[key] = self._valueCount + len(self._gateList)
+            self._gateList.append(key)
+        return self._gates[key], False
+
+    def presolve(self, fixed: dict | None = None):
+        """
+        Fixes givens and the given tweakables, propagates the constants through the gates and
+        hash-conses the simplified gates again. Gates that became constant disappear, concerns that
+        can never (or always) be raised become constants.
+        """
+        fixed = dict(fixed or dict())
+        for name, values in self.tweakables.items():
+            if len(values) == 1:
+                fixed.setdefault(name, values[0])
+
+        resolved = [(node, False) for node in range(self._valueCount)]
+        for name, value in fixed.items():
+            if name not in self.values:
+                raise Exception(f"Unknown tweakable \"{name}\" can not be fixed.")
+            key = valueKey(value)
+            if key not in self.values[name]:
+                raise Exception(f"Tweakable \"{name}\" can not be fixed to unknown value {key}.")
+            for other, node in self.values[name].items():
+                resolved[node] = TRUE if other == key else FALSE
+            self._fixed[name] = value
+
+        gates = self._gateList
+        self._gates = dict()
+        self._gateList = []
+        for type, operands in gates:
+            resolved.append(self._gate(type, [resolveLiteral(resolved, literal) for literal in operands]))
+        self.concerns = {concern: resolveLiteral(resolved, literal) for concern, literal in self.concerns.items()}
+
+        self.presolveReport = {
+            "fixedTweakables": len(self._fixed),
+            "gates": len(gates),
+            "remainingGates": len(self._gateList),
+            "neverRaised": sorted(concern for concern, literal in self.concerns.items() if literal == FALSE),
+            "alwaysRaised": sorted(concern for concern, literal in self.concerns.items() if literal == TRUE),
+        }
+
+    def _polarities(self, weights: dict[str, float]) -> list[int]:
+        polarities = [0] * (self._valueCount + len(self._gateList))
+        for concern, (node, negated) in self.concerns.items():
+            weight = weights.get(concern, 0)
+            if node == CONSTANT:
+                continue
+            if self.mode == FULL:
+                polarities[node] = UP | DOWN
+            elif weight != 0:
+                # a minimized concern only has to be forced up when its condition holds, a maximized one down when it does not
+                polarities[node] |= UP if (weight > 0) != negated else DOWN
+
+        # gates come after their operands, so walking backwards visits every gate before its operands
+        for node in range(len(polarities) - 1, self._valueCount - 1, -1):
+            polarity = polarities[node]
+            if polarity == 0:
+                continue
+            for operand, negated in self._gateList[node - self._valueCount][1]:
+                polarities[operand] |= ({UP: DOWN, DOWN: UP, UP | DOWN: UP | DOWN}[polarity] if negated else polarity)
+        return polarities
+
+    def _encodeGate(self, type: str, z: int, operands: list[Literal], polarity: int):
+        constraints = self.problem.constraints
+        # a literal contributes x or 1 - x, the constant part moves to the right hand side
+        negations = sum(1 for _, negated in operands if negated)
+        total = dict()
+        for column, negated in operands:
+            total[column] = total.get(column, 0) + (-1 if negated else 1)
+
+        if type == "and":
+            if polarity & DOWN:
+                # z <= l for every operand
+                for column, negated in operands:
+                    constraints.append(({z: 1, column: 1}, "<=", 1) if negated else ({z: 1, column: -1}, "<=", 0))
+            if polarity & UP:
+                # z >= sum(l) - (n - 1)
+                total[z] = -1
+                constraints.append((total, "<=", len(operands) - 1 - negations))
+        else:
+            if polarity & UP:
+                # z >= l for every operand
+                for column, negated in operands:
+                    constraints.append(({column: -1, z: -1}, "<=", -1) if negated else ({column: 1, z: -1}, "<=", 0))
+            if polarity & DOWN:
+                # z <= sum(l)
+                total = {column: -value for column, value in total.items()}
+                total[z] = 1
+                constraints.append((total, "<=", negations))
+
+    def encode(self, weights: dict[str, float], mode: str = POLARITY):
+        """
+        Adds the gate constraints and the objective to the problem.
+        In polarity mode only the direction the objective pushes a gate against is constrained, gates that
+        no weighted concern depends on are left out completely. The weights therefore have to be known
+        before encoding, but only their signs influence the constraints.
+        """
+        if mode not in (FULL, POLARITY):
+            raise Exception(f"Unknown encoding \"{mode}\".")
+        self.mode = mode
+
+        polarities = self._polarities(weights)
+
+        # tweakables that no encoded gate or concern depends on can take any value, they are left to decode
+        for name, nodes in self.values.items():
+            if name in self._fixed or all(polarities[node] == 0 for node in nodes.values()):
+                continue
+            self._open.add(name)
+            for node in nodes.values():
+                self._columns[node] = self._addVariable("x")
+            self.problem.constraints.append(({self._columns[node]: 1 for node in nodes.values()}, "==", 1))
+
+        for node in range(self._valueCount, len(polarities)):
+            if polarities[node] != 0:
+                self._columns[node] = self._addVariable("z")
+
+        for node in range(self._valueCount, len(polarities)):
+            if polarities[node] != 0:
+                type, operands = self._gateList[node - self._valueCount]
+                self._encodeGate(type, self._columns[node], [(self._columns[operand], negated) for operand, negated in operands], polarities[node])
+
+        self.problem.objective, self.problem.offset = self.objective(weights)
+
+    def signature(self, weights: dict[str, float]) -> tuple:
+        # everything besides the structure that the encoded constraints depend on
+        if self.mode == FULL:
+            return (FULL,)
+        return (POLARITY, sorted((concern, weight > 0) for concern, weight in weights.items() if weight != 0 and concern in self.concerns))
+
+    def objective(self, weights: dict[str, float]) -> tuple[dict[int, float], float]:
+        coefficients = dict()
+        offset = 0
+        for concern, (node, negated) in self.concerns.items():
+            weight = weights.get(concern, 0)
+            if weight == 0 or (node, negated) == FALSE:
+                continue
+            if (node, negated) == TRUE:
+                offset += weight
+                continue
+            column = self._columns[node]
+            # a negated literal is raised when its variable is 0
+            if negated:
+                offset += weight
+                weight = -weight
+            coefficients[column] = coefficients.get(column, 0) + weight
+        return coefficients, offset
+
+    def concernVariable(self, concern: str) -> tuple[str, bool] | None:
+        # the variable of a concern and whether the concern is raised when it is 0, None if presolve decided the concern
+        node, negated = self.concerns[concern]
+        if node == CONSTANT:
+            return None
+        if node not in self._columns:
+            raise Exception(f"Concern \"{concern}\" is not part of the model.")
+        return self.problem.variables[self._columns[node]], negated
+
+    @property
+    def valueVariables(self) -> list[str]:
+        # the variables of the values of the tweakables in the model, the ones set to 1 identify an assignment
+        return [self.problem.variables[self._columns[node]] for name in self._open for node in self.values[name].values()]
+
+    @property
+    def valueCount(self) -> int:
+        return self._valueCount
+
+    @property
+    def fixed(self) -> dict[str, object]:
+        # tweakables whose value was decided in presolve
+        return self._fixed
+
+    @property
+    def gates(self) -> list[tuple[str, tuple[Literal, ...]]]:
+        # type and operands of every gate, in the order of their nodes
+        return self._gateList
+
+    def evaluate(self, values: list[bool]) -> list[bool]:
+        # truth of every node given the truth of the value nodes
+        truth = list(values) + [False] * len(self._gateList)
+        for index, (type, operands) in enumerate(self._gateList):
+            literals = (truth[operand] != negated for operand, negated in operands)
+            truth[self._valueCount + index] = all(literals) if type == "and" else any(literals)
+        return truth
+
+    def start(self, assignment: dict) -> dict[str, int]:
+        """
+        Translates a (partial) assignment of tweakables into start values of the model variables.
+        Gate variables can only be derived once every open tweakable is assigned.
+        """
+        for name, value in assignment.items():
+            if name not in self.values:
+                raise Exception(f"Start refers to unknown tweakable \"{name}\".")
+            if valueKey(value) not in self.values[name]:
+                raise Exception(f"Start assigns unknown value {valueKey(value)} to tweakable \"{name}\".")
+
+        variables = self.problem.variables
+        values = [False] * self._valueCount
+        result = dict()
+        complete = True
+        for name, options in self.tweakables.items():
+            if name not in self._open:
+                values[self.values[name][valueKey(self._fixed.get(name, options[0]))]] = True
+                continue
+            if name not in assignment:
+                complete = False
+                continue
+            selected = valueKey(assignment[name])
+            for key, node in self.values[name].items():
+                values[node] = key == selected
+                result[variables[self._columns[node]]] = int(key == selected)
+
+        if complete:
+            truth = self.evaluate(values)
+            for node in range(self._valueCount, len(truth)):
+                if node in self._columns:
+                    result[variables[self._columns[node]]] = int(truth[node])
+        return result
+
+    def decode(self, solution: dict[str, int]) -> dict:
+        variables = self.problem.variables
+
+        tweakables = dict()
+        for name, options in self.tweakables.items():
+            if name in self._open:
+                nodes = self.values[name]
+                tweakables[name] = next((value for value in options if solution[variables[self._columns[nodes[valueKey(value)]]]] == 1), None)
+            else:
+                tweakables[name] = self._fixed.get(name, options[0])
+
+        values = [False] * self._valueCount
+        for name, value in tweakables.items():
+            values[self.values[name][valueKey(value)]] = True
+
+        # gate variables are only bounded in one direction in polarity mode, so concerns are evaluated on the assignment
+        truth = self.evaluate(values)
+        concerns = {concern: (node == CONSTANT or truth[node]) != negated for concern, (node, negated) in self.concerns.items()}
+        return {"tweakables": tweakables, "concerns": concerns}
+
+
+def constructLogicEncoding(data: dict) -> LogicEncoding:
+    encoding = LogicEncoding(constructTweakables(data["tweakables"]), data["raiseConditions"], data.get("definitions"))
+    encoding.presolve(data.get("fixed"))
+    encoding.encode(data.get("weights", {}), data.get("encoding", POLARITY))
+    return encoding
@@ -0,0 +1,134 @@
+import bisect
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SIZE_BUCKETS = (10, 30, 100, 300, 1000, 3000, 10000, 30000, 100000, 300000, 1000000, 3000000, 10000000)
+
+
+def escapeLabel(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def formatLabels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f"{name}=\"{escapeLabel(value)}\"" for name, value in zip(names, values)]
+    if extra != "":
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if len(pairs) > 0 else ""
+
+
+def formatNumber(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    name: str
+    help: str
+    labelNames: tuple[str, ...]
+
+    _values: dict[tuple[str, ...], float]
+    _lock: Lock
+
+    def __init__(self, name: str, help: str, labelNames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelNames = labelNames
+        self._values = dict()
+        self._lock = Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{formatLabels(self.labelNames, labels)} {formatNumber(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    Prometheus histogram with fixed buckets, memory does not grow with the number of observations.
+    Quantiles like p50 and p99 are estimated from the buckets by the monitoring system.
+    """
+    name: str
+    help: str
+    labelNames: tuple[str, ...]
+    buckets: tuple[float, ...]
+
+    # per label combination the count of every bucket (not cumulative), the sum and the total count
+    _series: dict[tuple[str, ...], tuple[list[int], list[float]]]
+    _lock: Lock
+
+    def __init__(self, name: str, help: str, labelNames: tuple[str, ...] = (), buckets: tuple[float, ...] = DURATION_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelNames = labelNames
+        self.buckets = tuple(sorted(buckets))
+        self._series = dict()
+        self._lock = Lock()
+
+    def observe(self, value: float, *labels: str):
+        # the first bucket whose upper bound is at least the value, values above all bounds go to +Inf
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0])
+                self._series[labels] = series
+            series[0][index] += 1
+            series[1][0] += value
+
+    @contextmanager
+    def time(self, *labels: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, list(counts), total[0]) for labels, (counts, total) in self._series.items())
+
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f"le=\"{formatNumber(bound)}\""
+                lines.append(f"{self.name}_bucket{formatLabels(self.labelNames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{formatLabels(self.labelNames, labels)} {formatNumber(total)}")
+            lines.append(f"{self.name}_count{formatLabels(self.labelNames, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    _metrics: list[Counter | Histogram]
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, help: str, labelNames: tuple[str, ...] = ()) -> Counter:
+        counter = Counter(name, help, labelNames)
+        self._metrics.append(counter)
+        return counter
+
+    def histogram(self, name: str, help: str, labelNames: tuple[str, ...] = (), buckets: tuple[float, ...] = DURATION_BUCKETS) -> Histogram:
+        histogram = Histogram(name, help, labelNames, buckets)
+        self._metrics.append(histogram)
+        return histogram
+
+    def render(self) -> str:
+        # Prometheus text exposition format
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,133 @@
+import multiprocessing
+import time
+from multiprocessing.connection import Connection, wait
+from threading import Lock
+from src.problem import LinearProblem
+
+# differently configured solvers, the run time of SCIP on the same model varies a lot between them
+CONFIGURATIONS = {
+    "default": {},
+    "seed1": {"randomization/randomseedshift": 1, "randomization/permutationseed": 1, "randomization/permutevars": True},
+    "inference": {"branching/inference/priority": 100000},
+    "noCuts": {"separating/maxrounds": 0, "separating/maxroundsroot": 0},
+    "seed2": {"randomization/randomseedshift": 2, "randomization/permutationseed": 2, "randomization/permutevars": True},
+    "noPresolve": {"presolving/maxrounds": 0},
+    "seed3": {"randomization/randomseedshift": 3, "randomization/permutationseed": 3, "randomization/permutevars": True},
+    "inferenceNoCuts": {"branching/inference/priority": 100000, "separating/maxrounds": 0, "separating/maxroundsroot": 0},
+}
+
+
+def runMember(connection: Connection, parameters: dict):
+    # every member is its own process, so a member that lost the race can simply be killed
+    from src.solver import Solver
+
+    while True:
+        try:
+            problem, start, timeLimit = connection.recv()
+        except EOFError:
+            return
+
+        try:
+            solver = Solver.fromProblem(problem)
+            solver.setParameters(parameters)
+            if start is not None:
+                solver.setStart(start)
+            if timeLimit is not None:
+                solver.setTimeLimit(timeLimit)
+            solution = solver.solve()
+            connection.send((solver.status, solution, solver.objective))
+        except Exception as e:
+            connection.send((None, str(e), None))
+
+
+class PortfolioMember:
+    name: str
+    parameters: dict
+
+    _context: multiprocessing.context.BaseContext
+    _process: multiprocessing.Process | None
+    _connection: Connection | None
+
+    def __init__(self, name: str, parameters: dict, context: multiprocessing.context.BaseContext):
+        self.name = name
+        self.parameters = parameters
+        self._context = context
+        self._process = None
+        self._connection = None
+
+    @property
+    def connection(self) -> Connection:
+        if self._process is None:
+            self.start()
+        return self._connection
+
+    def start(self):
+        self._connection, child = self._context.Pipe()
+        self._process = self._context.Process(target=runMember, args=(child, self.parameters), daemon=True)
+        self._process.start()
+        child.close()
+
+    def restart(self):
+        # a replacement starts right away, it has imported SCIP by the time the next request arrives
+        self._process.kill()
+        self._process.join()
+        self._connection.close()
+        self.start()
+
+
+class Portfolio:
+    """
+    Races differently configured solvers in separate processes on the same model. The first proven
+    optimal solution wins and the other members are killed. Members keep running between requests.
+    """
+    members: list[PortfolioMember]
+
+    _lock: Lock
+
+    def __init__(self, size: int, configurations: dict[str, dict] = CONFIGURATIONS):
+        if size > len(configurations):
+            raise Exception(f"Portfolio of size {size} needs more than the {len(configurations)} known configurations.")
+        context = multiprocessing.get_context("spawn")
+        self.members = [PortfolioMember(name, parameters, context) for name, parameters in list(configurations.items())[:size]]
+        self._lock = Lock()
+
+    def solve(self, problem: LinearProblem, start: dict[str, int] | None = None, timeLimit: float | None = None) -> tuple[dict[str, int], dict]:
+        # one race at a time, every race already occupies a core per member
+        with self._lock:
+            started = time.perf_counter()
+            for member in self.members:
+                member.connection.send((problem, start, timeLimit))
+
+            running = {member.connection: member for member in self.members}
+            winner = None
+            best = None
+            errors = []
+            while len(running) > 0 and winner is None:
+                for connection in wait(list(running)):
+                    member = running.pop(connection)
+                    try:
+                        status, solution, objective = connection.recv()
+                    except EOFError:
+                        member.restart()
+                        errors.append(f"{member.name}: solver process died")
+                        continue
+
+                    if status is None:
+                        errors.append(f"{member.name}: {solution}")
+                    elif status == "optimal":
+                        winner = (member, status, solution)
+                        break
+                    elif best is None or objective < best[3]:
+                        # without a proven optimum, the best solution of all members that stopped at a limit is used
+                        best = (member, status, solution, objective)
+
+            for member in running.values():
+                member.restart()
+
+            if winner is None and best is not None:
+                winner = best[:3]
+            if winner is None:
+                raise Exception("No member of the portfolio found a solution. " + " ".join(errors))
+
+            member, status, solution = winner
+            return solution, {"winner": member.name, "solverStatus": status, "time": time.perf_counter() - started, "size": len(self.members)}
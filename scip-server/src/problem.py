@@ -0,0 +1,135 @@
+# Structured optimizer input, an alternative to the string format:
+# {
+#     "variables": ["x1", "x2", ...] or the number of variables,
+#     "objective": {"columns": [...], "coefficients": [...]},
+#     "constraints": {"rows": [...], "columns": [...], "coefficients": [...], "senses": ["==", "<=", ">=", ...], "rhs": [...]},
+#     "start": {"columns": [...], "values": [...]}    (optional)
+# }
+# Variables are referred to by their index. Constraint entries are sparse (row, column, coefficient) triplets,
+# every row has exactly one sense and right hand side.
+# Both formats may carry a (partial) start assignment, in the string format as {"variable": value, ...}.
+
+from src.constraints import constructConstraint
+from src.expressions import constructExpression
+
+
+SENSES = ("==", "<=", ">=")
+
+# coefficients by variable index, sense, right hand side
+LinearConstraint = tuple[dict[int, float], str, float]
+
+
+class LinearProblem:
+    variables: list[str]
+    objective: dict[int, float]
+    constraints: list[LinearConstraint]
+    offset: float
+
+    def __init__(self, variables: list[str], objective: dict[int, float], constraints: list[LinearConstraint], offset: float = 0):
+        self.variables = variables
+        self.objective = objective
+        self.constraints = constraints
+        self.offset = offset
+
+
+def isStructuredInput(data: dict) -> bool:
+    return isinstance(data.get("constraints"), dict)
+
+
+def constructVariableNames(variables: list[str] | int) -> list[str]:
+    # variables can be given just by their count, they are then named by their index
+    if isinstance(variables, int):
+        return [str(i) for i in range(variables)]
+    if len(set(variables)) != len(variables):
+        raise Exception("Variables contain duplicate names.")
+    return list(variables)
+
+
+def constructSparseObjective(objective: dict, variableCount: int) -> dict[int, float]:
+    columns = objective.get("columns", [])
+    coefficients = objective.get("coefficients", [])
+    if len(columns) != len(coefficients):
+        raise Exception("Objective has a different number of columns and coefficients.")
+
+    result = dict()
+    for column, coefficient in zip(columns, coefficients):
+        if not 0 <= column < variableCount:
+            raise Exception(f"Objective refers to unknown variable index {column}.")
+        result[column] = result.get(column, 0) + coefficient
+    return result
+
+
+def constructSparseConstraints(constraints: dict, variableCount: int) -> list[LinearConstraint]:
+    rows = constraints.get("rows", [])
+    columns = constraints.get("columns", [])
+    coefficients = constraints.get("coefficients", [])
+    senses = constraints.get("senses", [])
+    rhs = constraints.get("rhs", [])
+
+    if not len(rows) == len(columns) == len(coefficients):
+        raise Exception("Constraints have a different number of rows, columns and coefficients.")
+    if len(senses) != len(rhs):
+        raise Exception("Constraints have a different number of senses and right hand sides.")
+    for sense in senses:
+        if sense not in SENSES:
+            raise Exception(f"Unknown constraint sense \"{sense}\".")
+
+    result = [(dict(), senses[i], rhs[i]) for i in range(len(senses))]
+    for row, column, coefficient in zip(rows, columns, coefficients):
+        if not 0 <= row < len(result):
+            raise Exception(f"Constraint entry refers to unknown row {row}.")
+        if not 0 <= column < variableCount:
+            raise Exception(f"Constraint entry refers to unknown variable index {column}.")
+        entries = result[row][0]
+        entries[column] = entries.get(column, 0) + coefficient
+    return result
+
+
+def constructStructuredProblem(data: dict) -> LinearProblem:
+    variables = constructVariableNames(data["variables"])
+    objective = constructSparseObjective(data.get("objective", {}), len(variables))
+    constraints = constructSparseConstraints(data["constraints"], len(variables))
+    return LinearProblem(variables, objective, constraints)
+
+
+def constructInputProblem(data: dict) -> LinearProblem:
+    if isStructuredInput(data):
+        return constructStructuredProblem(data)
+    return constructProblem(data["variables"], data["constraints"], data["objective"])
+
+
+def constructInputObjective(data: dict, vars_index: dict[str, int]) -> tuple[dict[int, float], float]:
+    if isStructuredInput(data):
+        return constructSparseObjective(data.get("objective", {}), len(vars_index)), 0
+    return constructExpression(data["objective"], vars_index)
+
+
+def constructInputStart(data: dict) -> dict[str, int] | None:
+    start = data.get("start")
+    if start is None:
+        return None
+    if not isStructuredInput(data):
+        return dict(start)
+
+    variables = constructVariableNames(data["variables"])
+    columns = start.get("columns", [])
+    values = start.get("values", [])
+    if len(columns) != len(values):
+        raise Exception("Start has a different number of columns and values.")
+    for column in columns:
+        if not 0 <= column < len(variables):
+            raise Exception(f"Start refers to unknown variable index {column}.")
+    return {variables[column]: value for column, value in zip(columns, values)}
+
+
+def constructProblem(variables: list[str], constraints: list[str], objective: str) -> LinearProblem:
+    variables = constructVariableNames(variables)
+    vars_index = {variable: index for index, variable in enumerate(variables)}
+
+    objectiveCoefficients, offset = constructExpression(objective, vars_index)
+    return LinearProblem(
+        variables,
+        objectiveCoefficients,
+        [constructConstraint(cons, vars_index) for cons in constraints],
+        offset
+    )
@@ -0,0 +1,247 @@
+import math
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from src.logic import CONSTANT, LogicEncoding, valueKey
+
+# moves per restart, relative to the number of tweakables the search can change
+RESTART_MOVES = 50
+# temperatures relative to the largest and the smallest weight
+START_TEMPERATURE = 0.1
+END_TEMPERATURE = 0.01
+
+
+class LocalSearch:
+    """
+    Simulated annealing over the value choices of the tweakables of a presolved logic encoding.
+    Every conjunction keeps the number of its false operands and every disjunction the number of its
+    true operands, so a move only propagates through the gates whose truth actually changes and its
+    change of the objective is known without evaluating everything again.
+
+    A concern raised by many operands of a disjunction only changes the objective once the last of them
+    is gone, so the annealing also follows the number of operands that keep a concern in the wrong state.
+    """
+    objectiveOffset: float
+
+    _tweakables: list[tuple[str, list, list[int]]]
+    # value of every tweakable the search does not change
+    _unchanged: dict[str, object]
+    _valueCount: int
+    _types: list[bool]
+    _fanout: list[list[tuple[int, bool]]]
+    # change of the objective when a node becomes true
+    _weights: list[float]
+    # guidance per operand count of a gate, nonzero for the gates of concerns whose count has to reach zero
+    _guides: list[float]
+    _initial: list[bool]
+    _counts: list[int]
+    _scale: tuple[float, float]
+
+    def __init__(self, encoding: LogicEncoding, weights: dict[str, float]):
+        self._valueCount = encoding.valueCount
+        fixed = encoding.fixed
+        gates = encoding.gates
+        nodes = self._valueCount + len(gates)
+
+        self._types = [type == "and" for type, _ in gates]
+        self._fanout = [[] for _ in range(nodes)]
+        for index, (_, operands) in enumerate(gates):
+            for operand, negated in operands:
+                self._fanout[operand].append((self._valueCount + index, negated))
+
+        self.objectiveOffset = 0
+        self._weights = [0.0] * nodes
+        self._guides = [0.0] * len(gates)
+        for concern, (node, negated) in encoding.concerns.items():
+            weight = weights.get(concern, 0)
+            if node == CONSTANT:
+                self.objectiveOffset += weight if not negated else 0
+                continue
+            if negated:
+                # raised while the node is false
+                self.objectiveOffset += weight
+                self._weights[node] -= weight
+            else:
+                self._weights[node] += weight
+
+            # a disjunction that should be false or a conjunction that should be true, every counted operand is in the way
+            if node >= self._valueCount and weight != 0 and self._types[node - self._valueCount] == ((weight > 0) == negated):
+                self._guides[node - self._valueCount] += abs(weight) / len(gates[node - self._valueCount][1])
+
+        # the cone of influence of a node, tweakables outside of every weighted concern's cone are never moved
+        relevant = [weight != 0 for weight in self._weights]
+        for node in range(nodes - 1, self._valueCount - 1, -1):
+            if relevant[node]:
+                for operand, _ in gates[node - self._valueCount][1]:
+                    relevant[operand] = True
+
+        self._tweakables = []
+        self._unchanged = dict()
+        for name, options in encoding.tweakables.items():
+            rows = [encoding.values[name][valueKey(value)] for value in options]
+            if name not in fixed and len(options) > 1 and any(relevant[row] for row in rows):
+                self._tweakables.append((name, options, rows))
+            else:
+                self._unchanged[name] = fixed.get(name, options[0])
+
+        # truth of every node and the operand counts of every gate with all tweakables at their first value
+        values = [False] * self._valueCount
+        for name, options in encoding.tweakables.items():
+            values[encoding.values[name][valueKey(fixed.get(name, options[0]))]] = True
+        self._initial = encoding.evaluate(values)
+        self._counts = [sum(1 for operand, negated in operands if (self._initial[operand] != negated) != conjunction)
+                        for conjunction, (_, operands) in zip(self._types, gates)]
+
+        magnitudes = [abs(weight) for weight in weights.values() if weight != 0]
+        self._scale = (max(magnitudes, default=1), min(magnitudes, default=1))
+
+    @property
+    def size(self) -> int:
+        return len(self._tweakables)
+
+    def _objective(self, truth: list[bool]) -> float:
+        return self.objectiveOffset + sum(weight for weight, value in zip(self._weights, truth) if value)
+
+    def _set(self, truth: list[bool], counts: list[int], changes: list[tuple[int, bool]]) -> tuple[float, float]:
+        # applies changes of value nodes and returns the change of the objective and of the guidance
+        delta = 0.0
+        guidance = 0.0
+        valueCount = self._valueCount
+        pending = []
+        for node, value in changes:
+            truth[node] = value
+            delta += self._weights[node] if value else -self._weights[node]
+            pending.append((node, value))
+
+        while len(pending) > 0:
+            node, value = pending.pop()
+            for gate, negated in self._fanout[node]:
+                index = gate - valueCount
+                conjunction = self._types[index]
+                # the operand became true, so a conjunction has one false operand less and a disjunction one true more
+                change = (1 if conjunction else -1) * (-1 if value != negated else 1)
+                counts[index] += change
+                guidance += self._guides[index] * change
+                result = counts[index] == 0 if conjunction else counts[index] > 0
+                if result != truth[gate]:
+                    truth[gate] = result
+                    delta += self._weights[gate] if result else -self._weights[gate]
+                    pending.append((gate, result))
+        return delta, guidance
+
+    def _assign(self, truth: list[bool], counts: list[int], choices: list[int], target: list[int]):
+        changes = []
+        for index, (_, _, rows) in enumerate(self._tweakables):
+            if choices[index] != target[index]:
+                changes.append((rows[choices[index]], False))
+                changes.append((rows[target[index]], True))
+                choices[index] = target[index]
+        self._set(truth, counts, changes)
+
+    def run(self, seed: int, timeLimit: float, start: dict | None = None) -> tuple[dict, float, dict]:
+        """
+        Runs restarts until the time limit is reached. The first restart begins at the start assignment
+        (unassigned tweakables at their first value), every further one at a random assignment.
+        Returns the best assignment, its objective and a report.
+        """
+        generator = random.Random(seed)
+        deadline = time.perf_counter() + timeLimit
+        truth = list(self._initial)
+        counts = list(self._counts)
+        choices = [0] * len(self._tweakables)
+        objective = self._objective(truth)
+
+        target = [0] * len(self._tweakables)
+        for index, (name, options, _) in enumerate(self._tweakables):
+            if start is not None and name in start:
+                keys = [valueKey(value) for value in options]
+                target[index] = keys.index(valueKey(start[name])) if valueKey(start[name]) in keys else 0
+        best = (objective, list(choices))
+
+        restarts = 0
+        moves = 0
+        movesPerRestart = max(1, RESTART_MOVES * len(self._tweakables))
+        highest, lowest = self._scale
+        while time.perf_counter() < deadline and len(self._tweakables) > 0:
+            if restarts > 0:
+                target = [generator.randrange(len(options)) for _, options, _ in self._tweakables]
+            self._assign(truth, counts, choices, target)
+            objective = self._objective(truth)
+            if objective < best[0]:
+                best = (objective, list(choices))
+            restarts += 1
+
+            for move in range(movesPerRestart):
+                if move % 256 == 0 and time.perf_counter() >= deadline:
+                    break
+                # geometric cooling from the largest to a fraction of the smallest weight
+                temperature = START_TEMPERATURE * highest * (END_TEMPERATURE * lowest / highest) ** (move / movesPerRestart)
+
+                index = generator.randrange(len(self._tweakables))
+                _, options, rows = self._tweakables[index]
+                previous = choices[index]
+                choice = generator.randrange(len(options) - 1)
+                choice += choice >= previous
+
+                delta, guidance = self._set(truth, counts, [(rows[previous], False), (rows[choice], True)])
+                moves += 1
+                score = delta + guidance
+                if score <= 0 or generator.random() < math.exp(-score / temperature):
+                    choices[index] = choice
+                    objective += delta
+                    if objective < best[0] - 1e-9:
+                        best = (objective, list(choices))
+                else:
+                    self._set(truth, counts, [(rows[choice], False), (rows[previous], True)])
+
+        return self.assignment(best[1]), best[0], {"restarts": restarts, "moves": moves}
+
+    def assignment(self, choices: list[int]) -> dict:
+        assignment = dict(self._unchanged)
+        for (name, options, _), choice in zip(self._tweakables, choices):
+            assignment[name] = options[choice]
+        return assignment
+
+
+def runSearch(search: LocalSearch, seed: int, timeLimit: float, start: dict | None) -> tuple[dict, float, dict]:
+    return search.run(seed, timeLimit, start)
+
+
+class SearchPool:
+    """
+    Runs independent searches with different seeds in worker processes and keeps the best assignment.
+    """
+    _workers: int
+    _executor: ProcessPoolExecutor | None
+    _lock: Lock
+
+    def __init__(self, workers: int):
+        self._workers = workers
+        self._executor = None
+        self._lock = Lock()
+
+    def _ensureExecutor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self._workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def search(self, search: LocalSearch, timeLimit: float, start: dict | None = None) -> tuple[dict, float, dict]:
+        started = time.perf_counter()
+        if self._workers <= 1 or search.size == 0:
+            results = [search.run(0, timeLimit, start)]
+        else:
+            seeds = range(self._workers)
+            results = list(self._ensureExecutor().map(runSearch, [search] * self._workers, seeds, [timeLimit] * self._workers, [start] * self._workers))
+
+        assignment, objective, _ = min(results, key=lambda result: result[1])
+        report = {
+            "objective": objective,
+            "searches": len(results),
+            "restarts": sum(result[2]["restarts"] for result in results),
+            "moves": sum(result[2]["moves"] for result in results),
+            "time": time.perf_counter() - started,
+        }
+        return assignment, objective, report
@@ -0,0 +1,69 @@
+import time
+from src.decomposition import decomposeProblem
+from src.logic import FULL, LogicEncoding
+from src.solver import Solver
+
+# lower and upper end of the range of a weight, None where it is unbounded
+WeightRange = tuple[float | None, float | None]
+
+
+def sensitivityRanges(encoding: LogicEncoding, weights: dict[str, float], assignment: dict, raised: dict[str, bool], concerns: list[str], timeLimit: float) -> tuple[dict[str, WeightRange], dict]:
+    """
+    Computes for every given concern the range its weight can move in, all other weights unchanged,
+    while the optimal assignment that raises the concerns as given stays optimal.
+    Changing the weight of a concern only changes the objective of the assignments that raise it, so the
+    optimum stays optimal until the best assignment with the concern in the other state catches up. One
+    solve per concern with the concern forced into the other state finds that assignment, only the
+    component of the model that contains the concern has to be solved again.
+    The encoding has to be a full encoding of the weights, since both states of a concern are forced.
+    If the time runs out the dual bound of the forced solve is used, the range is then narrower than it
+    could be but still safe.
+    """
+    if encoding.mode != FULL:
+        raise Exception("Sensitivity ranges need a full encoding.")
+    started = time.perf_counter()
+    deadline = started + timeLimit
+
+    decomposition = decomposeProblem(encoding.problem)
+    componentOf = {variable: index for index, component in enumerate(decomposition.components) for variable in component.variables}
+    # objective of the optimum within every component, components are independent so each part is optimal on its own
+    values = encoding.start(assignment)
+    optima = [component.offset + sum(coefficient * values[component.variables[column]] for column, coefficient in component.objective.items())
+              for component in decomposition.components]
+    solvers = dict()
+
+    ranges = dict()
+    solves = 0
+    for index, concern in enumerate(concerns):
+        if concern not in encoding.concerns:
+            raise Exception(f"Unknown concern \"{concern}\".")
+        weight = weights.get(concern, 0)
+        variable = encoding.concernVariable(concern)
+        if variable is None:
+            # presolve decided the concern, no weight changes anything
+            ranges[concern] = (None, None)
+            continue
+
+        name, negated = variable
+        if name in decomposition.free:
+            # nothing depends on the concern, the other state costs exactly its weight
+            slack = abs(weight)
+        else:
+            component = componentOf[name]
+            if component not in solvers:
+                solvers[component] = Solver.fromProblem(decomposition.components[component])
+            solver = solvers[component]
+            # the remaining time is shared equally by the remaining concerns
+            solver.setTimeLimit(max(0.0, deadline - time.perf_counter()) / (len(concerns) - index))
+            solver.fixVariable(name, int(raised[concern] == negated))
+            bound = solver.solveBound()
+            solver.fixVariable(name, None)
+            solves += 1
+            # rounded to the feasibility tolerance of SCIP, integral weights give integral ranges
+            slack = max(0.0, round(bound - optima[component], 6))
+
+        if slack == float("inf"):
+            ranges[concern] = (None, None)
+        else:
+            ranges[concern] = (None, weight + slack) if raised[concern] else (weight - slack, None)
+    return ranges, {"solves": solves, "components": len(solvers), "time": time.perf_counter() - started}
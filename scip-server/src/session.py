@@ -0,0 +1,140 @@
+# Model session input, a change of the model the session keeps:
+# {
+#     "addVariables": ["x", ...],
+#     "removeVariables": ["x", ...],    (their constraints have to be removed as well)
+#     "addConstraints": {"id": {"coefficients": {"x": coefficient, ...}, "sense": "==" | "<=" | ">=", "rhs": rhs}, ...},
+#     "removeConstraints": ["id", ...],
+#     "objective": {"coefficients": {"x": coefficient, ...}, "offset": offset}    (optional, replaces the objective)
+# }
+# Removals are applied before additions, so a constraint is changed by removing it and adding it again under its id.
+# A new session starts with an empty model, its first change usually adds everything.
+
+import time
+import uuid
+from threading import Lock
+from pyscipopt import Constraint
+from src.problem import SENSES, LinearProblem
+from src.solver import Solver
+
+
+class ModelSession:
+    """
+    A model that is patched in place. Every change only touches the variables and constraints it names,
+    the solve after it starts from the previous solution.
+    """
+    id: str
+    lock: Lock
+    solution: dict[str, int] | None
+
+    _solver: Solver
+    _constraints: dict[str, tuple[dict[str, float], Constraint]]
+    # number of constraints every variable occurs in
+    _occurrences: dict[str, int]
+    _objective: dict[str, float]
+    _offset: float
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.lock = Lock()
+        self.solution = None
+        self._solver = Solver.fromProblem(LinearProblem([], dict(), []))
+        self._constraints = dict()
+        self._occurrences = dict()
+        self._objective = dict()
+        self._offset = 0
+
+    def apply(self, change: dict) -> dict:
+        # validates the whole change before the model is touched, a rejected change leaves the session as it was
+        removedConstraints = uniqueNames(change.get("removeConstraints", []), "constraint")
+        removedVariables = uniqueNames(change.get("removeVariables", []), "variable")
+        addedVariables = uniqueNames(change.get("addVariables", []), "variable")
+        addedConstraints = change.get("addConstraints", {})
+        if not isinstance(addedConstraints, dict):
+            raise Exception("Added constraints must be given by their id.")
+
+        occurrences = dict(self._occurrences)
+        for id in removedConstraints:
+            if id not in self._constraints:
+                raise Exception(f"Unknown constraint \"{id}\".")
+            for variable in self._constraints[id][0]:
+                occurrences[variable] -= 1
+        for variable in removedVariables:
+            if variable not in occurrences:
+                raise Exception(f"Unknown variable \"{variable}\".")
+            if occurrences.pop(variable) > 0:
+                raise Exception(f"Variable \"{variable}\" is still part of a constraint.")
+        for variable in addedVariables:
+            if variable in occurrences:
+                raise Exception(f"Variable \"{variable}\" already exists.")
+            occurrences[variable] = 0
+        for id, constraint in addedConstraints.items():
+            if id in self._constraints and id not in removedConstraints:
+                raise Exception(f"Constraint \"{id}\" already exists.")
+            if not isinstance(constraint, dict):
+                raise Exception(f"Constraint \"{id}\" must be an object.")
+            if constraint.get("sense") not in SENSES:
+                raise Exception(f"Constraint \"{id}\" has unknown sense \"{constraint.get('sense')}\".")
+            if not isNumber(constraint.get("rhs")):
+                raise Exception(f"Constraint \"{id}\" has no numeric right hand side.")
+            for variable in checkedCoefficients(constraint.get("coefficients"), f"Constraint \"{id}\""):
+                if variable not in occurrences:
+                    raise Exception(f"Constraint \"{id}\" refers to unknown variable \"{variable}\".")
+                occurrences[variable] += 1
+        if "objective" in change:
+            if not isinstance(change["objective"], dict) or not isNumber(change["objective"].get("offset", 0)):
+                raise Exception("Objective must be an object with a numeric offset.")
+            for variable in checkedCoefficients(change["objective"].get("coefficients", {}), "Objective"):
+                if variable not in occurrences:
+                    raise Exception(f"Objective refers to unknown variable \"{variable}\".")
+
+        started = time.perf_counter()
+        self._solver.removeConstraints([self._constraints.pop(id)[1] for id in removedConstraints])
+        self._solver.removeVariables(removedVariables)
+        self._solver.addVariables(addedVariables)
+        added = self._solver.addConstraints([(constraint["coefficients"], constraint["sense"], constraint["rhs"]) for constraint in addedConstraints.values()])
+        for (id, constraint), handle in zip(addedConstraints.items(), added):
+            self._constraints[id] = (constraint["coefficients"], handle)
+        self._occurrences = occurrences
+
+        # removed variables leave the objective together with the model
+        for variable in removedVariables:
+            self._objective.pop(variable, None)
+        if "objective" in change:
+            self._objective = dict(change["objective"].get("coefficients", {}))
+            self._offset = change["objective"].get("offset", 0)
+            self._solver.setNamedObjective(self._objective, self._offset)
+
+        return {
+            "variables": len(self._occurrences),
+            "constraints": len(self._constraints),
+            "changes": len(removedConstraints) + len(removedVariables) + len(addedVariables) + len(addedConstraints),
+            "patchTime": time.perf_counter() - started,
+        }
+
+    def solve(self) -> dict[str, int]:
+        # the previous solution is a start for the variables that still exist, the solver completes it
+        if self.solution is not None:
+            start = {variable: value for variable, value in self.solution.items() if variable in self._occurrences}
+            if len(start) > 0:
+                self._solver.setStart(start)
+        self.solution = self._solver.solve()
+        return self.solution
+
+
+def uniqueNames(names: list, kind: str) -> list[str]:
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        raise Exception(f"Names of {kind}s must be a list of strings.")
+    if len(set(names)) != len(names):
+        raise Exception(f"Names of {kind}s contain duplicates.")
+    return names
+
+
+def isNumber(value) -> bool:
+    # booleans are integers in Python, but not in the input
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def checkedCoefficients(coefficients, owner: str) -> dict[str, float]:
+    if not isinstance(coefficients, dict) or not all(isNumber(coefficient) for coefficient in coefficients.values()):
+        raise Exception(f"{owner} must have numeric coefficients by variable.")
+    return coefficients
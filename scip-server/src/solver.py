@@ -1,24 +1,277 @@
-from pyscipopt import Model, Variable
-from src.constraints import constructConstraint
-from src.expressions import constructExpression
+from pyscipopt import Model, Variable, Constraint, Expr, Eventhdlr, SCIP_EVENTTYPE
+from pyscipopt.scip import Term
+from src.problem import LinearProblem, constructProblem
+from typing import Callable
+
+# solution, objective value and relative gap, the gap is None as long as it is infinite
+IncumbentCallback = Callable[[dict[str, int], float, float | None], None]
+
+
+def relativeGap(primal: float, dual: float) -> float | None:
+    # same definition as SCIP uses for its gap limit
+    if primal == dual:
+        return 0.0
+    if primal * dual <= 0 or abs(primal) == float("inf") or abs(dual) == float("inf"):
+        return None
+    return abs(primal - dual) / min(abs(primal), abs(dual))
+
+
+class IncumbentHandler(Eventhdlr):
+    solver: "Solver"
+    callback: IncumbentCallback | None
+    interrupted: bool
+
+    def __init__(self, solver: "Solver"):
+        self.solver = solver
+        self.callback = None
+        self.interrupted = False
+
+    def eventinit(self):
+        self.model.catchEvent(SCIP_EVENTTYPE.BESTSOLFOUND, self)
+        self.model.catchEvent(SCIP_EVENTTYPE.NODESOLVED, self)
+
+    def eventexit(self):
+        self.model.dropEvent(SCIP_EVENTTYPE.BESTSOLFOUND, self)
+        self.model.dropEvent(SCIP_EVENTTYPE.NODESOLVED, self)
+
+    def eventexec(self, event):
+        # interrupting is only safe from within SCIP, so a request to stop is picked up at the next node
+        if self.interrupted:
+            self.model.interruptSolve()
+            return
+        if event.getType() == SCIP_EVENTTYPE.BESTSOLFOUND and self.callback is not None:
+            solution = self.model.getBestSol()
+            objective = self.model.getSolObjVal(solution)
+            self.callback(self.solver._values(solution), objective, relativeGap(objective, self.model.getDualbound()))
+
 
 class Solver:
     _model: Model
     _variables: dict[str, Variable]
+    _terms: list[Term]
+    _incumbentHandler: IncumbentHandler | None
+    # start of the next solve, and the solution of the last one that completes later partial starts
+    _start: dict[str, int] | None
+    _last: dict[str, int] | None
+    _partialStarted: bool
 
     def __init__(self, variables: list[str], constraints: list[str], objective: str):
+        self._build(constructProblem(variables, constraints, objective))
+
+    @classmethod
+    def fromProblem(cls, problem: LinearProblem) -> "Solver":
+        solver = cls.__new__(cls)
+        solver._build(problem)
+        return solver
+
+    def _build(self, problem: LinearProblem):
+        # builds the model directly from coefficient maps, every expression is created exactly once
+        self._createModel(problem.variables)
+        self._incumbentHandler = None
+        self._start = None
+        self._last = None
+        self._partialStarted = False
+
+        self._terms = [Term(variable) for variable in self._variables.values()]
+        terms = self._terms
+
+        self._setObjective(problem.objective, problem.offset)
+
+        conss = []
+        for coefficients, sense, rhs in problem.constraints:
+            expression = Expr({terms[column]: coefficient for column, coefficient in coefficients.items()})
+            match sense:
+                case "==":
+                    conss.append(expression == rhs)
+                case "<=":
+                    conss.append(expression <= rhs)
+                case ">=":
+                    conss.append(expression >= rhs)
+        self._model.addConss(conss)
+
+    def _setObjective(self, objective: dict[int, float], offset: float):
+        coefficients = {self._terms[column]: coefficient for column, coefficient in objective.items()}
+        if offset != 0:
+            coefficients[Term()] = offset
+        self._model.setObjective(Expr(coefficients))
+
+    def resetObjective(self, objective: dict[int, float], offset: float = 0):
+        # drops the solving data of the previous run, variables and constraints stay as they are
+        self._model.freeTransform()
+        self._setObjective(objective, offset)
+
+    # patching the model in place, variables are then referred to by name since columns shift
+
+    def addVariables(self, variables: list[str]):
+        self._model.freeTransform()
+        for variable in variables:
+            if variable in self._variables:
+                raise Exception(f"Variable \"{variable}\" already exists.")
+            self._variables[variable] = self._model.addVar(variable, vtype="B")
+
+    def removeVariables(self, variables: list[str]):
+        self._model.freeTransform()
+        for variable in variables:
+            if variable not in self._variables:
+                raise Exception(f"Unknown variable \"{variable}\".")
+            self._model.delVar(self._variables.pop(variable))
+
+    def addConstraints(self, constraints: list[tuple[dict[str, float], str, float]]) -> list[Constraint]:
+        self._model.freeTransform()
+        conss = []
+        for coefficients, sense, rhs in constraints:
+            for variable in coefficients:
+                if variable not in self._variables:
+                    raise Exception(f"Constraint refers to unknown variable \"{variable}\".")
+            expression = Expr({Term(self._variables[variable]): coefficient for variable, coefficient in coefficients.items()})
+            match sense:
+                case "==":
+                    conss.append(expression == rhs)
+                case "<=":
+                    conss.append(expression <= rhs)
+                case ">=":
+                    conss.append(expression >= rhs)
+                case _:
+                    raise Exception(f"Unknown sense \"{sense}\".")
+        return self._model.addConss(conss)
+
+    def removeConstraints(self, constraints: list[Constraint]):
+        self._model.freeTransform()
+        for constraint in constraints:
+            self._model.delCons(constraint)
+
+    def setNamedObjective(self, coefficients: dict[str, float], offset: float = 0):
+        self._model.freeTransform()
+        expression = {Term(self._variables[variable]): coefficient for variable, coefficient in coefficients.items()}
+        if offset != 0:
+            expression[Term()] = offset
+        self._model.setObjective(Expr(expression))
+
+    def setStart(self, values: dict[str, int]):
+        # the start is added right before the next solve and only used by it
+        for variable, value in values.items():
+            if variable not in self._variables:
+                raise Exception(f"Start refers to unknown variable \"{variable}\".")
+            if value not in (0, 1):
+                raise Exception(f"Start value of variable \"{variable}\" must be 0 or 1.")
+        self._start = dict(values)
+
+    def _addStart(self):
+        # SCIP keeps partial solutions until the model is freed and only takes a few of them, so a model
+        # gets at most one. Later partial starts are completed with the last solution, variables it does
+        # not know start at 0. Complete starts are checked when solving begins, an infeasible one is discarded.
+        start, self._start = self._start, None
+        if start is None or len(start) == 0:
+            return
+        self._model.freeTransform()
+        if len(start) < len(self._variables) and not self._partialStarted:
+            self._partialStarted = True
+            solution = self._model.createPartialSol()
+        else:
+            start = {variable: start.get(variable, (self._last or {}).get(variable, 0)) for variable in self._variables}
+            solution = self._model.createSol()
+        for variable, value in start.items():
+            self._model.setSolVal(solution, self._variables[variable], value)
+        self._model.addSol(solution, free=True)
+
+    def fixVariable(self, variable: str, value: int | None):
+        # fixes a variable to 0 or 1, or frees it again with None, drops the solving data of the previous run
+        if variable not in self._variables:
+            raise Exception(f"Unknown variable \"{variable}\".")
+        self._model.freeTransform()
+        self._model.chgVarLb(self._variables[variable], 0)
+        self._model.chgVarUb(self._variables[variable], 1)
+        if value is not None:
+            self._model.chgVarLb(self._variables[variable], value)
+            self._model.chgVarUb(self._variables[variable], value)
+
+    def exclude(self, variables: list[str]):
+        # cuts off every solution that sets all of the variables to 1, drops the solving data of the previous run
+        self._model.freeTransform()
+        self._model.addCons(Expr({Term(self._variables[variable]): 1 for variable in variables}) <= len(variables) - 1)
+
+    def setObjectiveLimit(self, limit: float):
+        # solutions with a larger objective are not accepted, the problem is infeasible if there are no others
+        # changes to the model reset the limit, so it is set right before solving
+        self._model.setObjlimit(limit)
+
+    def setTimeLimit(self, seconds: float):
+        self._model.setParam("limits/time", seconds)
+
+    def setParameters(self, parameters: dict):
+        self._model.setParams(parameters)
+
+    def setGapLimit(self, gap: float):
+        # stops as soon as the relative gap between the best solution and the dual bound is below the limit
+        self._model.setParam("limits/gap", gap)
+
+    def clearLimits(self):
+        self._model.resetParam("limits/time")
+        self._model.resetParam("limits/gap")
+
+    def watchIncumbents(self, callback: IncumbentCallback | None):
+        # the handler stays part of the model, cached models only swap the callback
+        if self._incumbentHandler is None:
+            self._incumbentHandler = IncumbentHandler(self)
+            self._model.includeEventhdlr(self._incumbentHandler, "incumbents", "reports improved solutions")
+        self._incumbentHandler.callback = callback
+
+    def interrupt(self):
+        # can be called from any thread, the running solve stops at its next node
+        if self._incumbentHandler is not None:
+            self._incumbentHandler.interrupted = True
+
+    @property
+    def status(self) -> str:
+        return self._model.getStatus()
+
+    @property
+    def variableIndex(self) -> dict[str, int]:
+        return {variable: index for index, variable in enumerate(self._variables)}
+
+    def _createModel(self, variables: list[str]):
         self._model = Model()
 
         self._variables = dict()
         for v in variables:
             self._variables[v] = self._model.addVar(v, vtype="B")
-    
-        self._model.setObjective(constructExpression(objective, self._variables))
 
-        for cons in constraints:
-            self._model.addCons(constructConstraint(cons, self._variables))
-    
+    @property
+    def objective(self) -> float:
+        return self._model.getObjVal()
+
+    @property
+    def gap(self) -> float | None:
+        return relativeGap(self._model.getPrimalbound(), self._model.getDualbound())
+
+    def solveBound(self) -> float:
+        # the dual bound holds even if the solve stops before it finds a solution, infeasible problems have an infinite one
+        if self._incumbentHandler is not None:
+            self._incumbentHandler.interrupted = False
+        self._addStart()
+        self._model.optimizeNogil()
+        if self.status == "infeasible":
+            return float("inf")
+        bound = self._model.getDualbound()
+        return float("inf") if self._model.isInfinity(bound) else bound
+
+    @property
+    def solution(self) -> dict[str, int] | None:
+        # best solution of the last solve, None if it found none
+        if self._model.getNSols() == 0:
+            return None
+        return self._values(self._model.getBestSol())
+
+    def _values(self, solution) -> dict[str, int]:
+        return {variable:round(solution[self._variables[variable]]) for variable in self._variables }
+
     def solve(self) -> dict[str, int]:
-        self._model.optimize()
-        solution = self._model.getBestSol()
-        return {variable:int(solution[self._variables[variable]]) for variable in self._variables }
\ No newline at end of file
+        if self._incumbentHandler is not None:
+            self._incumbentHandler.interrupted = False
+        self._addStart()
+        # releases the GIL, other requests keep being served while SCIP is running
+        self._model.optimizeNogil()
+        if self._model.getNSols() == 0:
+            raise Exception(f"No solution found, solver status is \"{self.status}\".")
+        self._last = self._values(self._model.getBestSol())
+        return self._last
@@ -0,0 +1,161 @@
+import io
+import json
+import os
+import sqlite3
+import time
+import zlib
+from threading import Lock
+import numpy as np
+from src.problem import SENSES, LinearProblem
+
+# least recently used entries looked at per eviction query
+EVICTION_BATCH = 64
+
+
+class PersistentStore:
+    """
+    SQLite backed store that survives restarts of the server. Entries are bytes by kind and key, the
+    least recently used ones are evicted once all entries together exceed the size cap. Entries put with
+    a time to live expire after it. Several server processes can share one store file.
+    """
+    path: str
+    maxBytes: int
+
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+
+    _connection: sqlite3.Connection | None
+    # the process that opened the connection, a forked worker has to open its own
+    _pid: int | None
+    _lock: Lock
+
+    def __init__(self, path: str, maxBytes: int):
+        self.path = path
+        self.maxBytes = maxBytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._connection = None
+        self._pid = None
+        self._lock = Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS entries (kind TEXT, key TEXT, value BLOB, size INTEGER, used REAL, expires REAL, PRIMARY KEY (kind, key))")
+            # stores created before entries could expire lack the column, their entries never expire
+            if "expires" not in [column[1] for column in connection.execute("PRAGMA table_info(entries)")]:
+                connection.execute("ALTER TABLE entries ADD COLUMN expires REAL")
+            connection.execute("CREATE INDEX IF NOT EXISTS entriesUsed ON entries (used)")
+            # the size of all entries is kept up to date by triggers, so writes do not have to sum the whole table
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("CREATE TABLE IF NOT EXISTS totals (name TEXT PRIMARY KEY, value INTEGER)")
+            connection.execute("CREATE TRIGGER IF NOT EXISTS entriesInserted AFTER INSERT ON entries BEGIN UPDATE totals SET value = value + NEW.size WHERE name = 'size'; END")
+            connection.execute("CREATE TRIGGER IF NOT EXISTS entriesDeleted AFTER DELETE ON entries BEGIN UPDATE totals SET value = value - OLD.size WHERE name = 'size'; END")
+            connection.execute("CREATE TRIGGER IF NOT EXISTS entriesResized AFTER UPDATE OF size ON entries BEGIN UPDATE totals SET value = value + NEW.size - OLD.size WHERE name = 'size'; END")
+            # stores created before the totals start from the sum of their entries
+            connection.execute("INSERT OR IGNORE INTO totals (name, value) SELECT 'size', COALESCE(SUM(size), 0) FROM entries")
+            connection.execute("COMMIT")
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, kind: str, key: str) -> bytes | None:
+        entry = self.entry(kind, key)
+        return entry[0] if entry is not None else None
+
+    def entry(self, kind: str, key: str) -> tuple[bytes, float | None] | None:
+        # the value and its remaining time to live in seconds, None if it never expires
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute("SELECT value, expires FROM entries WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+            now = time.time()
+            if row is not None and row[1] is not None and row[1] <= now:
+                connection.execute("DELETE FROM entries WHERE kind = ? AND key = ?", (kind, key))
+                self.expirations += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            connection.execute("UPDATE entries SET used = ? WHERE kind = ? AND key = ?", (now, kind, key))
+            self.hits += 1
+            return row[0], row[1] - now if row[1] is not None else None
+
+    def put(self, kind: str, key: str, value: bytes, ttl: float | None = None):
+        if len(value) > self.maxBytes:
+            return
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                # an upsert instead of INSERT OR REPLACE, whose implicit delete would not fire the size trigger
+                connection.execute("INSERT INTO entries (kind, key, value, size, used, expires) VALUES (?, ?, ?, ?, ?, ?) "
+                                   "ON CONFLICT (kind, key) DO UPDATE SET value = excluded.value, size = excluded.size, used = excluded.used, expires = excluded.expires",
+                                   (kind, key, value, len(value), now, now + ttl if ttl is not None else None))
+                total = connection.execute("SELECT value FROM totals WHERE name = 'size'").fetchone()[0]
+                while total > self.maxBytes:
+                    for oldKind, oldKey, size in connection.execute("SELECT kind, key, size FROM entries ORDER BY used LIMIT ?", (EVICTION_BATCH,)).fetchall():
+                        if total <= self.maxBytes:
+                            break
+                        connection.execute("DELETE FROM entries WHERE kind = ? AND key = ?", (oldKind, oldKey))
+                        total -= size
+                        self.evictions += 1
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            connection = self._connect()
+            entries = connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            size = connection.execute("SELECT value FROM totals WHERE name = 'size'").fetchone()[0]
+        return {"entries": entries, "bytes": size, "maxBytes": self.maxBytes, "hits": self.hits, "misses": self.misses, "evictions": self.evictions, "expirations": self.expirations}
+
+
+def packJson(value) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+
+def unpackJson(value: bytes):
+    return json.loads(zlib.decompress(value))
+
+
+def packProblem(problem: LinearProblem) -> bytes:
+    # coefficient arrays in triplet form, much smaller and faster to load than the parsed input
+    rows, columns, coefficients = [], [], []
+    for row, (entries, _, _) in enumerate(problem.constraints):
+        rows.extend([row] * len(entries))
+        columns.extend(entries.keys())
+        coefficients.extend(entries.values())
+
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer,
+        variables=np.array(problem.variables, dtype=str),
+        objectiveColumns=np.array(list(problem.objective.keys()), dtype=np.int64),
+        objectiveCoefficients=np.array(list(problem.objective.values()), dtype=np.float64),
+        offset=np.array(problem.offset, dtype=np.float64),
+        rows=np.array(rows, dtype=np.int64),
+        columns=np.array(columns, dtype=np.int64),
+        coefficients=np.array(coefficients, dtype=np.float64),
+        senses=np.array([SENSES.index(sense) for _, sense, _ in problem.constraints], dtype=np.int8),
+        rhs=np.array([rhs for _, _, rhs in problem.constraints], dtype=np.float64),
+    )
+    return buffer.getvalue()
+
+
+def unpackProblem(value: bytes) -> LinearProblem:
+    arrays = np.load(io.BytesIO(value))
+    senses = arrays["senses"].tolist()
+    constraints = [(dict(), SENSES[sense], rhs) for sense, rhs in zip(senses, arrays["rhs"].tolist())]
+    for row, column, coefficient in zip(arrays["rows"].tolist(), arrays["columns"].tolist(), arrays["coefficients"].tolist()):
+        constraints[row][0][column] = coefficient
+
+    objective = dict(zip(arrays["objectiveColumns"].tolist(), arrays["objectiveCoefficients"].tolist()))
+    return LinearProblem(arrays["variables"].tolist(), objective, constraints, float(arrays["offset"]))
@@ -0,0 +1,63 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from src.problem import LinearProblem
+from src.solver import Solver
+
+# objective coefficients by column and offset
+Objective = tuple[dict[int, float], float]
+
+
+def solveObjectives(problem: LinearProblem, objectives: list[Objective]) -> list[dict[str, int]]:
+    # the model is built once, every further objective only replaces the previous one and starts from its solution
+    solver = Solver.fromProblem(problem)
+    solutions = []
+    for coefficients, offset in objectives:
+        solver.resetObjective(coefficients, offset)
+        if len(solutions) > 0:
+            solver.setStart(solutions[-1])
+        solutions.append(solver.solve())
+    return solutions
+
+
+class SweepSolver:
+    """
+    Solves groups of objectives, every group against a problem structure of its own. Large groups are
+    split into contiguous batches so every worker process gets work, each batch builds its model once
+    and solves its objectives in order.
+    """
+    _workers: int
+    _executor: ProcessPoolExecutor | None
+    _lock: Lock
+
+    def __init__(self, workers: int):
+        self._workers = workers
+        self._executor = None
+        self._lock = Lock()
+
+    def _ensureExecutor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self._workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def solve(self, groups: list[tuple[LinearProblem, list[Objective]]]) -> list[list[dict[str, int]]]:
+        total = sum(len(objectives) for _, objectives in groups)
+        if self._workers <= 1 or total <= 1:
+            return [solveObjectives(problem, objectives) for problem, objectives in groups]
+
+        # neighbouring objectives of a sweep tend to have similar solutions, so batches are contiguous
+        problems, batches, owners = [], [], []
+        for index, (problem, objectives) in enumerate(groups):
+            count = min(len(objectives), max(1, round(self._workers * len(objectives) / total)))
+            size, remainder = divmod(len(objectives), count)
+            bounds = [part * size + min(part, remainder) for part in range(count + 1)]
+            for part in range(count):
+                problems.append(problem)
+                batches.append(objectives[bounds[part]:bounds[part + 1]])
+                owners.append(index)
+
+        solutions = [[] for _ in groups]
+        for owner, batch in zip(owners, self._ensureExecutor().map(solveObjectives, problems, batches)):
+            solutions[owner].extend(batch)
+        return solutions
@@ -0,0 +1,14 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import server
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # results must come from the solver, not from the store of an earlier run
+    monkeypatch.setattr(server, "store", None)
+    return server.app.test_client()
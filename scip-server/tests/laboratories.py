@@ -0,0 +1,86 @@
+# Random logic inputs and their brute force solutions, small enough to try every assignment.
+
+import copy
+import itertools
+import json
+import random
+
+
+def randomCondition(tweakables: dict, depth: int, rng: random.Random, pool: list) -> dict:
+    # shared subconditions come from the pool, so hash-consing has something to find
+    if len(pool) > 0 and rng.random() < 0.3:
+        return copy.deepcopy(rng.choice(pool))
+    if depth == 0 or rng.random() < 0.3:
+        name = rng.choice(list(tweakables))
+        return {"type": "statement", "proposition": name, "value": rng.choice(tweakables[name])}
+    type = rng.choice(["and", "or", "not", "nary"])
+    if type == "not":
+        condition = {"type": "not", "inner": randomCondition(tweakables, depth - 1, rng, pool)}
+    elif type == "nary":
+        operands = [randomCondition(tweakables, depth - 1, rng, pool) for _ in range(rng.randint(1, 4))]
+        condition = {"type": rng.choice(["and", "or"]), "operands": operands}
+    else:
+        condition = {"type": type, "left": randomCondition(tweakables, depth - 1, rng, pool), "right": randomCondition(tweakables, depth - 1, rng, pool)}
+    pool.append(condition)
+    return condition
+
+
+def randomLogic(seed: int, tweakableCount: int = 7, concernCount: int = 6, depth: int = 5) -> dict:
+    rng = random.Random(seed)
+    tweakables = dict()
+    for index in range(tweakableCount):
+        kind = rng.random()
+        # givens, booleans and enumerations
+        if kind < 0.2:
+            tweakables[f"t{index}"] = [True]
+        elif kind < 0.6:
+            tweakables[f"t{index}"] = [True, False]
+        else:
+            tweakables[f"t{index}"] = [f"v{value}" for value in range(rng.randint(2, 4))]
+    pool = []
+    raiseConditions = {f"c{index}": randomCondition(tweakables, depth, rng, pool) for index in range(concernCount)}
+    weights = {concern: rng.randint(-3, 10) for concern in raiseConditions}
+    fixed = {name: rng.choice(values) for name, values in tweakables.items() if len(values) > 1 and rng.random() < 0.2}
+    return {"tweakables": tweakables, "raiseConditions": raiseConditions, "weights": weights, "fixed": fixed}
+
+
+def holds(condition: dict, assignment: dict, definitions: dict | None = None) -> bool:
+    match condition["type"]:
+        case "statement":
+            return assignment[condition["proposition"]] == condition["value"]
+        case "not":
+            return not holds(condition["inner"], assignment, definitions)
+        case "ref":
+            return holds(definitions[condition["id"]], assignment, definitions)
+        case type:
+            operands = condition["operands"] if "operands" in condition else [condition["left"], condition["right"]]
+            results = (holds(operand, assignment, definitions) for operand in operands)
+            return all(results) if type == "and" else any(results)
+
+
+def raisedConcerns(data: dict, assignment: dict) -> dict[str, bool]:
+    return {concern: holds(condition, assignment, data.get("definitions")) for concern, condition in data["raiseConditions"].items()}
+
+
+def score(data: dict, assignment: dict, weights: dict | None = None) -> float:
+    weights = data["weights"] if weights is None else weights
+    return sum(weights.get(concern, 0) for concern, raised in raisedConcerns(data, assignment).items() if raised)
+
+
+def assignments(data: dict):
+    # every assignment that respects the fixed tweakables
+    fixed = data.get("fixed", {})
+    names = list(data["tweakables"])
+    options = [[fixed[name]] if name in fixed else data["tweakables"][name] for name in names]
+    for values in itertools.product(*options):
+        yield dict(zip(names, values))
+
+
+def optimum(data: dict, weights: dict | None = None) -> float:
+    return min(score(data, assignment, weights) for assignment in assignments(data))
+
+
+def post(client, path: str, data: dict) -> dict:
+    response = client.post(path, data=json.dumps(data), headers={"Content-Type": "application/json"}).json
+    assert response["status"] == "success", response
+    return json.loads(response["result"]) if isinstance(response.get("result"), str) else response
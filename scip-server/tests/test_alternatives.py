@@ -0,0 +1,35 @@
+import json
+import pytest
+from src.logic import FULL, POLARITY, constructLogicEncoding
+from laboratories import assignments, post, randomLogic, score
+
+SEEDS = range(30)
+
+
+def distinctObjectives(data: dict) -> list[float]:
+    # alternatives differ in a tweakable of the model, so every assignment of those counts once with its best completion
+    encoding = constructLogicEncoding(data)
+    names = sorted(encoding._open)
+    best = dict()
+    for assignment in assignments(data):
+        key = tuple(json.dumps(assignment[name]) for name in names)
+        best[key] = min(best.get(key, float("inf")), score(data, assignment))
+    return sorted(best.values())
+
+
+@pytest.mark.parametrize("options", [{"alternatives": 5}, {"tolerance": 2}, {"alternatives": 3, "tolerance": 1}])
+@pytest.mark.parametrize("encoding", [POLARITY, FULL])
+@pytest.mark.parametrize("seed", SEEDS)
+def testAlternatives(client, seed, encoding, options):
+    data = {**randomLogic(seed), "encoding": encoding, **options}
+    result = post(client, "/optimize/logic", data)
+
+    for alternative in result["alternatives"]:
+        assert alternative["objective"] == score(data, alternative["tweakables"])
+    found = [result["tweakables"]] + [alternative["tweakables"] for alternative in result["alternatives"]]
+    assert len({json.dumps(assignment, sort_keys=True) for assignment in found}) == len(found)
+
+    expected = distinctObjectives(data)
+    tolerance = options.get("tolerance")
+    expected = [objective for objective in expected if tolerance is None or objective <= expected[0] + tolerance][:options.get("alternatives", 100) + 1]
+    assert [score(data, assignment) for assignment in found] == expected
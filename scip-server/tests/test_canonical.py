@@ -0,0 +1,72 @@
+import random
+import pytest
+import server
+from src.canonical import CanonicalGroups, canonicalForm
+from src.decomposition import decomposeProblem
+from src.problem import LinearProblem
+from laboratories import optimum, post, score
+
+
+def block(offset: int) -> list:
+    # x + y >= 1 and y + z <= 1 over the variables of one copy
+    x, y, z = offset, offset + 1, offset + 2
+    return [({x: 1, y: 1}, ">=", 1), ({y: 1, z: 1}, "<=", 1)]
+
+
+def testCopiesShareForm():
+    first = LinearProblem(["a", "b", "c"], {0: 1, 1: 2}, block(0))
+    second = LinearProblem(["p", "q", "r"], {0: 1, 1: 2}, block(0))
+    other = LinearProblem(["a", "b", "c"], {0: 2, 1: 1}, block(0))
+    assert canonicalForm(first)[0] == canonicalForm(second)[0]
+    assert canonicalForm(first)[0] != canonicalForm(other)[0]
+
+    groups = CanonicalGroups([first, second, other])
+    assert len(groups.representatives) == 2
+    assert groups.expand({"a": 1, "b": 0, "c": 1}) == {"a": 1, "b": 0, "c": 1, "p": 1, "q": 0, "r": 1}
+
+
+def testDecomposedCopies():
+    variables = [f"x{index}" for index in range(9)]
+    constraints = block(0) + block(3) + block(6)
+    problem = LinearProblem(variables, {column: 1 + column % 3 for column in range(9)}, constraints)
+    decomposition = decomposeProblem(problem)
+    assert len(decomposition.components) == 3
+    assert len(CanonicalGroups(decomposition.components).representatives) == 1
+
+
+def copiedConcerns(copies: int) -> dict:
+    # identical blocks of concerns over their own tweakables
+    tweakables = dict()
+    raiseConditions = dict()
+    weights = dict()
+    for index in range(copies):
+        tweakables[f"a{index}"] = ["x", "y", "z"]
+        tweakables[f"b{index}"] = [True, False]
+        a = lambda value: {"type": "statement", "proposition": f"a{index}", "value": value}
+        b = {"type": "statement", "proposition": f"b{index}", "value": True}
+        raiseConditions[f"low{index}"] = {"type": "or", "left": a("x"), "right": {"type": "not", "inner": b}}
+        raiseConditions[f"high{index}"] = {"type": "and", "left": b, "right": {"type": "not", "inner": a("z")}}
+        weights[f"low{index}"] = 2
+        weights[f"high{index}"] = 3
+    return {"tweakables": tweakables, "raiseConditions": raiseConditions, "weights": weights}
+
+
+@pytest.mark.parametrize("copies", [2, 5])
+def testCopiedConcerns(client, copies):
+    # solved once and mapped onto every copy
+    data = copiedConcerns(copies)
+    result = post(client, "/optimize/logic", data)
+    assert score(data, result["tweakables"]) == optimum(data)
+
+
+def testCachedComponents(client):
+    # later weights only replace the objectives of the kept component models, copies that get different
+    # weights are no longer copies and get models of their own
+    data = copiedConcerns(4)
+    rng = random.Random(0)
+    hits = server.componentModels.stats()["hits"]
+    for request in range(8):
+        data["weights"] = {concern: rng.randint(1, 6) if request % 2 == 1 else 3 + request for concern in data["raiseConditions"]}
+        result = post(client, "/optimize/logic", data)
+        assert score(data, result["tweakables"]) == optimum(data)
+    assert server.componentModels.stats()["hits"] >= hits + 7
@@ -0,0 +1,34 @@
+import itertools
+import json
+from src.decomposition import decomposeProblem
+from src.problem import LinearProblem
+
+
+def chains(count: int) -> dict:
+    # x + y >= 1 and y + z >= 1 over the variables of every chain, the chains share nothing
+    rows, columns = [], []
+    for chain in range(count):
+        for row, offset in enumerate([0, 1]):
+            rows += [2 * chain + row] * 2
+            columns += [3 * chain + offset, 3 * chain + offset + 1]
+    return {"rows": rows, "columns": columns, "coefficients": [1] * len(rows), "senses": [">="] * (2 * count), "rhs": [1] * (2 * count)}
+
+
+def testComponents():
+    variables = ["a", "b", "c", "d", "e", "free", "unused"]
+    constraints = [({0: 1, 1: 1}, ">=", 1), ({1: 1, 2: 1}, "<=", 1), ({3: 1, 4: -1}, "==", 0)]
+    decomposition = decomposeProblem(LinearProblem(variables, {0: 1, 5: -2, 6: 3}, constraints))
+    assert sorted(component.variables for component in decomposition.components) == [["a", "b", "c"], ["d", "e"]]
+    assert decomposition.free == {"free": 1, "unused": 0}
+
+
+def testSolvedComponents(client):
+    coefficients = [3, 1, 2, 1, 4, 1, 2, 2, 2]
+    data = {"variables": 9, "objective": {"columns": list(range(9)), "coefficients": coefficients}, "constraints": chains(3)}
+    response = client.post("/optimize", json=data).json
+    assert response["status"] == "success" and response["decomposition"]["components"] == 3
+
+    result = json.loads(response["result"])
+    feasible = (values for values in itertools.product((0, 1), repeat=9) if all(values[3 * chain + offset] + values[3 * chain + offset + 1] >= 1 for chain in range(3) for offset in [0, 1]))
+    best = min(sum(coefficient * value for coefficient, value in zip(coefficients, values)) for values in feasible)
+    assert sum(coefficient * result[str(column)] for column, coefficient in enumerate(coefficients)) == best
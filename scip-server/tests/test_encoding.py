@@ -0,0 +1,80 @@
+import gzip
+import io
+import json
+import zlib
+import msgpack
+import pytest
+import zstandard
+from src.encoding import MAX_INPUT_BYTES, decodeBody
+from laboratories import optimum, post, randomLogic, score
+
+DATA = randomLogic(7)
+
+
+def compressed(encoding: str, body: bytes) -> bytes:
+    match encoding:
+        case "gzip":
+            return gzip.compress(body)
+        case "deflate":
+            return zlib.compress(body)
+        case "zstd":
+            return zstandard.ZstdCompressor().compress(body)
+    return body
+
+
+def bomb(encoding: str) -> bytes:
+    # a megabyte of zeros at a time, so the uncompressed body never exists in memory
+    chunk = bytes(1024 * 1024)
+    count = MAX_INPUT_BYTES // len(chunk) + 1
+    output = io.BytesIO()
+    if encoding == "gzip":
+        with gzip.GzipFile(fileobj=output, mode="wb") as file:
+            for _ in range(count):
+                file.write(chunk)
+    else:
+        with zstandard.ZstdCompressor().stream_writer(output, closefd=False) as writer:
+            for _ in range(count):
+                writer.write(chunk)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("encoding", ["identity", "gzip", "deflate", "zstd"])
+@pytest.mark.parametrize("contentType", ["application/json", "application/msgpack"])
+def testDecodeBody(encoding, contentType):
+    body = json.dumps(DATA).encode() if contentType == "application/json" else msgpack.packb(DATA)
+    assert decodeBody(compressed(encoding, body), encoding, contentType) == DATA
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "zstd"])
+@pytest.mark.parametrize("contentType", ["application/json", "application/x-msgpack; charset=binary"])
+def testEncodedRequests(client, encoding, contentType):
+    body = json.dumps(DATA).encode() if contentType == "application/json" else msgpack.packb(DATA)
+    response = client.post("/optimize/logic", data=compressed(encoding, body), headers={"Content-Encoding": encoding, "Content-Type": contentType})
+    result = json.loads(response.json["result"])
+    assert score(DATA, result["tweakables"]) == optimum(DATA)
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "zstd"])
+def testDecompressionLimit(client, encoding):
+    body = bomb(encoding)
+    assert len(body) < MAX_INPUT_BYTES // 100
+    with pytest.raises(Exception, match=f"exceeds {MAX_INPUT_BYTES} bytes"):
+        decodeBody(body, encoding, "application/json")
+
+    response = client.post("/optimize/logic", data=body, headers={"Content-Encoding": encoding, "Content-Type": "application/json"}).json
+    assert response["status"] == "error" and "exceeds" in response["message"]
+
+
+@pytest.mark.parametrize("encoding, contentType, message", [
+    ("br", "application/json", "Unsupported content encoding \"br\""),
+    ("identity", "application/xml", "Unsupported content type \"application/xml\""),
+])
+def testUnsupportedBodies(client, encoding, contentType, message):
+    response = client.post("/optimize/logic", data=b"{}", headers={"Content-Encoding": encoding, "Content-Type": contentType}).json
+    assert response["status"] == "error" and message in response["message"]
+
+
+def testQueryParameter(client):
+    # small inputs can still be sent without a body
+    result = json.loads(client.get("/optimize/logic", query_string={"input": json.dumps(DATA)}).json["result"])
+    assert score(DATA, result["tweakables"]) == optimum(DATA)
@@ -0,0 +1,58 @@
+import re
+import pytest
+from src.constraints import constructConstraint
+from src.expressions import constructExpression
+
+VARIABLES = {"x": 0, "y": 1, "z": 2}
+
+
+@pytest.mark.parametrize("input, coefficients, constant", [
+    ("x", {0: 1}, 0),
+    ("2*x - 3*y + z", {0: 2, 1: -3, 2: 1}, 0),
+    ("-x + -2*-y", {0: -1, 1: 2}, 0),
+    ("x + 1.5 - .5 + x", {0: 2}, 1),
+    ("2*3*x*4", {0: 24}, 0),
+    ("  x+y  ", {0: 1, 1: 1}, 0),
+])
+def testExpressions(input, coefficients, constant):
+    assert constructExpression(input, VARIABLES) == (coefficients, constant)
+
+
+def testConstraints():
+    assert constructConstraint("x + 2*y - 1 <= z + 3", VARIABLES) == ({0: 1, 1: 2, 2: -1}, "<=", 4)
+    assert constructConstraint("x == y", VARIABLES) == ({0: 1, 1: -1}, "==", 0)
+
+
+@pytest.mark.parametrize("input, message", [
+    ("x+", "ends with \"+\", an operand is missing after it"),
+    ("x+ ", "ends with \"+\", an operand is missing after it"),
+    ("x -", "ends with \"-\", an operand is missing after it"),
+    ("2*", "ends with \"*\", an operand is missing after it"),
+    ("x + -", "ends with \"-\", an operand is missing after it"),
+    ("x y", "missing an operator before \"y\""),
+    ("2 3", "missing an operator before \"3\""),
+    ("x + w", "unknown variable \"w\""),
+    ("x * y", "multiplies two variables"),
+    ("x / 2", "unexpected character \"/\""),
+    ("x ^ 2", "unexpected character \"^\""),
+    ("x ** 2", "\"*\" without left operand"),
+    ("* x", "\"*\" without left operand"),
+    ("x + 1 == 2", "must not contain a relation"),
+    ("   ", "Expression is empty"),
+])
+def testMalformedExpressions(input, message):
+    with pytest.raises(Exception, match=re.escape(message)):
+        constructExpression(input, VARIABLES)
+
+
+@pytest.mark.parametrize("input, message", [
+    ("x + <= 1", "has \"+\" without an operand before \"<=\""),
+    ("x >=", "ends with \">=\", an operand is missing after it"),
+    ("== 1", "contains an empty term"),
+    ("x <= y <= 1", "multiple relations"),
+    ("x = 1", "unexpected character \"=\""),
+    ("x + y", "contains no"),
+])
+def testMalformedConstraints(input, message):
+    with pytest.raises(Exception, match=re.escape(message)):
+        constructConstraint(input, VARIABLES)
@@ -0,0 +1,75 @@
+import time
+import pytest
+import server
+from src.jobs import JobManager
+from test_optimize import CONSTRAINTS, bruteForce
+
+COEFFICIENTS = [4, 1, 3, 2, 5]
+DATA = {"variables": 5, "objective": {"columns": list(range(5)), "coefficients": COEFFICIENTS}, "constraints": CONSTRAINTS}
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    manager = JobManager(1, 2, 30, 60)
+    monkeypatch.setattr(server, "jobs", manager)
+    return manager
+
+
+def submit(client, data: dict, **query) -> dict:
+    response = client.post("/jobs", json=data, query_string=query)
+    assert response.status_code == 202, response.json
+    return response.json["job"]
+
+
+def poll(client, id: str, statuses: tuple[str, ...]) -> dict:
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        job = client.get(f"/jobs/{id}").json["job"]
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {id} did not reach {statuses}, it is {job['status']}.")
+
+
+def testSubmitAndPoll(client, jobs):
+    job = submit(client, DATA, timeLimit=1000)
+    assert job["status"] == "queued" and job["timeLimit"] == 30
+
+    job = poll(client, job["id"], ("done", "failed"))
+    assert job["status"] == "done", job
+    solution = job["result"]["solution"]
+    assert sum(coefficient * solution[str(column)] for column, coefficient in enumerate(COEFFICIENTS)) == bruteForce(COEFFICIENTS)
+    assert client.get("/jobs").json == {"workers": 1, "busy": 0, "queued": 0, "jobs": 1}
+
+
+def testCancelRunning(client, jobs):
+    # the worker process is still starting, so the job is running for a while
+    job = submit(client, DATA)
+    poll(client, job["id"], ("running",))
+    response = client.delete(f"/jobs/{job['id']}")
+    assert response.status_code == 200 and response.json["job"]["status"] == "cancelled"
+    assert poll(client, job["id"], ("cancelled",))["finished"] is not None
+
+    # the worker of the cancelled job is replaced and solves the next one
+    job = submit(client, DATA)
+    assert poll(client, job["id"], ("done", "failed"))["status"] == "done"
+    # a finished job cannot be cancelled anymore
+    assert client.delete(f"/jobs/{job['id']}").json["job"]["status"] == "done"
+
+
+def testCancelQueued(client, monkeypatch):
+    # without workers every job stays in the queue
+    monkeypatch.setattr(server, "jobs", JobManager(0, 2, 30, 60))
+    first, second = submit(client, DATA), submit(client, DATA)
+    response = client.post("/jobs", json=DATA)
+    assert response.status_code == 503 and "queue is full" in response.json["message"]
+
+    assert client.delete(f"/jobs/{first['id']}").json["job"]["status"] == "cancelled"
+    assert client.get(f"/jobs/{second['id']}").json["job"]["status"] == "queued"
+    assert client.get("/jobs").json["queued"] == 1
+    submit(client, DATA)
+
+
+def testUnknownJob(client, jobs):
+    assert client.get("/jobs/unknown").status_code == 404
+    assert client.delete("/jobs/unknown").status_code == 404
@@ -0,0 +1,307 @@
+import glob
+import json
+import os
+import pytest
+from src.jspl import MAX_NESTING, LaboratoryParser, compileLaboratory, laboratoryContentHash
+from laboratories import optimum, score
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "examples", "in")
+LABORATORIES = sorted(glob.glob(os.path.join(EXAMPLES, "**", "*.jspl"), recursive=True))
+
+
+def read(name: str) -> str:
+    with open(os.path.join(EXAMPLES, name)) as file:
+        return file.read()
+
+
+def statement(proposition: str, value) -> dict:
+    return {"type": "statement", "proposition": proposition, "value": value}
+
+
+def both(left: dict, right: dict) -> dict:
+    return {"type": "and", "left": left, "right": right}
+
+
+def either(left: dict, right: dict) -> dict:
+    return {"type": "or", "left": left, "right": right}
+
+
+def negation(inner: dict) -> dict:
+    return {"type": "not", "inner": inner}
+
+
+def flattened(condition: dict) -> dict:
+    # chains of the same operator as one operand list, so nested chains and the n-ary form compare equal
+    match condition["type"]:
+        case "statement":
+            return condition
+        case "not":
+            return negation(flattened(condition["inner"]))
+    operands = []
+    for operand in condition["operands"] if "operands" in condition else [condition["left"], condition["right"]]:
+        operand = flattened(operand)
+        operands += operand["operands"] if operand["type"] == condition["type"] else [operand]
+    return {"type": condition["type"], "operands": operands}
+
+
+def generatorDisjunction(conditions: list[dict]) -> dict:
+    # generateDisjunction in raiseConditions.ts, a right nested chain built from the end
+    result = conditions.pop()
+    while len(conditions) > 0:
+        result = either(conditions.pop(), result)
+    return result
+
+
+def logical(expression: dict, conditions: dict) -> dict:
+    # propositionalToLogical in logic.ts, conditions are inlined and their compared value is ignored
+    match expression["type"]:
+        case "and" | "or":
+            return {"type": expression["type"], "left": logical(expression["left"], conditions), "right": logical(expression["right"], conditions)}
+        case "not":
+            return negation(logical(expression["inner"], conditions))
+    name = expression["reference"]
+    base = logical(conditions[name], conditions) if name in conditions else statement(name, expression["value"])
+    return negation(base) if expression["negated"] else base
+
+
+def generatorOutput(source: str) -> dict:
+    # what the optimizer generator writes to data.js: givens, tweakables with their default and raiseConditions
+    parser = LaboratoryParser(source).parse()
+    propositions = parser.propositions
+    raiseConditions = dict()
+    for concern in parser.concerns:
+        related = []
+        for name, proposition in propositions.items():
+            for value, raises in proposition["values"]:
+                for raised, condition in raises:
+                    if raised != concern:
+                        continue
+                    base = statement(name, value) if condition is None else both(statement(name, value), logical(condition, parser.conditions))
+                    if len(proposition["disable"]) > 0:
+                        disable = generatorDisjunction([logical(expression, parser.conditions) for expression in proposition["disable"]])
+                        base = both(negation(disable), base)
+                    related.append(base)
+        if len(related) > 0:
+            raiseConditions[concern] = flattened(generatorDisjunction(related))
+    return {
+        "givens": {name: proposition["values"][0][0] for name, proposition in propositions.items() if len(proposition["values"]) == 1},
+        "tweakables": {name: ([value for value, _ in proposition["values"]], proposition["default"]) for name, proposition in propositions.items() if len(proposition["values"]) > 1},
+        "raiseConditions": raiseConditions,
+    }
+
+
+def compiledOutput(source: str) -> dict:
+    # the compiler output in the terms of the generator
+    laboratory = compileLaboratory(source)
+    tweakables = laboratory["tweakables"]
+    return {
+        "givens": {name: values[0] for name, values in tweakables.items() if len(values) == 1},
+        "tweakables": {name: (values, laboratory["defaults"][name]) for name, values in tweakables.items() if len(values) > 1},
+        "raiseConditions": {concern: flattened(condition) for concern, condition in laboratory["raiseConditions"].items()},
+    }
+
+
+def unequal(first: str, second: str) -> dict:
+    return either(both(statement(first, True), statement(second, False)), both(statement(first, False), statement(second, True)))
+
+
+# data.js of the generator for the small examples, written out by hand
+GENERATED = {
+    "very_simple.jspl": {
+        "givens": {},
+        "tweakables": {"first": ([True, False], True), "second": ([True, False], False)},
+        "raiseConditions": {"concerning": either(both(statement("first", True), statement("second", False)), either(
+            both(statement("first", False), statement("second", True)), either(
+                both(statement("second", True), statement("first", False)), both(statement("second", False), statement("first", True)))))},
+    },
+    "test.jspl": {
+        "givens": {},
+        "tweakables": {"first": ([True, False], True), "second": ([True, False], False)},
+        "raiseConditions": {
+            "concerning": either(both(statement("first", True), statement("second", False)), either(
+                both(statement("first", False), statement("second", True)), either(
+                    both(statement("second", True), unequal("first", "second")), both(statement("second", False), unequal("first", "second"))))),
+            "concerning2": statement("first", False),
+        },
+    },
+    "running_example.jspl": {
+        "givens": {},
+        "tweakables": {"tupleNaNAreTripleEqual": ([True, False], True), "tupleWithNanObjectIsTupleWithNan": ([True, False], True)},
+        "raiseConditions": {
+            "unequalTupleNan": statement("tupleNaNAreTripleEqual", False),
+            "nanNotIsNan": both(statement("tupleWithNanObjectIsTupleWithNan", False), statement("tupleNaNAreTripleEqual", True)),
+        },
+    },
+}
+
+
+@pytest.mark.parametrize("name", sorted(GENERATED))
+def testGeneratedExamples(name):
+    expected = GENERATED[name]
+    assert compiledOutput(read(name)) == {**expected, "raiseConditions": {concern: flattened(condition) for concern, condition in expected["raiseConditions"].items()}}
+
+
+@pytest.mark.parametrize("path", LABORATORIES, ids=lambda path: os.path.relpath(path, EXAMPLES))
+def testExamples(path):
+    with open(path) as file:
+        source = file.read()
+    assert compiledOutput(source) == generatorOutput(source)
+
+
+def testDisabled():
+    source = """
+        issue broken { summary "" description "" }
+        tweakable box { expression "Box" value true default value false }
+        tweakable boxed {
+            expression "Box(1)"
+            default value true
+            value false { raise broken when box is false }
+            disabled {
+                message "no Box" when box is false
+                message "never" when box is true and box is false
+                message "again" when not box is true
+            }
+        }
+    """
+    assert compiledOutput(source) == generatorOutput(source)
+    disable = generatorDisjunction([statement("box", False), both(statement("box", True), statement("box", False)), negation(statement("box", True))])
+    expected = both(negation(disable), both(statement("boxed", False), statement("box", False)))
+    assert compiledOutput(source)["raiseConditions"]["broken"] == flattened(expected)
+
+
+@pytest.mark.parametrize("literal, value", [
+    (r'"plain"', "plain"),
+    (r'"say \"hi\""', 'say "hi"'),
+    (r"'it\'s'", "it's"),
+    (r'"a\\b"', "a\\b"),
+    (r'"tab\tnew\nline\r\0"', "tab\tnew\nline\r\0"),
+    (r'"\b\f\v"', "\b\f\v"),
+    (r'"\q\'"', "q'"),
+    ("'multi\nline'", "multi\nline"),
+])
+def testStringEscapes(literal, value):
+    source = f'issue i {{ summary "" description "" }} tweakable t {{ expression "" default value {literal} {{ raise i }} value "other" }}'
+    laboratory = compileLaboratory(source)
+    assert laboratory["tweakables"]["t"] == [value, "other"]
+    assert laboratory["raiseConditions"]["i"] == statement("t", value)
+
+
+@pytest.mark.parametrize("source", [
+    'issue or { summary "" description "" }',
+    'tweakable value { expression "" default value true }',
+    'tweakable is { expression "" default value true }',
+    'condition holds holds when t is true',
+    'condition not holds when t is true',
+    'tweakable t { expression "" default value true { raise issue } }',
+    'tweakable t { expression "" default value true } condition c holds when tweakable is true',
+    'tweakable True { expression "" default value true }',
+    'tweakable MD { expression "" default value true }',
+])
+def testKeywordsAsNames(source):
+    with pytest.raises(Exception, match="expected a name"):
+        compileLaboratory(source)
+
+
+def testNamesContainingKeywords():
+    source = """
+        issue order { summary "" description "" }
+        tweakable isolated { expression "" default value true value false { raise order when notice is true } }
+        tweakable notice { expression "" default value true value false }
+    """
+    assert compileLaboratory(source)["raiseConditions"]["order"] == both(statement("isolated", False), statement("notice", True))
+
+
+def testLongChains():
+    # chains far longer than the recursion limit, of operators and of conditions built on conditions
+    count = 3000
+    tweakables = "".join(f'tweakable t{index} {{ expression "" default value true value false }}\n' for index in range(count))
+    chain = " or ".join(f"t{index} is false" for index in range(count))
+    conditions = "condition k0 holds when t0 is true\n" + "".join(f"condition k{index} holds when k{index - 1} is true and t{index} is true\n" for index in range(1, count))
+    source = f"""
+        issue any {{ summary "" description "" }}
+        issue all {{ summary "" description "" }}
+        {tweakables}
+        {conditions}
+        tweakable start {{
+            expression ""
+            default value true {{ raise any when {chain} }}
+            value false {{ raise all when k{count - 1} is true }}
+        }}
+    """
+    raiseConditions = compileLaboratory(source)["raiseConditions"]
+
+    assert raiseConditions["any"]["right"] == {"type": "or", "operands": [statement(f"t{index}", False) for index in range(count)]}
+    condition = raiseConditions["all"]["right"]
+    for index in reversed(range(1, count)):
+        assert condition["type"] == "and" and condition["right"] == statement(f"t{index}", True)
+        condition = condition["left"]
+    assert condition == statement("t0", True)
+
+
+def testNesting():
+    def source(depth: int) -> str:
+        condition = "(" * depth + "b is true" + ")" * depth
+        negations = "not " * depth + "b is true"
+        return f"""
+            issue i {{ summary "" description "" }}
+            tweakable b {{ expression "" default value true value false }}
+            tweakable a {{ expression "" default value true {{ raise i when {condition} and {negations} }} value false }}
+        """
+
+    condition = compileLaboratory(source(MAX_NESTING))["raiseConditions"]["i"]["right"]
+    assert condition["left"] == statement("b", True)
+    inner = condition["right"]
+    for _ in range(MAX_NESTING):
+        inner = inner["inner"]
+    assert inner == statement("b", True)
+
+    with pytest.raises(Exception, match=f"nested more than {MAX_NESTING} levels"):
+        compileLaboratory(source(MAX_NESTING + 1))
+
+
+@pytest.mark.parametrize("source, message", [
+    ('tweakable t { expression "" default value true { raise missing } }', "unknown issue \"missing\""),
+    ('issue i { summary "" description "" } tweakable t { expression "" default value true { raise i when u is true } }', "unknown tweakable or condition \"u\""),
+    ('condition c holds when d is true condition d holds when not c is true tweakable t { expression "" default value true { raise i when c is true } } issue i { summary "" description "" }', "refers to itself"),
+    ('tweakable t { expression "" }', "expected \"value\""),
+    ('tweakable t { expression "" default value 1 }', "unexpected character \"1\""),
+    ('tweakable t { expression "" default value true } tweakable t { expression "" default value true }', "defined more than once"),
+])
+def testInvalidLaboratories(source, message):
+    with pytest.raises(Exception, match=message):
+        compileLaboratory(source)
+
+
+@pytest.mark.parametrize("name", sorted(GENERATED) + ["records_and_tuples.jspl"])
+def testEndpoint(client, name):
+    source = read(name)
+    laboratory = compileLaboratory(source)
+    data = {"tweakables": laboratory["tweakables"], "raiseConditions": laboratory["raiseConditions"]}
+
+    response = client.post("/optimize/jspl", json={"laboratory": source}).json
+    assert response["status"] == "success", response
+    assert response["laboratoryHash"] == laboratoryContentHash(source)
+    # without weights every concern weighs 1
+    result = json.loads(response["result"])
+    weights = {concern: 1 for concern in laboratory["concerns"]}
+    assert score({**data, "weights": weights}, result["tweakables"]) == optimum({**data, "weights": weights})
+
+    # later requests only send the hash
+    weights = {concern: (-1) ** index * (index + 1) for index, concern in enumerate(laboratory["concerns"])}
+    response = client.post("/optimize/jspl", json={"laboratoryHash": response["laboratoryHash"], "weights": weights}).json
+    assert response["status"] == "success", response
+    result = json.loads(response["result"])
+    assert score({**data, "weights": weights}, result["tweakables"]) == optimum({**data, "weights": weights})
+
+
+def testUnknownHash(client):
+    response = client.post("/optimize/jspl", json={"laboratoryHash": laboratoryContentHash("never sent"), "weights": {}}).json
+    assert response["status"] == "error" and "has to be sent again" in response["message"]
+
+    response = client.post("/optimize/jspl", json={"weights": {}}).json
+    assert response["status"] == "error" and "neither" in response["message"]
+
+
+def testInvalidSource(client):
+    response = client.post("/optimize/jspl", json={"laboratory": "tweakable or { }"}).json
+    assert response["status"] == "error" and "expected a name" in response["message"]
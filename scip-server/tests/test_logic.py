@@ -0,0 +1,116 @@
+import random
+import numpy as np
+import pytest
+import server
+from src.cache import LRUCache
+from src.evaluation import constructBatchEvaluator
+from src.logic import FULL, POLARITY, LogicEncoding, constructTweakables
+from laboratories import assignments, holds, optimum, post, randomLogic, raisedConcerns, score
+
+SEEDS = range(40)
+
+
+@pytest.mark.parametrize("encoding", [POLARITY, FULL])
+@pytest.mark.parametrize("seed", SEEDS)
+def testOptimum(client, seed, encoding):
+    data = {**randomLogic(seed), "encoding": encoding}
+    result = post(client, "/optimize/logic", data)
+
+    for name, value in data["fixed"].items():
+        assert result["tweakables"][name] == value
+    assert result["concerns"] == raisedConcerns(data, result["tweakables"])
+    assert score(data, result["tweakables"]) == optimum(data)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def testPresolve(seed):
+    data = randomLogic(seed)
+    encoding = LogicEncoding(constructTweakables(data["tweakables"]), data["raiseConditions"])
+    encoding.presolve(data["fixed"])
+
+    states = [raisedConcerns(data, assignment) for assignment in assignments(data)]
+    for concern in encoding.presolveReport["neverRaised"]:
+        assert not any(state[concern] for state in states)
+    for concern in encoding.presolveReport["alwaysRaised"]:
+        assert all(state[concern] for state in states)
+    # the fixed tweakables and the givens
+    assert set(encoding.fixed) == set(data["fixed"]) | {name for name, values in data["tweakables"].items() if len(values) == 1}
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def testEvaluator(seed):
+    data = randomLogic(seed)
+    evaluator = constructBatchEvaluator(data)
+    rng = random.Random(seed)
+    # more than one word of assignments, ignoring the fixed tweakables
+    batch = [{name: rng.choice(values) for name, values in data["tweakables"].items()} for _ in range(100)]
+
+    raised = evaluator.evaluate(batch)
+    for index, assignment in enumerate(batch):
+        state = raisedConcerns(data, assignment)
+        assert [bool(value) for value in raised[:, index]] == [state[concern] for concern in evaluator.concerns]
+    assert np.allclose(evaluator.objective(batch, data["weights"]), [score(data, assignment) for assignment in batch])
+
+
+def testDefinitions(client):
+    tweakables = {"a": [True, False], "b": ["x", "y", "z"]}
+    definitions = {"shared": {"type": "or", "left": {"type": "statement", "proposition": "a", "value": True}, "right": {"type": "statement", "proposition": "b", "value": "x"}}}
+    raiseConditions = {
+        "c1": {"type": "ref", "id": "shared"},
+        "c2": {"type": "and", "operands": [{"type": "not", "inner": {"type": "ref", "id": "shared"}}, {"type": "statement", "proposition": "b", "value": "z"}]},
+    }
+    data = {"tweakables": tweakables, "raiseConditions": raiseConditions, "definitions": definitions, "weights": {"c1": 3, "c2": 2}}
+    result = post(client, "/optimize/logic", data)
+    assert result["concerns"] == {concern: holds(condition, result["tweakables"], definitions) for concern, condition in raiseConditions.items()}
+    assert score(data, result["tweakables"]) == optimum(data) == 0
+
+
+@pytest.mark.parametrize("weights", [{"c0": 1, "c1": 2, "c2": 3}, {"c0": 5, "c1": 1, "c2": 2}, {"c0": 2, "c1": 4, "c2": 1}])
+def testReorderedInput(client, weights):
+    # the same structure in another key order is a different model, a cached one must not be reused for it
+    a = lambda value: {"type": "statement", "proposition": "a", "value": value}
+    b = {"type": "statement", "proposition": "b", "value": True}
+    data = {
+        "tweakables": {"a": ["x", "y", "z"], "b": [True, False]},
+        "raiseConditions": {"c0": {"type": "or", "left": a("x"), "right": b}, "c1": {"type": "and", "left": a("y"), "right": {"type": "not", "inner": b}},
+                            "c2": {"type": "or", "left": a("z"), "right": {"type": "not", "inner": b}}},
+        "weights": {"c0": 3, "c1": 3, "c2": 3},
+    }
+    post(client, "/optimize/logic", data)
+
+    reordered = {
+        "tweakables": dict(reversed(data["tweakables"].items())),
+        "raiseConditions": dict(reversed(data["raiseConditions"].items())),
+        "weights": weights,
+    }
+    result = post(client, "/optimize/logic", reordered)
+    assert score(reordered, result["tweakables"]) == optimum(reordered)
+
+
+def testCyclicDefinitions(client):
+    tweakables = {"a": [True, False]}
+    statement = {"type": "statement", "proposition": "a", "value": True}
+    for definitions in [
+        {"d": {"type": "or", "left": {"type": "ref", "id": "d"}, "right": statement}},
+        {"d": {"type": "not", "inner": {"type": "ref", "id": "e"}}, "e": {"type": "and", "operands": [statement, {"type": "ref", "id": "d"}]}},
+    ]:
+        data = {"tweakables": tweakables, "raiseConditions": {"c": {"type": "ref", "id": "d"}}, "definitions": definitions, "weights": {"c": 1}}
+        response = client.post("/optimize/logic", json=data).json
+        assert response["status"] == "error" and "refers to itself" in response["message"]
+
+
+def testEvaluatorCached(client, monkeypatch):
+    # the check reuses the evaluator of the model instead of encoding the raise conditions again
+    built = []
+    monkeypatch.setattr(server, "evaluators", LRUCache(4))
+    monkeypatch.setattr(server, "constructBatchEvaluator", lambda data: built.append(data) or constructBatchEvaluator(data))
+    data = randomLogic(5)
+    for scale in (1, 2, 3):
+        weights = {concern: weight * scale for concern, weight in data["weights"].items()}
+        result = post(client, "/optimize/logic", {**data, "weights": weights})
+        assert score({**data, "weights": weights}, result["tweakables"]) == optimum({**data, "weights": weights})
+    assert len(built) == 1
+
+    # a structure with other raise conditions has its own evaluator
+    post(client, "/optimize/logic", {**data, "raiseConditions": dict(list(data["raiseConditions"].items())[1:])})
+    assert len(built) == 2
@@ -0,0 +1,68 @@
+import re
+import server
+from src.cache import LRUCache
+from src.metrics import DURATION_BUCKETS, Histogram, formatNumber
+from laboratories import randomLogic
+
+SAMPLE = re.compile(r'^(\w+)(?:\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def exposition(client) -> dict[tuple[str, frozenset], float]:
+    response = client.get("/metrics")
+    assert response.status_code == 200 and response.content_type == "text/plain; version=0.0.4; charset=utf-8"
+    samples = dict()
+    for line in response.get_data(as_text=True).splitlines():
+        if line.startswith("#"):
+            continue
+        name, labels, value = SAMPLE.match(line).groups()
+        samples[(name, frozenset(LABEL.findall(labels or "")))] = float(value)
+    return samples
+
+
+def phase(samples: dict, suffix: str, name: str, **labels) -> float:
+    return samples.get((f"scip_phase_duration_seconds_{suffix}", frozenset({("phase", name), *labels.items()})), 0)
+
+
+def testPhaseHistograms(client, monkeypatch):
+    # a miss of every cache, so the request passes through all of its phases
+    for cache in ("models", "componentModels", "results", "evaluators"):
+        monkeypatch.setattr(server, cache, LRUCache(8))
+    before = exposition(client)
+    response = client.post("/optimize/logic", json=randomLogic(8)).json
+    assert response["status"] == "success"
+    after = exposition(client)
+
+    for name in ("decode", "parse", "build", "solve", "check", "encode"):
+        assert phase(after, "count", name) == phase(before, "count", name) + 1, name
+        assert phase(after, "sum", name) > phase(before, "sum", name)
+        # the buckets are cumulative and the last one holds every observation
+        buckets = [phase(after, "bucket", name, le=formatNumber(bound)) for bound in DURATION_BUCKETS]
+        assert buckets == sorted(buckets) and phase(after, "bucket", name, le="+Inf") == phase(after, "count", name)
+
+    requests = ("scip_requests_total", frozenset({("endpoint", "optimizeLogic")}))
+    assert after[requests] == before.get(requests, 0) + 1
+    duration = ("scip_request_duration_seconds_count", frozenset({("endpoint", "optimizeLogic")}))
+    assert after[duration] == before.get(duration, 0) + 1
+
+
+def testErrorsCounted(client):
+    errors = ("scip_request_errors_total", frozenset({("endpoint", "optimizeLogic")}))
+    before = exposition(client).get(errors, 0)
+    assert client.post("/optimize/logic", json={"tweakables": {}}).json["status"] == "error"
+    assert exposition(client)[errors] == before + 1
+
+
+def testHistogramRender():
+    histogram = Histogram("duration", "Some \"durations\".", ("phase",), buckets=(1, 0.1))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, "a\"b")
+    assert histogram.render() == [
+        "# HELP duration Some \"durations\".",
+        "# TYPE duration histogram",
+        "duration_bucket{phase=\"a\\\"b\",le=\"0.1\"} 2",
+        "duration_bucket{phase=\"a\\\"b\",le=\"1\"} 3",
+        "duration_bucket{phase=\"a\\\"b\",le=\"+Inf\"} 4",
+        "duration_sum{phase=\"a\\\"b\"} 3.65",
+        "duration_count{phase=\"a\\\"b\"} 4",
+    ]
@@ -0,0 +1,62 @@
+import itertools
+import random
+import pytest
+import server
+from src.cache import LRUCache
+from laboratories import post, randomLogic
+
+# a chain of covering constraints, a single component so the model is cached
+CONSTRAINTS = {
+    "rows": [0, 0, 1, 1, 2, 2, 3, 3],
+    "columns": [0, 1, 1, 2, 2, 3, 3, 4],
+    "coefficients": [1, 1, 1, 1, 1, 1, 1, 1],
+    "senses": [">=", ">=", ">=", ">="],
+    "rhs": [1, 1, 1, 1],
+}
+
+
+def bruteForce(coefficients: list[float]) -> float:
+    feasible = (values for values in itertools.product((0, 1), repeat=5) if all(values[row] + values[row + 1] >= 1 for row in range(4)))
+    return min(sum(coefficient * value for coefficient, value in zip(coefficients, values)) for values in feasible)
+
+
+@pytest.mark.parametrize("start", [None, {"columns": [0, 2], "values": [1, 0]}])
+def testCachedModelSolvedRepeatedly(client, start):
+    # every solve of a cached model is warm started, from the start or the previous solution
+    rng = random.Random(0)
+    for _ in range(15):
+        coefficients = [rng.randint(1, 20) for _ in range(5)]
+        data = {"variables": 5, "objective": {"columns": list(range(5)), "coefficients": coefficients}, "constraints": CONSTRAINTS}
+        if start is not None:
+            data["start"] = start
+        result = post(client, "/optimize", data)
+        assert sum(coefficient * result[str(column)] for column, coefficient in enumerate(coefficients)) == bruteForce(coefficients)
+
+
+def testResultCached(client, monkeypatch):
+    # a repeated request is answered from the result cache with the result of the first solve
+    monkeypatch.setattr(server, "results", LRUCache(8, sizeOf=len))
+    coefficients = [3, 1, 4, 1, 5]
+    data = {"variables": 5, "objective": {"columns": list(range(5)), "coefficients": coefficients}, "constraints": CONSTRAINTS}
+    first = client.post("/optimize", json=data).json
+    assert first["status"] == "success" and server.results.stats()["misses"] == 1
+    second = client.post("/optimize", json=data).json
+    # a cache hit carries no details of the solve
+    assert second == {"status": "success", "result": first["result"]}
+    assert server.results.stats()["hits"] == 1
+
+    # another objective is a different result
+    other = {**data, "objective": {"columns": list(range(5)), "coefficients": coefficients[::-1]}}
+    result = post(client, "/optimize", other)
+    assert sum(coefficient * result[str(column)] for column, coefficient in enumerate(coefficients[::-1])) == bruteForce(coefficients[::-1])
+    assert server.results.stats() | {"bytes": 0} == {"entries": 2, "bytes": 0, "hits": 1, "misses": 2, "evictions": 0, "expirations": 0}
+
+
+def testLogicResultCached(client, monkeypatch):
+    monkeypatch.setattr(server, "results", LRUCache(8, sizeOf=len))
+    data = randomLogic(6)
+    first = client.post("/optimize/logic", json=data).json
+    assert "model" in first
+    second = client.post("/optimize/logic", json=data).json
+    assert second == {"status": "success", "result": first["result"]}
+    assert server.results.stats()["hits"] == 1
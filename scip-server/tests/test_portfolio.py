@@ -0,0 +1,65 @@
+import json
+import pytest
+import server
+from src.cache import LRUCache
+from src.portfolio import CONFIGURATIONS, Portfolio
+from src.problem import constructInputProblem
+from laboratories import optimum, randomLogic, score
+from test_optimize import CONSTRAINTS, bruteForce
+
+
+@pytest.fixture
+def portfolio(monkeypatch):
+    portfolio = Portfolio(3)
+    monkeypatch.setattr(server, "portfolio", portfolio)
+    monkeypatch.setattr(server, "results", LRUCache(8))
+    yield portfolio
+    for member in portfolio.members:
+        if member._process is not None:
+            member._process.kill()
+            member._process.join()
+
+
+@pytest.mark.parametrize("coefficients", [[4, 1, 3, 2, 5], [1, 5, 1, 5, 1], [2, 2, 2, 2, 2]])
+def testOptimize(client, portfolio, coefficients):
+    data = {"variables": 5, "objective": {"columns": list(range(5)), "coefficients": coefficients}, "constraints": CONSTRAINTS}
+    response = client.post("/optimize", json=data).json
+    assert response["status"] == "success", response
+    result = json.loads(response["result"])
+    assert sum(coefficient * result[str(column)] for column, coefficient in enumerate(coefficients)) == bruteForce(coefficients)
+
+    report = response["portfolio"]
+    assert report["winner"] in list(CONFIGURATIONS)[:3] and report["solverStatus"] == "optimal" and report["size"] == 3
+
+
+def testLogic(client, portfolio):
+    for seed in range(3):
+        data = randomLogic(seed)
+        response = client.post("/optimize/logic", json=data).json
+        assert response["portfolio"]["winner"] in CONFIGURATIONS
+        assert score(data, json.loads(response["result"])["tweakables"]) == optimum(data)
+
+
+def testWinsCounted(client, portfolio):
+    data = {"variables": 5, "objective": {"columns": list(range(5)), "coefficients": [3, 2, 4, 1, 2]}, "constraints": CONSTRAINTS}
+    winner = client.post("/optimize", json=data).json["portfolio"]["winner"]
+    assert f"scip_portfolio_wins_total{{configuration=\"{winner}\"}}" in client.get("/metrics").get_data(as_text=True)
+
+
+def testNoSolution(client, portfolio):
+    # every member fails on an infeasible model, the errors of all of them are reported
+    data = {"variables": 1, "objective": {"columns": [0], "coefficients": [1]},
+            "constraints": {"rows": [0], "columns": [0], "coefficients": [1], "senses": [">="], "rhs": [2]}}
+    with pytest.raises(Exception, match="No member of the portfolio found a solution") as error:
+        portfolio.solve(constructInputProblem(data))
+    # in the order the members finished
+    assert all(f"{member.name}: No solution found" in str(error.value) for member in portfolio.members)
+    assert client.post("/optimize", json=data).json["status"] == "error"
+    # the members still solve the next model
+    data = {"variables": 5, "objective": {"columns": list(range(5)), "coefficients": [1, 1, 1, 1, 1]}, "constraints": CONSTRAINTS}
+    assert client.post("/optimize", json=data).json["status"] == "success"
+
+
+def testSize():
+    with pytest.raises(Exception, match="needs more than the"):
+        Portfolio(len(CONFIGURATIONS) + 1)
@@ -0,0 +1,53 @@
+import json
+import pytest
+import server
+from laboratories import optimum, post, randomLogic, raisedConcerns, score
+
+SEEDS = range(10)
+
+
+def solve(client, data: dict) -> dict:
+    response = client.post("/optimize/logic", json=data).json
+    assert response["status"] == "success", response
+    return {**response, "result": json.loads(response["result"])}
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def testSearch(client, seed):
+    data = {**randomLogic(seed), "method": "search", "searchTime": 0.1}
+    response = solve(client, data)
+    result = response["result"]
+
+    for name, value in data["fixed"].items():
+        assert result["tweakables"][name] == value
+    assert result["concerns"] == raisedConcerns(data, result["tweakables"])
+    assert score(data, result["tweakables"]) == response["search"]["objective"] >= optimum(data)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def testSeeded(client, seed):
+    data = {**randomLogic(seed), "method": "seeded", "searchTime": 0.1}
+    result = post(client, "/optimize/logic", data)
+    assert score(data, result["tweakables"]) == optimum(data)
+
+
+def testSearchNotCached(client):
+    # every search runs again instead of returning the first result found
+    data = {**randomLogic(3), "method": "search", "searchTime": 0.05}
+    entries = server.results.stats()["entries"]
+    for _ in range(3):
+        assert "search" in solve(client, data)
+    assert server.results.stats()["entries"] == entries
+
+
+def testSeededStart(client):
+    # the seed of a seeded solve is part of its result key
+    data = {**randomLogic(4), "method": "seeded", "searchTime": 0.05}
+    names = [name for name, values in data["tweakables"].items() if name not in data["fixed"]]
+    first = {name: data["tweakables"][name][0] for name in names}
+    second = {name: data["tweakables"][name][-1] for name in names}
+
+    assert "search" in solve(client, {**data, "start": first})
+    assert "search" in solve(client, {**data, "start": second})
+    # the same seed again is a cache hit without details
+    assert "search" not in solve(client, {**data, "start": second})
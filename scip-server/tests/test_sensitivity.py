@@ -0,0 +1,30 @@
+import pytest
+from laboratories import assignments, post, randomLogic, raisedConcerns, score
+
+SEEDS = range(30)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def testRanges(client, seed):
+    data = {**randomLogic(seed), "sensitivity": True}
+    result = post(client, "/optimize/logic", data)
+    optimum = score(data, result["tweakables"])
+    states = [raisedConcerns(data, assignment) for assignment in assignments(data)]
+
+    for concern, (lower, upper) in result["sensitivity"].items():
+        weight = data["weights"][concern]
+        raised = result["concerns"][concern]
+        # the best assignment with the concern in the other state catches up with the optimum at the end of the range
+        others = [sum(data["weights"][other] for other, value in state.items() if value) for state in states if state[concern] != raised]
+        if len(others) == 0:
+            assert (lower, upper) == (None, None)
+        elif raised:
+            assert lower is None and upper == pytest.approx(weight + min(others) - optimum)
+        else:
+            assert upper is None and lower == pytest.approx(weight - (min(others) - optimum))
+
+
+def testSelectedConcerns(client):
+    data = {**randomLogic(1), "sensitivity": ["c0", "c2"]}
+    result = post(client, "/optimize/logic", data)
+    assert set(result["sensitivity"]) == {"c0", "c2"}
@@ -0,0 +1,57 @@
+import os
+import runpy
+from types import SimpleNamespace
+import pytest
+import server
+from laboratories import post
+
+CONFIGURATION = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gunicorn.conf.py")
+
+
+def configuration(monkeypatch, **environment) -> dict:
+    for name in ("SCIP_STATEFUL_ENDPOINTS", "SCIP_WORKERS", "SCIP_MAX_REQUESTS"):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in environment.items():
+        monkeypatch.setenv(name, value)
+    return runpy.run_path(CONFIGURATION)
+
+
+def start(settings: dict, **overrides):
+    cfg = SimpleNamespace(workers=settings["workers"], max_requests=settings["max_requests"])
+    for name, value in overrides.items():
+        setattr(cfg, name, value)
+    settings["on_starting"](SimpleNamespace(cfg=cfg))
+
+
+def testSingleWorker(monkeypatch):
+    settings = configuration(monkeypatch)
+    assert settings["workers"] == 1 and settings["max_requests"] == 0
+    start(settings)
+    # several workers or recycling would lose jobs and sessions
+    with pytest.raises(RuntimeError, match="single worker"):
+        start(configuration(monkeypatch, SCIP_WORKERS="4"))
+    with pytest.raises(RuntimeError, match="single worker"):
+        start(settings, workers=2)
+    with pytest.raises(RuntimeError, match="Recycled"):
+        start(configuration(monkeypatch, SCIP_MAX_REQUESTS="100"))
+
+
+def testStatelessWorkers(monkeypatch):
+    settings = configuration(monkeypatch, SCIP_STATEFUL_ENDPOINTS="0")
+    assert settings["workers"] == (os.cpu_count() or 1) and settings["max_requests"] > 0
+    start(settings)
+    start(configuration(monkeypatch, SCIP_STATEFUL_ENDPOINTS="0", SCIP_WORKERS="4"))
+    # the solver pools split the cores by SCIP_WORKERS
+    with pytest.raises(RuntimeError, match="SCIP_WORKERS"):
+        start(settings, workers=settings["workers"] + 1)
+
+
+def testStatefulRoutesTurnedOff(client, monkeypatch):
+    monkeypatch.setattr(server, "STATEFUL_ENDPOINTS", False)
+    for method, path in [("post", "/jobs"), ("get", "/jobs/1"), ("delete", "/jobs/1"), ("get", "/jobs"), ("post", "/sessions"),
+                         ("patch", "/sessions/1"), ("delete", "/sessions/1"), ("get", "/metrics"), ("get", "/cache")]:
+        response = getattr(client, method)(path, json={})
+        assert response.status_code == 404 and "turned off" in response.json["message"]
+
+    data = {"tweakables": {"a": [True, False]}, "raiseConditions": {"c": {"type": "statement", "proposition": "a", "value": True}}, "weights": {"c": 1}}
+    assert post(client, "/optimize/logic", data)["tweakables"] == {"a": False}
@@ -0,0 +1,46 @@
+import json
+import pytest
+
+
+def create(client) -> str:
+    response = client.post("/sessions", json={
+        "addVariables": ["a", "b", "c"],
+        "addConstraints": {"c1": {"coefficients": {"a": 1, "b": 1}, "sense": ">=", "rhs": 1}, "c2": {"coefficients": {"b": 1, "c": 1}, "sense": ">=", "rhs": 1}},
+        "objective": {"coefficients": {"a": 1, "b": 3, "c": 1}},
+    }).get_json()
+    assert response["status"] == "success", response
+    assert json.loads(response["result"]) == {"a": 1, "b": 0, "c": 1}
+    return response["session"]
+
+
+def testRepeatedPatches(client):
+    # every solve starts from the previous solution, far more often than SCIP keeps solutions
+    session = create(client)
+    for index in range(15):
+        response = client.patch(f"/sessions/{session}", json={"objective": {"coefficients": {"a": 1 + index % 4, "b": 3, "c": 1 + index % 3}}}).get_json()
+        assert response["status"] == "success", response
+        result = json.loads(response["result"])
+        a, c = 1 + index % 4, 1 + index % 3
+        assert a * result["a"] + 3 * result["b"] + c * result["c"] == min(a + c, 3)
+
+
+@pytest.mark.parametrize("change", [
+    # the first removal would be valid, the added constraint has no right hand side
+    {"removeConstraints": ["c1"], "addConstraints": {"c3": {"coefficients": {"a": 1}, "sense": "<="}}},
+    {"removeConstraints": ["c2", "c2"]},
+    {"removeConstraints": ["c2"], "removeVariables": ["c", "c"]},
+    {"addVariables": ["d", "d"]},
+    {"removeConstraints": ["c1"], "addConstraints": {"c3": {"coefficients": {"a": "1"}, "sense": "<=", "rhs": 1}}},
+    {"removeConstraints": ["c1"], "addConstraints": {"c3": {"coefficients": ["a"], "sense": "<=", "rhs": 1}}},
+    {"removeConstraints": ["c1"], "objective": {"coefficients": {"a": 1}, "offset": "2"}},
+    {"removeConstraints": "c1"},
+])
+def testRejectedChange(client, change):
+    session = create(client)
+    response = client.patch(f"/sessions/{session}", json=change).get_json()
+    assert response["status"] == "error"
+
+    # the session is as it was before the rejected change
+    response = client.patch(f"/sessions/{session}", json={"removeConstraints": ["c1", "c2"], "removeVariables": ["c"]}).get_json()
+    assert response["status"] == "success", response
+    assert response["model"]["variables"] == 2 and response["model"]["constraints"] == 0
@@ -0,0 +1,93 @@
+import sqlite3
+import time
+import server
+from src.cache import LRUCache
+from src.store import PersistentStore
+
+
+def testExpiry(tmp_path):
+    store = PersistentStore(str(tmp_path / "store.sqlite3"), 1024 * 1024)
+    store.put("result", "kept", b"kept")
+    store.put("result", "expiring", b"expiring", 0.2)
+    assert store.get("result", "expiring") == b"expiring"
+    value, ttl = store.entry("result", "expiring")
+    assert 0 < ttl <= 0.2
+
+    time.sleep(0.3)
+    assert store.get("result", "expiring") is None
+    assert store.get("result", "kept") == b"kept"
+    assert store.stats()["expirations"] == 1 and store.stats()["entries"] == 1
+
+
+def testStoreWithoutExpiry(tmp_path):
+    # a store file from before entries could expire
+    path = str(tmp_path / "store.sqlite3")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE entries (kind TEXT, key TEXT, value BLOB, size INTEGER, used REAL, PRIMARY KEY (kind, key))")
+    connection.execute("INSERT INTO entries VALUES ('result', 'old', X'6F6C64', 3, 0)")
+    connection.commit()
+    connection.close()
+
+    store = PersistentStore(path, 1024 * 1024)
+    assert store.get("result", "old") == b"old"
+    store.put("result", "new", b"new", 60)
+    assert store.entry("result", "new")[1] > 0
+
+
+def testExpiredResult(tmp_path, client, monkeypatch):
+    # an expired result is solved again instead of being loaded from the store
+    monkeypatch.setattr(server, "store", PersistentStore(str(tmp_path / "store.sqlite3"), 1024 * 1024))
+    monkeypatch.setattr(server, "RESULT_CACHE_TTL", 0.2)
+    monkeypatch.setattr(server, "results", LRUCache(server.RESULT_CACHE_SIZE, ttl=0.2))
+    data = {"tweakables": {"a": [True, False]}, "raiseConditions": {"c": {"type": "statement", "proposition": "a", "value": True}}, "weights": {"c": 1}}
+    solved = lambda: "model" in client.post("/optimize/logic", json=data).json
+
+    assert solved()
+    assert not solved()
+    # a restarted server only has the store
+    monkeypatch.setattr(server, "results", LRUCache(server.RESULT_CACHE_SIZE, ttl=0.2))
+    assert not solved()
+    time.sleep(0.3)
+    # the result loaded from the store expires together with its stored copy
+    assert solved()
+
+
+def testEviction(tmp_path):
+    store = PersistentStore(str(tmp_path / "store.sqlite3"), 100)
+    for index in range(10):
+        store.put("result", f"r{index}", bytes(30))
+    # the least recently used entries go first
+    assert [store.get("result", f"r{index}") is not None for index in range(10)] == [False] * 7 + [True] * 3
+    assert store.stats()["evictions"] == 7
+
+    store.get("result", "r7")
+    store.put("result", "r8", bytes(10))
+    store.put("result", "large", bytes(60))
+    assert store.get("result", "r9") is None and store.get("result", "r7") is not None
+
+    connection = sqlite3.connect(str(tmp_path / "store.sqlite3"))
+    assert store.stats()["bytes"] == connection.execute("SELECT SUM(size) FROM entries").fetchone()[0] == 100
+    plan = " ".join(row[-1] for row in connection.execute("EXPLAIN QUERY PLAN SELECT kind, key, size FROM entries ORDER BY used LIMIT 64"))
+    assert "entriesUsed" in plan
+
+
+def testRunningTotal(tmp_path):
+    # replaced, expired and deleted entries keep the total in line with the entries
+    path = str(tmp_path / "store.sqlite3")
+    store = PersistentStore(path, 1024 * 1024)
+    store.put("result", "a", bytes(10))
+    store.put("result", "a", bytes(25))
+    store.put("result", "b", bytes(5), 0.1)
+    time.sleep(0.2)
+    assert store.get("result", "b") is None
+    assert store.stats()["bytes"] == 25
+
+    # a second process sharing the file and a store from before the totals
+    other = PersistentStore(path, 1024 * 1024)
+    other.put("problem", "c", bytes(7))
+    assert store.stats()["bytes"] == 32
+    connection = sqlite3.connect(path)
+    connection.execute("DROP TABLE totals")
+    connection.commit()
+    connection.close()
+    assert PersistentStore(path, 1024 * 1024).stats()["bytes"] == 32
@@ -0,0 +1,69 @@
+import itertools
+import json
+import server
+from src.cache import canonicalHash
+from test_decomposition import chains
+from test_optimize import CONSTRAINTS
+
+
+def events(response) -> list[tuple[str, dict]]:
+    assert response.mimetype == "text/event-stream"
+    result = []
+    for block in response.get_data(as_text=True).strip().split("\n\n"):
+        name, data = block.split("\n")
+        result.append((name.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return result
+
+
+def bruteForce(data: dict) -> float:
+    rows = [dict() for _ in data["constraints"]["rhs"]]
+    for row, column, coefficient in zip(data["constraints"]["rows"], data["constraints"]["columns"], data["constraints"]["coefficients"]):
+        rows[row][column] = coefficient
+    objective = dict(zip(data["objective"]["columns"], data["objective"]["coefficients"]))
+    feasible = (values for values in itertools.product((0, 1), repeat=data["variables"])
+                if all(sum(coefficient * values[column] for column, coefficient in row.items()) >= rhs for row, rhs in zip(rows, data["constraints"]["rhs"])))
+    return min(sum(coefficient * values[column] for column, coefficient in objective.items()) for values in feasible)
+
+
+def testIncumbents(client):
+    coefficients = [4, 3, 5, 2, 6]
+    data = {"variables": 5, "objective": {"columns": list(range(5)), "coefficients": coefficients}, "constraints": {**CONSTRAINTS, "rhs": [1, 1, 1, 1.5]}}
+    streamed = events(client.post("/optimize/stream", json=data))
+
+    names = [name for name, _ in streamed]
+    assert names[0] == "incumbent" and names[-1] == "done" and set(names[:-1]) == {"incumbent"}
+    # every incumbent improves on the one before
+    objectives = [payload["objective"] for _, payload in streamed]
+    assert objectives == sorted(objectives, reverse=True)
+    assert objectives[-1] == bruteForce(data)
+
+    # the single component model is cached for the next request
+    assert server.models.get(canonicalHash(data["variables"], data["constraints"])) is not None
+
+
+def testComponentsNotCached(client):
+    # a model of several components must not be cached as if it was a single one
+    coefficients = [2, 1, 2, 3, 1, 1, 1, 2, 3]
+    data = {"variables": 9, "objective": {"columns": list(range(9)), "coefficients": coefficients}, "constraints": chains(3)}
+    streamed = events(client.post("/optimize/stream", json=data))
+    assert streamed[-1][0] == "done" and streamed[-1][1]["objective"] == bruteForce(data)
+    assert server.models.get(canonicalHash(data["variables"], data["constraints"])) is None
+
+    data["objective"]["coefficients"] = coefficients[::-1]
+    response = client.post("/optimize", json=data).json
+    assert response["decomposition"]["components"] == 3
+    result = json.loads(response["result"])
+    assert sum(coefficient * result[str(column)] for column, coefficient in enumerate(coefficients[::-1])) == bruteForce(data)
+
+
+def testFailedBuildKeepsModel(client):
+    data = {"variables": 5, "objective": {"columns": list(range(5)), "coefficients": [1, 2, 3, 4, 5]}, "constraints": {**CONSTRAINTS, "rhs": [1, 1, 1, 2]}}
+    key = canonicalHash(data["variables"], data["constraints"])
+    assert events(client.post("/optimize/stream", json=data))[-1][0] == "done"
+    assert server.models.get(key) is not None
+
+    # the start is rejected while the cached model is prepared
+    response = client.post("/optimize/stream", json={**data, "start": {"columns": [0], "values": [2]}}).json
+    assert response["status"] == "error"
+    assert server.models.get(key) is not None
+    assert events(client.post("/optimize/stream", json=data))[-1][0] == "done"
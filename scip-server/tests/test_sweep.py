@@ -0,0 +1,18 @@
+import json
+import random
+import pytest
+from laboratories import optimum, post, randomLogic, score
+
+
+@pytest.mark.parametrize("seed", range(10))
+def testSweep(client, seed):
+    data = randomLogic(seed)
+    rng = random.Random(seed)
+    # more weight sets than SCIP keeps solutions, most of them share the signs and thereby one model
+    weightSets = [{concern: rng.randint(1, 10) for concern in data["raiseConditions"]} for _ in range(15)]
+    weightSets += [{concern: rng.randint(-5, 10) for concern in data["raiseConditions"]} for _ in range(5)]
+    response = post(client, "/optimize/logic/sweep", {key: value for key, value in data.items() if key != "weights"} | {"weightSets": weightSets})
+
+    assert len(response["results"]) == len(weightSets)
+    for weights, result in zip(weightSets, response["results"]):
+        assert score(data, json.loads(result)["tweakables"], weights) == optimum(data, weights)
@@ -1,9 +1,11 @@
 // @ts-check
 import { html, render } from "./res/htm_preact_standalone.js";
 import { metaData, givens, tweakables, concerns, raiseConditions } from "./data.js";
-import { constructOptimizerInput } from "./optimization.js";
+import { addStartAssignment, constructOptimizerInput } from "./optimization.js";
 
 
+const MAX_GET_INPUT_LENGTH = 2000;
+
 let appLoaded = false;
 let paintScheduled = true;
 const paintSync = () => {
@@ -386,6 +388,7 @@ function optimizeAction() {
 		raiseConditions,
 		selectedWeights
 	);
+	addStartAssignment(reversibleInput, selections);
 
 	// TODO: remove debug
 	{
@@ -445,7 +448,7 @@ function optimizeAction() {
 		`;
 	}
 
-	fetch(`${metaData.scipUrl}?input=${encodeApiInput(reversibleInput.optimizerInput)}`)
+	requestOptimization(reversibleInput.optimizerInput)
 	.then(response => response.json())
 	.then(data => {
 		// @ts-ignore
@@ -546,10 +549,27 @@ function generateOptimizedRaisedConcerns(result, variableMeaningMap) {
 	`;
 }
 
-function encodeApiInput(jsonObject) {
-	// TODO: base 64 encode
-	//return btoa(JSON.stringify(jsonObject))
-	return encodeURIComponent(JSON.stringify(jsonObject));
+/**
+ * Small inputs are sent as query parameter, larger ones as (gzip compressed) POST body to avoid URL length limits.
+ * @param {Object} optimizerInput
+ * @returns {Promise<Response>}
+ */
+async function requestOptimization(optimizerInput) {
+	let json = JSON.stringify(optimizerInput);
+	if (json.length <= MAX_GET_INPUT_LENGTH) {
+		return fetch(`${metaData.scipUrl}?input=${encodeURIComponent(json)}`);
+	}
+
+	/** @type {Record<string, string>} */
+	let headers = { "Content-Type": "application/json" };
+	/** @type {BodyInit} */
+	let body = json;
+	if (typeof CompressionStream !== "undefined") {
+		body = await new Response(new Blob([json]).stream().pipeThrough(new CompressionStream("gzip"))).blob();
+		headers["Content-Encoding"] = "gzip";
+	}
+
+	return fetch(metaData.scipUrl, { method: "POST", headers: headers, body: body });
 }
 
 function toStringRaiseCondition(condition) {
@@ -3,6 +3,7 @@
  * @property {string} objective 
  * @property {Array<string>} variables
  * @property {Array<string>} constraints
+ * @property {Object<string, number>} [start] initial values of variables, used by the solver as starting point
  */
 
 
@@ -90,6 +91,26 @@ export function constructOptimizerInput(tweakables, raiseConditions, weights) {
 }
 
 
+/**
+ * Sets the value variables of the currently selected tweakable values as start of the optimization.
+ * The selection starts out at the defaults and usually is close to the optimum.
+ * @param {ReversibleOptimizerInput} reversibleInput 
+ * @param {Map<string, string | boolean>} selections 
+ */
+export function addStartAssignment(reversibleInput, selections) {
+    /** @type {Object<string, number>} */
+    let start = {};
+    reversibleInput.variableMeaningMap.propositions.forEach((valueVariables, name) => {
+        if (!selections.has(name)) return;
+
+        let selected = String(selections.get(name));
+        Object.keys(valueVariables).forEach((value) => {
+            start[valueVariables[value]] = (value === selected) ? 1 : 0;
+        });
+    });
+    reversibleInput.optimizerInput.start = start;
+}
+
 /**
  * 
  * @param {OptimizerInput} input 